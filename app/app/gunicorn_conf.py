@@ -0,0 +1,83 @@
+"""
+gunicorn config for the production server, e.g.
+
+    gunicorn -c python:app.gunicorn_conf app.wsgi:application
+
+Sizes derive from the CPUs available to the process and can be
+overridden with the GUNICORN_* environment variables
+"""
+
+import os
+
+
+def cpu_count():
+    """
+    Return the CPUs the process may run on, which honours container and
+    taskset limits unlike os.cpu_count()
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_workers(cpus):
+    """
+    Return the worker processes for the given CPUs, two per CPU plus one
+    so a worker is always ready while others wait on the database
+    """
+    return cpus * 2 + 1
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', default_workers(cpu_count())))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+# Import the apps and models once in the arbiter and fork the workers
+# afterwards, sharing that memory copy on write and starting faster
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# Recycle workers now and then so a slow leak cannot grow unbounded, the
+# jitter keeps them from restarting all at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+# Workers heartbeat through this dir, keep it off a disk backed /tmp
+worker_tmp_dir = os.environ.get('GUNICORN_WORKER_TMP_DIR', '/dev/shm')
+forwarded_allow_ips = os.environ.get('GUNICORN_FORWARDED_ALLOW_IPS', '*')
+
+
+def when_ready(server):
+    """
+    Load the URLconf, and with it the views and serializers, in the
+    arbiter too when the app is preloaded
+    """
+    if server.cfg.preload_app:
+        from django.urls import get_resolver
+        get_resolver().url_patterns
+
+
+def pre_fork(server, worker):
+    """
+    Close the arbiter's database connections and pools before forking, a
+    worker must not inherit and share their sockets
+    """
+    if server.cfg.preload_app:
+        from django.db import connections
+        from core.db.pool import close_pools
+        connections.close_all()
+        close_pools()
+
+
+def child_exit(server, worker):
+    """
+    Let the metrics of a stopped worker be summed up without it
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
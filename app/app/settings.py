@@ -20,12 +20,18 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # See https://docs.djangoproject.com/en/3.0/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'x&&0e8)^3(y)yxdxhw$zv*p)7&eh60*@jx+5ugxb$=ng&d!jq!'
+SECRET_KEY = os.environ.get(
+    'DJANGO_SECRET_KEY',
+    'x&&0e8)^3(y)yxdxhw$zv*p)7&eh60*@jx+5ugxb$=ng&d!jq!'
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [
+    host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',')
+    if host
+]
 
 
 
@@ -39,6 +45,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'core',
@@ -48,6 +55,8 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.QueryDetectorMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,21 +86,91 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'app.wsgi.application'
 
+# manage.py test --detect-queries fails the tests of QUERY_CHECKED_TESTS
+# when a request they make trips the query detector
+TEST_RUNNER = 'core.test_runner.QueryCheckRunner'
+QUERY_CHECKED_TESTS = ('recipe.tests', 'user.tests')
+
 
 # Database
 # https://docs.djangoproject.com/en/3.0/ref/settings/#databases
 
+# core.db.postgresql keeps a pool of connections per process, SIZE should
+# cover the threads of a worker, 0 turns pooling off. Connections older
+# than MAX_AGE seconds are recycled and idle ones answer a SELECT 1 before
+# they are reused, TIMEOUT bounds the wait for a free one.
+# DB_CONNECT_TIMEOUT bounds every connection attempt, so wait_for_db and
+# the readiness probe fail fast instead of hanging on an unreachable host
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+        },
+        'POOL': {
+            'SIZE': DB_POOL_SIZE,
+            'MAX_AGE': int(os.environ.get('DB_POOL_MAX_AGE', 1800)),
+            'TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'PRE_PING': os.environ.get('DB_POOL_PRE_PING', '1') == '1',
+        } if DB_POOL_SIZE else None,
     }
 }
 
 
+# Cache
+# Every process must share the caches, or a process keeps serving lists
+# and tokens another one invalidated. Set REDIS_URL, e.g.
+# redis://redis:6379/0, to use Redis for both aliases, or point each one
+# elsewhere with CACHE_BACKEND/CACHE_LOCATION and AUTH_CACHE_BACKEND/
+# AUTH_CACHE_LOCATION. Without them the caches are process local, which
+# only holds for a single process, `check --deploy` reports it
+REDIS_URL = os.environ.get('REDIS_URL', '')
+REDIS_CACHE_BACKEND = 'django_redis.cache.RedisCache'
+LOCAL_CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            REDIS_CACHE_BACKEND if REDIS_URL else LOCAL_CACHE_BACKEND
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', REDIS_URL),
+    },
+    # Authenticated tokens, shared so revoked tokens are dropped in every
+    # process before the timeout
+    'auth': {
+        'BACKEND': os.environ.get(
+            'AUTH_CACHE_BACKEND',
+            REDIS_CACHE_BACKEND if REDIS_URL else LOCAL_CACHE_BACKEND
+        ),
+        'LOCATION': os.environ.get(
+            'AUTH_CACHE_LOCATION', REDIS_URL or 'auth-tokens'
+        ),
+        'TIMEOUT': int(os.environ.get('AUTH_TOKEN_CACHE_TIMEOUT', 60)),
+        'KEY_PREFIX': 'auth',
+        'OPTIONS': {} if REDIS_URL else {'MAX_ENTRIES': 10000},
+    },
+}
+
+AUTH_TOKEN_CACHE_ALIAS = 'auth'
+
+RECIPE_CACHE_ALIAS = 'default'
+RECIPE_CACHE_TIMEOUT = int(os.environ.get('RECIPE_CACHE_TIMEOUT', 300))
+
+# Serve recipe lists from values() rows instead of model instances,
+# rendered with orjson when it is installed
+RECIPE_FAST_LIST = os.environ.get('RECIPE_FAST_LIST', '1') == '1'
+
+# Text search configuration used for the recipe search vectors
+RECIPE_SEARCH_CONFIG = 'english'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -110,6 +189,32 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing, the preferred hasher comes first and hashes made by
+# any other listed one are upgraded to it on login. Argon2 and bcrypt
+# need the argon2-cffi or bcrypt package installed
+PASSWORD_HASH_ITERATIONS = int(
+    os.environ.get('PASSWORD_HASH_ITERATIONS', 180000)
+)
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'core.hashers.TunedPBKDF2PasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'bcrypt': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHER = PASSWORD_HASHER_CHOICES[
+    os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+]
+PASSWORD_HASHERS = [PASSWORD_HASHER] + [
+    hasher for hasher in PASSWORD_HASHER_CHOICES.values()
+    if hasher != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+# Logins check passwords on a bounded pool of hashing threads, logins
+# beyond the workers and queue are turned away with a 429
+AUTHENTICATION_BACKENDS = ['user.backends.PooledModelBackend']
+LOGIN_HASH_WORKERS = int(os.environ.get('LOGIN_HASH_WORKERS', 4))
+LOGIN_HASH_QUEUE = int(os.environ.get('LOGIN_HASH_QUEUE', 16))
+LOGIN_HASH_TIMEOUT = 10
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.0/topics/i18n/
@@ -135,3 +240,49 @@ MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
 AUTH_USER_MODEL = 'core.User'
+
+# Per view request metrics (core.middleware), served at /metrics, which
+# asks for this bearer token when set. Server-Timing headers with the
+# timings of each response are only sent with METRICS_SERVER_TIMING or
+# DEBUG on. Set PROMETHEUS_MULTIPROC_DIR to an empty dir to collect the
+# metrics of every worker process
+METRICS_SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING', '0') == '1'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# N+1 and slow query detection (core.querycheck), meant for staging. A
+# request running one query shape REPEAT_THRESHOLD times or more, or a
+# query slower than SLOW_QUERY_TIME seconds, goes to the handlers
+QUERY_DETECTOR_ENABLED = os.environ.get('QUERY_DETECTOR_ENABLED') == '1'
+QUERY_DETECTOR_REPEAT_THRESHOLD = int(
+    os.environ.get('QUERY_DETECTOR_REPEAT_THRESHOLD', 5)
+)
+QUERY_DETECTOR_SLOW_QUERY_TIME = float(
+    os.environ.get('QUERY_DETECTOR_SLOW_QUERY_TIME', 0.1)
+)
+QUERY_DETECTOR_HANDLERS = ['core.querycheck.log_violations']
+
+# Thread pools of the ASGI server mode (app.asgi), reads of the recipe,
+# tag and ingrediant endpoints have their own pool. Requests beyond the
+# threads and queue of a pool get a 503
+ASGI_READ_THREADS = int(os.environ.get('ASGI_READ_THREADS', 16))
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 8))
+ASGI_QUEUE_SIZE = int(os.environ.get('ASGI_QUEUE_SIZE', 256))
+
+# Recipe image processing, 0 workers processes uploads inline
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+# Pending images not processed this many seconds after being queued are
+# queued again on access, their job was lost with a stopped worker
+RECIPE_IMAGE_PENDING_TIMEOUT = int(
+    os.environ.get('RECIPE_IMAGE_PENDING_TIMEOUT', 300)
+)
+RECIPE_IMAGE_RENDITION_WIDTHS = (320, 640, 1280)
+RECIPE_IMAGE_QUALITY = 80
+
+# Resumable recipe image uploads, keep the temp dir on the media volume
+# so finished uploads are moved into place instead of copied
+RECIPE_UPLOAD_TEMP_DIR = os.environ.get(
+    'RECIPE_UPLOAD_TEMP_DIR', '/vol/web/uploads'
+)
+RECIPE_UPLOAD_MAX_SIZE = 20 * 1024 * 1024
+RECIPE_UPLOAD_MAX_CHUNK_SIZE = 5 * 1024 * 1024
+RECIPE_UPLOAD_EXPIRY = 24 * 60 * 60
@@ -18,9 +18,21 @@ from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 
+from core import views as core_views
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/user/', include('user.urls')),
     path('api/recipe/', include('recipe.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('healthz', core_views.liveness, name='liveness'),
+    path('readyz', core_views.readiness, name='readiness'),
+    path('metrics', core_views.prometheus_metrics, name='metrics'),
+]
+
+# Only the development server serves media, in production nginx sends
+# the files (proxy/default.conf)
+if settings.DEBUG:
+    urlpatterns += static(
+        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
+    )
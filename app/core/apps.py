@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db.models import CharField
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from core.lookups import ILikeContains
+        CharField.register_lookup(ILikeContains)
+
+        import core.checks  # noqa: F401
+        import core.signals  # noqa: F401
@@ -0,0 +1,196 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.core import signals
+from django.core.exceptions import RequestAborted
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections
+from django.http import FileResponse, HttpResponse
+from django.urls import Resolver404, resolve, set_script_prefix
+
+READ_ROUTES = frozenset((
+    'recipe:recipe-list', 'recipe:recipe-detail',
+    'recipe:tag-list', 'recipe:tag-detail',
+    'recipe:ingrediant-list', 'recipe:ingrediant-detail',
+))
+READ_METHODS = ('GET', 'HEAD')
+
+
+class BoundedPool:
+    """
+    Thread pool refusing work once its threads and queue are all taken,
+    so a burst is turned away instead of queueing without limit
+    """
+
+    def __init__(self, name, threads, queue):
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix=name
+        )
+        self.limit = threads + queue
+        # Only touched from the event loop thread
+        self.in_flight = 0
+
+    def acquire(self):
+        if self.in_flight >= self.limit:
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run a sync callable on the pool and await its result
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+
+
+class PooledASGIHandler(ASGIHandler):
+    """
+    ASGI handler running Django's sync request handling on bounded thread
+    pools. Reads of the recipe, tag and ingrediant endpoints get their own
+    pool, so slow writes and uploads cannot starve them, and every ORM
+    call, including streamed responses, stays off the event loop
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.read_pool = BoundedPool(
+            'asgi-read', settings.ASGI_READ_THREADS, settings.ASGI_QUEUE_SIZE
+        )
+        self.pool = BoundedPool(
+            'asgi', settings.ASGI_THREADS, settings.ASGI_QUEUE_SIZE
+        )
+
+    def pool_for(self, request):
+        """
+        Return the pool serving a request
+        """
+        if request.method in READ_METHODS:
+            try:
+                match = resolve(request.path_info)
+            except Resolver404:
+                return self.pool
+            if match.view_name in READ_ROUTES:
+                return self.read_pool
+        return self.pool
+
+    def _handle(self, scope, request):
+        """
+        Helper function handling a request on a pool thread
+        """
+        signals.request_started.send(sender=self.__class__, scope=scope)
+        response = self.get_response(request)
+        # The response is rendered, and streamed content runs on a thread
+        # of its own, so release this thread's connection like the end of
+        # a request would
+        close_old_connections()
+        return response
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            raise ValueError(
+                'Django can only handle ASGI/HTTP connections, not %s.'
+                % scope['type']
+            )
+        try:
+            body_file = await self.read_body(receive)
+        except RequestAborted:
+            return
+        set_script_prefix(self.get_script_prefix(scope))
+        request, error_response = self.create_request(scope, body_file)
+        if request is None:
+            await self._send(error_response, send, self.pool)
+            return
+
+        pool = self.pool_for(request)
+        if not pool.acquire():
+            response = HttpResponse(
+                'Server busy, retry shortly', status=503,
+                content_type='text/plain'
+            )
+            response['Retry-After'] = '1'
+            await self._send(response, send, self.pool)
+            return
+        try:
+            response = await pool.run(self._handle, scope, request)
+            response._handler_class = self.__class__
+            if isinstance(response, FileResponse):
+                response.block_size = self.chunk_size
+            await self._send(response, send, pool)
+        finally:
+            pool.release()
+
+    async def _send(self, response, send, pool):
+        """
+        Helper function sending a response, streaming content and closing
+        the response on the pool
+        """
+        response_headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode('ascii')
+            if isinstance(value, str):
+                value = value.encode('latin1')
+            response_headers.append((bytes(header), bytes(value)))
+        for cookie in response.cookies.values():
+            response_headers.append((
+                b'Set-Cookie',
+                cookie.output(header='').encode('ascii').strip()
+            ))
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': response_headers,
+        })
+        if response.streaming:
+            # Iterate on one pool thread, the content may hold a cursor of
+            # that thread's database connection
+            await pool.run(
+                self._stream, response, send, asyncio.get_running_loop()
+            )
+            return
+        try:
+            for chunk, last in self.chunk_bytes(response.content):
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': not last,
+                })
+        finally:
+            await pool.run(response.close)
+
+    def _stream(self, response, send, loop):
+        """
+        Helper function sending streamed content from a pool thread
+        """
+        def send_body(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        try:
+            for part in response:
+                for chunk, _ in self.chunk_bytes(part):
+                    send_body({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+            send_body({'type': 'http.response.body'})
+        finally:
+            response.close()
+
+
+def get_pooled_asgi_application():
+    """
+    Return the pooled ASGI handler, setting Django up first like
+    django.core.asgi.get_asgi_application
+    """
+    django.setup(set_prefix=False)
+    return PooledASGIHandler()
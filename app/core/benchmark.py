@@ -0,0 +1,157 @@
+import random
+import statistics
+import time
+from collections import namedtuple
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from core.models import Tag, Ingrediant, Recipe
+from core.db.bulk import bulk_insert
+
+SeededData = namedtuple(
+    'SeededData', ('user', 'tag_ids', 'ingrediant_ids', 'recipe_ids')
+)
+
+
+def create_benchmark_user(email='benchmark@mail.com'):
+    """
+    Create the user owning the seeded benchmark data
+    """
+    return get_user_model().objects.create_user(
+        email=email, password='Bench@123', name='Benchmark User'
+    )
+
+
+def _bulk_create_ids(model, objects, user, batch_size):
+    """
+    Helper function to bulk insert user owned rows and return their ids,
+    which not every backend hands back from a bulk insert
+    """
+    bulk_insert(model, objects, batch_size)
+    return list(
+        model.objects.filter(user=user).order_by('id')
+        .values_list('id', flat=True)
+    )
+
+
+def seed_recipe_data(user, recipes=1000, tags=50, ingrediants=200,
+                     links_per_recipe=3, seed=0, batch_size=1000):
+    """
+    Seed tags, ingrediants and recipes for a user with bulk inserts, each
+    recipe linked to random tags and ingrediants. The same seed always
+    produces the same dataset
+    """
+    rng = random.Random(seed)
+    tag_ids = _bulk_create_ids(
+        Tag, [Tag(user=user, name=f'Tag {i}') for i in range(tags)],
+        user, batch_size
+    )
+    ingrediant_ids = _bulk_create_ids(
+        Ingrediant,
+        [Ingrediant(user=user, name=f'Ingrediant {i}')
+         for i in range(ingrediants)],
+        user, batch_size
+    )
+    recipe_ids = _bulk_create_ids(
+        Recipe,
+        [
+            Recipe(
+                user=user,
+                title=f'Recipe {i}',
+                time_minutes=rng.randint(5, 120),
+                price=rng.randint(100, 5000) / 100,
+            )
+            for i in range(recipes)
+        ],
+        user, batch_size
+    )
+
+    tag_links = []
+    ingrediant_links = []
+    for recipe_id in recipe_ids:
+        for tag_id in rng.sample(tag_ids, min(links_per_recipe, tags)):
+            tag_links.append(
+                Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            )
+        for ingrediant_id in rng.sample(
+                ingrediant_ids, min(links_per_recipe, ingrediants)):
+            ingrediant_links.append(Recipe.ingrediants.through(
+                recipe_id=recipe_id, ingrediant_id=ingrediant_id
+            ))
+    bulk_insert(Recipe.tags.through, tag_links, batch_size)
+    bulk_insert(Recipe.ingrediants.through, ingrediant_links, batch_size)
+
+    return SeededData(user, tag_ids, ingrediant_ids, recipe_ids)
+
+
+def seed_users(users, password, email_prefix='seed', **options):
+    """
+    Bulk insert users sharing one password hash, so hashing does not
+    dominate seeding, and seed_recipe_data() for each of them with its own
+    seed derived from options['seed']
+    """
+    encoded = make_password(password)
+    emails = [f'{email_prefix}-{i}@mail.com' for i in range(users)]
+    bulk_insert(get_user_model(), [
+        get_user_model()(email=email, password=encoded, name=f'Seed {i}')
+        for i, email in enumerate(emails)
+    ], options.get('batch_size', 1000))
+    seed = options.pop('seed', 0)
+    return [
+        seed_recipe_data(user, seed=seed + i, **options)
+        for i, user in enumerate(
+            get_user_model().objects.filter(email__in=emails).order_by('id')
+        )
+    ]
+
+
+SYLLABLES = (
+    'ba', 'ca', 'da', 'fe', 'ga', 'hi', 'jo', 'ka', 'li', 'ma', 'ne', 'no',
+    'pa', 'qui', 'ra', 'sa', 'ta', 'to', 'va', 'zu', 'mon', 'ron', 'tin',
+)
+
+
+def random_name(rng, words=2):
+    """
+    Pronounceable random name made of a few words of syllables
+    """
+    return ' '.join(
+        ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        .capitalize()
+        for _ in range(words)
+    )
+
+
+def time_call(func, repeat=5):
+    """
+    Call func repeat times and return the duration of each call in seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def percentile(values, pct):
+    """
+    Nearest rank percentile of a list of values
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(timings):
+    """
+    Summary of a list of durations in milliseconds
+    """
+    return {
+        'median_ms': statistics.median(timings) * 1000,
+        'p95_ms': percentile(timings, 95) * 1000,
+        'min_ms': min(timings) * 1000,
+    }
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core import checks
+
+LOCAL_CACHE_BACKENDS = frozenset((
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+))
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    """
+    Report the caches local to the process, whose invalidations never
+    reach the other workers, so a deploy runs either shared caches or a
+    single process silencing this check
+    """
+    return [
+        checks.Error(
+            f'The {alias!r} cache is local to the process.',
+            hint='Set REDIS_URL to share it between the processes, or run '
+                 'a single process and silence core.E001.',
+            id='core.E001',
+        )
+        for alias, config in settings.CACHES.items()
+        if config['BACKEND'] in LOCAL_CACHE_BACKENDS
+    ]
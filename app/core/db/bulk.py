@@ -0,0 +1,13 @@
+from django.db import connection
+
+
+def bulk_insert(model, objects, batch_size=1000):
+    """
+    Bulk insert rows in batches no larger than the backend accepts
+    """
+    if not objects:
+        return []
+    batch_size = min(batch_size, max(connection.ops.bulk_batch_size(
+        model._meta.concrete_fields, objects
+    ), 1))
+    return model.objects.bulk_create(objects, batch_size=batch_size)
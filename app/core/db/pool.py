@@ -0,0 +1,192 @@
+import collections
+import threading
+import time
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """
+    Raised when no connection is free before the pool's timeout
+    """
+
+
+_Entry = collections.namedtuple('_Entry', 'connection created generation')
+
+
+class ConnectionPool:
+    """
+    Thread safe pool of DB-API connections. Connections are handed out
+    most recently used first, pinged before reuse when ping is given, and
+    closed instead of reused once older than max_age or opened before the
+    last invalidate(), e.g. a failover to a new primary
+    """
+
+    def __init__(self, connect, size=10, max_age=None, timeout=30,
+                 ping=None, reset=None):
+        self.connect = connect
+        self.size = size
+        self.max_age = max_age
+        self.timeout = timeout
+        self.ping = ping
+        self.reset = reset
+        self._condition = threading.Condition()
+        self._idle = collections.deque()
+        self._in_use = {}
+        self._opened = 0
+        self._generation = 0
+        self._closed = False
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+    @property
+    def in_use(self):
+        return len(self._in_use)
+
+    def _is_stale(self, entry):
+        if entry.generation != self._generation or self._closed:
+            return True
+        return (
+            self.max_age is not None and
+            time.monotonic() - entry.created >= self.max_age
+        )
+
+    def _discard(self, entry):
+        """
+        Helper function closing a connection taken out of the pool, the
+        caller holds the condition
+        """
+        self._opened -= 1
+        self._condition.notify()
+        try:
+            entry.connection.close()
+        except Exception:
+            pass
+
+    def _checkout(self, deadline):
+        """
+        Helper function taking an idle connection, or None once the caller
+        may open a new one
+        """
+        with self._condition:
+            while True:
+                while self._idle:
+                    entry = self._idle.pop()
+                    if not self._is_stale(entry):
+                        self._in_use[id(entry.connection)] = entry
+                        return entry
+                    self._discard(entry)
+                if self._opened < self.size:
+                    self._opened += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f'No free connection in the pool of {self.size} '
+                        f'within {self.timeout}s'
+                    )
+                self._condition.wait(remaining)
+
+    def _open(self):
+        """
+        Helper function opening a connection in a slot _checkout reserved
+        """
+        try:
+            connection = self.connect()
+        except BaseException:
+            with self._condition:
+                self._opened -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            entry = _Entry(connection, time.monotonic(), self._generation)
+            self._in_use[id(connection)] = entry
+        return connection
+
+    def acquire(self):
+        """
+        Return a healthy connection, waiting up to timeout for a free one
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            entry = self._checkout(deadline)
+            if entry is None:
+                return self._open()
+            if self.ping is None:
+                return entry.connection
+            try:
+                self.ping(entry.connection)
+                return entry.connection
+            except Exception:
+                # A dead idle connection usually means the server restarted
+                # or failed over, the other idle ones are as stale
+                with self._condition:
+                    self._in_use.pop(id(entry.connection), None)
+                    self._discard(entry)
+                self.invalidate()
+
+    def release(self, connection, discard=False):
+        """
+        Return a connection to the pool, closing it when discard is set,
+        it fails to reset, or it is stale
+        """
+        if not discard and self.reset is not None:
+            try:
+                self.reset(connection)
+            except Exception:
+                discard = True
+        with self._condition:
+            entry = self._in_use.pop(id(connection), None)
+            if entry is None:
+                connection.close()
+                return
+            if discard or self._is_stale(entry):
+                self._discard(entry)
+            else:
+                self._idle.append(entry)
+                self._condition.notify()
+
+    def invalidate(self):
+        """
+        Recycle every connection opened so far, idle ones now and those in
+        use when they come back
+        """
+        with self._condition:
+            self._generation += 1
+            while self._idle:
+                self._discard(self._idle.pop())
+
+    def close(self):
+        """
+        Close the idle connections, and those in use once released
+        """
+        with self._condition:
+            self._closed = True
+        self.invalidate()
+
+
+def get_pool(key, factory):
+    """
+    Return the process wide pool stored under key, made by factory on
+    first use
+    """
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = _pools[key] = factory()
+        return pool
+
+
+def close_pools(predicate=None):
+    """
+    Close the pools whose key matches predicate, or all of them, e.g.
+    before forking workers or dropping a database
+    """
+    with _pools_lock:
+        keys = [key for key in _pools if predicate is None or predicate(key)]
+        pools = [_pools.pop(key) for key in keys]
+    for pool in pools:
+        pool.close()
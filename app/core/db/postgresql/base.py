@@ -0,0 +1,94 @@
+import psycopg2 as Database
+from django.db.backends.postgresql import base
+
+from core.db.pool import ConnectionPool, PoolTimeout, get_pool
+from core.db.postgresql.creation import DatabaseCreation
+
+
+def _reset(connection):
+    """
+    Helper function readying a connection for its next user, ending any
+    transaction a request left open
+    """
+    if connection.closed:
+        raise Database.InterfaceError('connection already closed')
+    status = connection.info.transaction_status
+    if status != Database.extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+
+
+def _ping(connection):
+    """
+    Helper function checking a connection answers, without leaving the
+    transaction the query opens when autocommit is off
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    _reset(connection)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend borrowing connections from a process wide pool,
+    configured by the POOL dict of the database settings. Closing a
+    connection, e.g. at the end of a request, returns it to the pool
+    instead of paying the TCP and auth handshake on the next request
+    """
+    creation_class = DatabaseCreation
+
+    def get_pool(self, conn_params):
+        """
+        Return the pool of connections made with conn_params, or None when
+        pooling is off
+        """
+        options = self.settings_dict.get('POOL')
+        if not options:
+            return None
+        key = (self.alias, tuple(sorted(
+            (name, str(value)) for name, value in conn_params.items()
+        )))
+        return get_pool(key, lambda: ConnectionPool(
+            lambda: Database.connect(**conn_params),
+            size=options.get('SIZE', 10),
+            max_age=options.get('MAX_AGE'),
+            timeout=options.get('TIMEOUT', 30),
+            ping=_ping if options.get('PRE_PING', True) else None,
+            reset=_reset,
+        ))
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        if self.pool is None:
+            return super().get_new_connection(conn_params)
+        try:
+            connection = self.pool.acquire()
+        except PoolTimeout as error:
+            raise Database.OperationalError(str(error)) from error
+
+        # Same as the base backend, without connecting
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        pool = getattr(self, 'pool', None)
+        if self.connection is None or pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # Closed inside atomic() the connection keeps a transaction
+            # Django still considers open, never hand that out again
+            pool.release(self.connection, discard=self.in_atomic_block)
+
+    @property
+    def _nodb_connection(self):
+        connection = super()._nodb_connection
+        # Used once for maintenance queries, e.g. creating the test
+        # database, and never closed, so keep it out of the pool
+        connection.settings_dict['POOL'] = None
+        return connection
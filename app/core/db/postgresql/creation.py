@@ -0,0 +1,12 @@
+from django.db.backends.postgresql import creation
+
+from core.db.pool import close_pools
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections to the test database would block the
+        # DROP DATABASE
+        close_pools(lambda key: ('database', test_database_name) in key[1])
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import DatabaseError, connections
+
+
+def check_database(alias='default'):
+    """
+    Run SELECT 1 on a database, returning None when it answers or the
+    error otherwise
+    """
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except DatabaseError as error:
+        # Drop the broken connection so the next check reconnects
+        if not connection.in_atomic_block:
+            connection.close()
+        return str(error) or error.__class__.__name__
+    return None
+
+
+def _check_in_thread(alias):
+    """
+    Helper function checking a database from a worker thread, closing the
+    connection Django opened for that thread
+    """
+    try:
+        return check_database(alias)
+    finally:
+        connections[alias].close()
+
+
+def check_databases(aliases):
+    """
+    Check the given databases, in parallel when there are several, and
+    return a dict of alias to error, None for those answering
+    """
+    aliases = list(aliases)
+    if len(aliases) == 1:
+        return {aliases[0]: check_database(aliases[0])}
+    with ThreadPoolExecutor(max_workers=len(aliases)) as executor:
+        return dict(zip(aliases, executor.map(_check_in_thread, aliases)))
@@ -0,0 +1,277 @@
+import io
+import json
+import platform
+import tempfile
+import time
+
+import django
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import benchmark
+from recipe.renderers import orjson
+
+PASSWORD = 'Bench@123'
+SCENARIOS = (
+    'token', 'list', 'list-cached', 'filter', 'filter-cached', 'detail',
+    'create', 'upload-image',
+)
+# Scenarios served from the recipe list cache, the others run with it off
+# so they measure the queries and serialization of every request
+CACHED_SCENARIOS = frozenset(('list-cached', 'filter-cached'))
+LATENCIES = ('p50_ms', 'p95_ms', 'p99_ms')
+
+
+class QueryCounter:
+    """
+    Database execute wrapper counting queries
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _jpeg():
+    """
+    Helper function returning a small JPEG to upload
+    """
+    content = io.BytesIO()
+    Image.new('RGB', (256, 256), (200, 120, 40)).save(content, 'JPEG')
+    return content.getvalue()
+
+
+class Command(BaseCommand):
+    """
+    Django command driving the API endpoints in-process on a seeded
+    dataset, reporting throughput, latency percentiles and queries per
+    request, and storing them as JSON to compare runs with a baseline.
+    The list and filter scenarios run with the list cache off, their
+    -cached variants repeat one url served from it. The dataset is rolled
+    back afterwards
+    """
+    help = 'Benchmark the API endpoints and compare with a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2)
+        parser.add_argument('--recipes', type=int, default=1000,
+                            help='Recipes per user')
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--ingrediants', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--requests', type=int, default=100,
+                            help='Measured requests per scenario')
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios',
+            choices=SCENARIOS, help='Scenario to run, repeatable, '
+                                    'defaults to all of them'
+        )
+        parser.add_argument('--output', help='Write the results as JSON')
+        parser.add_argument('--baseline',
+                            help='JSON results of an earlier run to compare')
+        parser.add_argument(
+            '--max-regression', type=float,
+            help='Fail when the p95 of a scenario grew by more percent '
+                 'than this over the baseline'
+        )
+
+    def _scenarios(self, data):
+        """
+        Helper function returning a request per scenario, varied by the
+        iteration number
+        """
+        recipe_ids = data.recipe_ids
+        tag_ids = data.tag_ids
+        ingrediant_ids = data.ingrediant_ids
+        email = data.user.email
+        image = _jpeg()
+        recipe_url = reverse('recipe:recipe-list')
+
+        def detail_url(i):
+            return reverse(
+                'recipe:recipe-detail', args=[recipe_ids[i % len(recipe_ids)]]
+            )
+
+        return {
+            'token': lambda client, i: client.post(
+                reverse('user:token'), {'email': email, 'password': PASSWORD}
+            ),
+            'list': lambda client, i: client.get(recipe_url),
+            'list-cached': lambda client, i: client.get(recipe_url),
+            'filter': lambda client, i: client.get(recipe_url, {
+                'tags': ','.join(
+                    str(tag_ids[(i + n) % len(tag_ids)]) for n in range(2)
+                )
+            }),
+            'filter-cached': lambda client, i: client.get(recipe_url, {
+                'tags': f'{tag_ids[0]},{tag_ids[-1]}'
+            }),
+            'detail': lambda client, i: client.get(detail_url(i)),
+            'create': lambda client, i: client.post(recipe_url, {
+                'title': f'Benchmark {i}', 'time_minutes': 10,
+                'price': '5.00', 'tags': tag_ids[:2],
+                'ingrediants': ingrediant_ids[:3],
+            }, format='json'),
+            'upload-image': lambda client, i: client.post(
+                reverse(
+                    'recipe:recipe-upload-image',
+                    args=[recipe_ids[i % len(recipe_ids)]]
+                ),
+                {'image': SimpleUploadedFile(
+                    'benchmark.jpg', image, content_type='image/jpeg'
+                )},
+                format='multipart'
+            ),
+        }
+
+    def _run(self, client, request, options):
+        """
+        Helper function running one scenario and summarizing it
+        """
+        for i in range(options['warmup']):
+            request(client, i)
+        timings = []
+        errors = 0
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            for i in range(options['requests']):
+                request_start = time.perf_counter()
+                response = request(client, options['warmup'] + i)
+                timings.append(time.perf_counter() - request_start)
+                if response.status_code >= 400:
+                    errors += 1
+        elapsed = time.perf_counter() - start
+        return {
+            'requests': len(timings),
+            'errors': errors,
+            'rps': len(timings) / elapsed,
+            'p50_ms': benchmark.percentile(timings, 50) * 1000,
+            'p95_ms': benchmark.percentile(timings, 95) * 1000,
+            'p99_ms': benchmark.percentile(timings, 99) * 1000,
+            'queries': counter.count / len(timings),
+        }
+
+    def _compare(self, results, meta, path, max_regression):
+        """
+        Helper function printing the change of every scenario against a
+        baseline and returning the scenarios regressing beyond the limit
+        """
+        try:
+            with open(path) as baseline_file:
+                baseline = json.load(baseline_file)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Cannot read the baseline {path}: {error}')
+        if baseline.get('meta', {}).get('scale') != meta['scale']:
+            self.stdout.write(self.style.WARNING(
+                'The baseline was seeded at another scale'
+            ))
+        if baseline.get('meta', {}).get('encoder') != meta['encoder']:
+            self.stdout.write(self.style.WARNING(
+                'The baseline was rendered with another JSON encoder'
+            ))
+
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get('results', {}).get(name)
+            if before is None:
+                continue
+            changes = {
+                key: (result[key] - before[key]) / max(before[key], 1e-9)
+                * 100
+                for key in LATENCIES + ('rps',)
+            }
+            self.stdout.write(
+                f'{name:<13} ' + ' '.join(
+                    f'{key}={change:+.1f}%' for key, change in changes.items()
+                ) + f' queries={result["queries"] - before["queries"]:+.1f}'
+            )
+            if max_regression is not None and (
+                    changes['p95_ms'] > max_regression):
+                regressions.append(name)
+        return regressions
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['recipes'] < 1:
+            raise CommandError('Run at least one request on one recipe')
+        scenarios = options['scenarios'] or list(SCENARIOS)
+        scale = {
+            key: options[key]
+            for key in ('users', 'recipes', 'tags', 'ingrediants', 'seed')
+        }
+        results = {}
+        encoder = 'json' if orjson is None else 'orjson'
+        self.stdout.write(f'encoder={encoder}')
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                MEDIA_ROOT=media_root), transaction.atomic():
+            seeded = benchmark.seed_users(
+                options['users'], PASSWORD, email_prefix='api-benchmark',
+                recipes=options['recipes'], tags=options['tags'],
+                ingrediants=options['ingrediants'], seed=options['seed'],
+            )
+            data = seeded[0]
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=(
+                f'Token {Token.objects.create(user=data.user).key}'
+            ))
+            requests = self._scenarios(data)
+
+            self.stdout.write(
+                f'{"scenario":<13} {"req/s":>8} {"p50":>9} {"p95":>9} '
+                f'{"p99":>9} {"queries":>7} {"errors":>6}'
+            )
+            for name in scenarios:
+                cache_timeout = (
+                    settings.RECIPE_CACHE_TIMEOUT
+                    if name in CACHED_SCENARIOS else 0
+                )
+                with override_settings(RECIPE_CACHE_TIMEOUT=cache_timeout):
+                    result = results[name] = self._run(
+                        client, requests[name], options
+                    )
+                self.stdout.write(
+                    f'{name:<13} {result["rps"]:>8.1f} '
+                    f'{result["p50_ms"]:>7.1f}ms {result["p95_ms"]:>7.1f}ms '
+                    f'{result["p99_ms"]:>7.1f}ms {result["queries"]:>7.1f} '
+                    f'{result["errors"]:>6}'
+                )
+
+            transaction.set_rollback(True)
+
+        meta = {
+            'created': timezone.now().isoformat(),
+            'scale': scale,
+            'requests': options['requests'],
+            'database': connection.vendor,
+            'encoder': encoder,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+        }
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({'meta': meta, 'results': results}, output,
+                          indent=2, sort_keys=True)
+        if options['baseline']:
+            regressions = self._compare(
+                results, meta, options['baseline'], options['max_regression']
+            )
+            if regressions:
+                raise CommandError(
+                    f'p95 regressed by more than {options["max_regression"]}%'
+                    f': {", ".join(regressions)}'
+                )
@@ -0,0 +1,80 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core import benchmark
+from core.models import Ingrediant
+from core.db.bulk import bulk_insert
+from recipe.search import autocomplete_names
+
+
+class Command(BaseCommand):
+    """
+    Django command measuring tag/ingrediant autocomplete latency over a
+    large seeded table
+    """
+    help = 'Benchmark autocomplete over seeded ingrediant names'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _typed_texts(self, rng, names, count):
+        """
+        Helper function picking prefixes and misspellings of seeded names
+        """
+        texts = []
+        for name in rng.sample(names, min(count, len(names))):
+            word = name.split()[0].lower()
+            if rng.random() < 0.5:
+                texts.append(('prefix', word[:rng.randint(2, len(word))]))
+            else:
+                position = rng.randrange(len(word))
+                texts.append(
+                    ('misspelled', word[:position] + word[position + 1:])
+                )
+        return texts
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            user = benchmark.create_benchmark_user()
+            names = [
+                benchmark.random_name(rng) for _ in range(options['rows'])
+            ]
+            bulk_insert(
+                Ingrediant,
+                [Ingrediant(user=user, name=name) for name in names]
+            )
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE core_ingrediant')
+
+            user_ingrediants = Ingrediant.objects.filter(user=user)
+            timings = {'prefix': [], 'misspelled': []}
+            for kind, text in self._typed_texts(
+                    rng, names, options['queries']):
+                timings[kind].extend(benchmark.time_call(
+                    lambda: list(autocomplete_names(
+                        user_ingrediants, text, options['limit']
+                    )),
+                    repeat=1
+                ))
+
+            self.stdout.write(
+                f'{options["rows"]} ingrediants on {connection.vendor}'
+            )
+            for kind, values in timings.items():
+                if not values:
+                    continue
+                stats = benchmark.summarize(values)
+                self.stdout.write(
+                    f'{kind:<11} queries={len(values):<5} '
+                    f'median={stats["median_ms"]:.2f}ms '
+                    f'p95={stats["p95_ms"]:.2f}ms'
+                )
+
+            transaction.set_rollback(True)
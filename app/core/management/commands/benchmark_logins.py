@@ -0,0 +1,104 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core import benchmark
+from user.backends import HashingPoolBusy
+
+PASSWORD = 'Bench@123'
+
+
+class Command(BaseCommand):
+    """
+    Django command measuring login throughput through the configured
+    authentication backends and password hasher
+    """
+    help = 'Benchmark logins per second with concurrent clients'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--logins', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=8)
+
+    def _create_users(self, count):
+        """
+        Helper function creating the users logging in, sharing one hash
+        so seeding does not dominate the run
+        """
+        encoded = make_password(PASSWORD)
+        users = get_user_model().objects.bulk_create([
+            get_user_model()(
+                email=f'login-benchmark-{i}@mail.com', password=encoded
+            )
+            for i in range(count)
+        ])
+        return [user.email for user in users]
+
+    def _login(self, emails, logins, offset, in_thread=True):
+        """
+        Helper function logging in one client repeatedly
+        """
+        results = {'timings': [], 'busy': 0, 'failed': 0}
+        try:
+            for i in range(logins):
+                email = emails[(offset + i) % len(emails)]
+                start = time.perf_counter()
+                try:
+                    user = authenticate(username=email, password=PASSWORD)
+                except HashingPoolBusy:
+                    results['busy'] += 1
+                    continue
+                results['timings'].append(time.perf_counter() - start)
+                if user is None:
+                    results['failed'] += 1
+        finally:
+            if in_thread:
+                connection.close()
+        return results
+
+    def handle(self, *args, **options):
+        concurrency = max(options['concurrency'], 1)
+        emails = self._create_users(options['users'])
+        per_client = [
+            options['logins'] // concurrency
+            + (1 if i < options['logins'] % concurrency else 0)
+            for i in range(concurrency)
+        ]
+        try:
+            start = time.perf_counter()
+            if concurrency == 1:
+                clients = [self._login(emails, per_client[0], 0, False)]
+            else:
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    clients = list(pool.map(
+                        self._login, [emails] * concurrency, per_client,
+                        range(concurrency)
+                    ))
+            elapsed = time.perf_counter() - start
+        finally:
+            get_user_model().objects.filter(email__in=emails).delete()
+
+        timings = [t for client in clients for t in client['timings']]
+        busy = sum(client['busy'] for client in clients)
+        failed = sum(client['failed'] for client in clients)
+        self.stdout.write(
+            f'{settings.PASSWORD_HASHERS[0].rsplit(".", 1)[-1]} '
+            f'iterations={settings.PASSWORD_HASH_ITERATIONS} '
+            f'workers={settings.LOGIN_HASH_WORKERS} '
+            f'concurrency={concurrency}'
+        )
+        if not timings:
+            self.stdout.write(self.style.WARNING('No login completed'))
+            return
+        stats = benchmark.summarize(timings)
+        self.stdout.write(
+            f'logins={len(timings)} busy={busy} failed={failed} '
+            f'rate={len(timings) / elapsed:.1f}/s '
+            f'median={stats["median_ms"]:.2f}ms '
+            f'p95={stats["p95_ms"]:.2f}ms'
+        )
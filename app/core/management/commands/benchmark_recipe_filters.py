@@ -0,0 +1,79 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import benchmark
+from core.models import Recipe
+from recipe.filters import filter_recipes, MATCH_ANY, MATCH_ALL
+
+
+class Command(BaseCommand):
+    """
+    Django command comparing the recipe tag/ingrediant filters written as
+    chained M2M joins against the EXISTS semi-joins used by the API
+    """
+    help = 'Benchmark recipe filtering on a seeded dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--ingrediants', type=int, default=200)
+        parser.add_argument('--links-per-recipe', type=int, default=5)
+        parser.add_argument('--filter-size', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _report(self, label, rows, timings):
+        stats = benchmark.summarize(timings)
+        self.stdout.write(
+            f'{label:<22} rows={rows:<8} '
+            f'median={stats["median_ms"]:.2f}ms p95={stats["p95_ms"]:.2f}ms'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            data = benchmark.seed_recipe_data(
+                benchmark.create_benchmark_user(),
+                recipes=options['recipes'],
+                tags=options['tags'],
+                ingrediants=options['ingrediants'],
+                links_per_recipe=options['links_per_recipe'],
+                seed=options['seed'],
+            )
+            rng = random.Random(options['seed'])
+            tag_ids = rng.sample(
+                data.tag_ids, min(options['filter_size'], len(data.tag_ids))
+            )
+            ingrediant_ids = rng.sample(
+                data.ingrediant_ids,
+                min(options['filter_size'], len(data.ingrediant_ids))
+            )
+            user_recipes = Recipe.objects.filter(user=data.user)
+
+            queries = {
+                'chained joins': user_recipes
+                .filter(tags__id__in=tag_ids)
+                .filter(ingrediants__id__in=ingrediant_ids),
+                'semi-join any': filter_recipes(
+                    user_recipes, tag_ids, ingrediant_ids, MATCH_ANY
+                ),
+                'semi-join all': filter_recipes(
+                    user_recipes, tag_ids, ingrediant_ids, MATCH_ALL
+                ),
+            }
+            self.stdout.write(
+                f'{len(data.recipe_ids)} recipes, filtering on '
+                f'{len(tag_ids)} tags and {len(ingrediant_ids)} ingrediants'
+            )
+            for label, query_set in queries.items():
+                query_set = query_set.order_by('-id').values_list(
+                    'id', flat=True
+                )
+                rows = len(list(query_set))
+                timings = benchmark.time_call(
+                    lambda qs=query_set: list(qs.all()), options['repeat']
+                )
+                self._report(label, rows, timings)
+
+            transaction.set_rollback(True)
@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rest_framework.renderers import JSONRenderer
+
+from core import benchmark
+from core.models import Recipe
+from recipe.fieldsets import recipe_columns, recipe_prefetches
+from recipe.listing import recipe_rows, serialize_recipe_rows
+from recipe.renderers import FastJSONRenderer, orjson
+from recipe.serializers import RecipeSerializer
+
+
+class Command(BaseCommand):
+    """
+    Django command comparing the serializer path of the recipe list with
+    the values() fast path, from query to rendered JSON
+    """
+    help = 'Benchmark rendering recipe lists with and without the fast path'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1000, 10000, 100000]
+        )
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _serializer_json(self, user):
+        """
+        Helper function rendering a user's recipes like the list view
+        without the fast path
+        """
+        recipes = Recipe.objects.filter(user=user).only(
+            *recipe_columns()
+        ).prefetch_related(*recipe_prefetches()).order_by('-id')
+        return JSONRenderer().render(
+            RecipeSerializer(recipes, many=True).data
+        )
+
+    def _fast_json(self, user):
+        """
+        Helper function rendering a user's recipes through the fast path
+        """
+        rows = recipe_rows(Recipe.objects.filter(user=user)).order_by('-id')
+        return FastJSONRenderer().render(serialize_recipe_rows(rows))
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'encoder={"orjson" if orjson is not None else "json"}'
+        )
+        for size in options['sizes']:
+            with transaction.atomic():
+                user = benchmark.create_benchmark_user()
+                benchmark.seed_recipe_data(
+                    user, recipes=size, seed=options['seed']
+                )
+                serializer_json = self._serializer_json(user)
+                fast_json = self._fast_json(user)
+
+                slow = benchmark.summarize(benchmark.time_call(
+                    lambda: self._serializer_json(user), options['repeat']
+                ))
+                fast = benchmark.summarize(benchmark.time_call(
+                    lambda: self._fast_json(user), options['repeat']
+                ))
+                speedup = slow['median_ms'] / max(fast['median_ms'], 1e-6)
+                self.stdout.write(
+                    f'rows={size:<7} '
+                    f'serializer={slow["median_ms"]:.1f}ms '
+                    f'fast={fast["median_ms"]:.1f}ms '
+                    f'speedup={speedup:.1f}x '
+                    f'identical={serializer_json == fast_json}'
+                )
+
+                transaction.set_rollback(True)
@@ -0,0 +1,48 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.models import RecipeImageUpload
+from recipe.uploads import discard_upload, expired_uploads
+
+
+class Command(BaseCommand):
+    """
+    Django command to discard resumable image uploads that expired, along
+    with chunk files no upload refers to any more
+    """
+    help = 'Delete expired recipe image uploads and their chunks'
+
+    def _remove_orphans(self):
+        """
+        Helper function removing stale chunk files without an upload
+        """
+        temp_dir = settings.RECIPE_UPLOAD_TEMP_DIR
+        if not os.path.isdir(temp_dir):
+            return 0
+        cutoff = time.time() - settings.RECIPE_UPLOAD_EXPIRY
+        known = {
+            f'{pk}.part'
+            for pk in RecipeImageUpload.objects.values_list('pk', flat=True)
+        }
+        removed = 0
+        for entry in os.scandir(temp_dir):
+            if (entry.name.endswith('.part') and entry.name not in known
+                    and entry.stat().st_mtime < cutoff):
+                os.remove(entry.path)
+                removed += 1
+        return removed
+
+    def handle(self, *args, **options):
+        discarded = 0
+        for upload in expired_uploads().iterator():
+            discard_upload(upload)
+            discarded += 1
+        removed = self._remove_orphans()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Discarded {discarded} expired uploads and {removed} orphaned '
+            f'chunk files'
+        ))
@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.models import Tag, Ingrediant, Recipe
+from recipe.search import autocomplete_names, is_full_text_supported
+
+
+class Command(BaseCommand):
+    """
+    Django command to show the query plans of the list endpoints and
+    whether the planner picks the indexes added for them
+    """
+    help = 'EXPLAIN the recipe list queries and report index usage'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            help='Explain the queries as this user, defaults to the first'
+        )
+        parser.add_argument(
+            '--force-index', action='store_true',
+            help='Disable sequential scans (Postgres) so that small tables '
+                 'still show which indexes are usable'
+        )
+
+    def _get_user(self, email):
+        """
+        Helper function to pick the user the queries are built for
+        """
+        users = get_user_model().objects.order_by('id')
+        if email:
+            users = users.filter(email=email)
+        user = users.first()
+        if user is None:
+            raise CommandError('No user available to explain queries for')
+        return user
+
+    def _query_plans(self, user):
+        """
+        Helper function returning the list query shapes with the index
+        each one is expected to use
+        """
+        plans = [
+            (
+                'tag list',
+                Tag.objects.filter(user=user).order_by('-name', '-id')[:100],
+                'core_tag_user_name_idx',
+            ),
+            (
+                'ingrediant list',
+                Ingrediant.objects.filter(user=user)
+                .order_by('-name', '-id')[:100],
+                'core_ingrediant_user_name_idx',
+            ),
+            (
+                'recipe list',
+                Recipe.objects.filter(user=user).order_by('-id')[:100],
+                'core_recipe_user_id_idx',
+            ),
+            (
+                'recipe tag filter',
+                Recipe.tags.through.objects.filter(
+                    tag_id__in=[0]
+                ).values('recipe_id'),
+                'core_recipe_tags_tag_recipe_idx',
+            ),
+            (
+                'recipe ingrediant filter',
+                Recipe.ingrediants.through.objects.filter(
+                    ingrediant_id__in=[0]
+                ).values('recipe_id'),
+                'core_recipe_ingrediants_ing_recipe_idx',
+            ),
+        ]
+        if is_full_text_supported():
+            # The trigram indexes only exist on Postgres
+            plans.extend((
+                (
+                    'tag autocomplete',
+                    autocomplete_names(
+                        Tag.objects.filter(user=user), 'tomato', 10
+                    ),
+                    'core_tag_name_trgm_idx',
+                ),
+                (
+                    'ingrediant autocomplete',
+                    autocomplete_names(
+                        Ingrediant.objects.filter(user=user), 'tomato', 10
+                    ),
+                    'core_ingrediant_name_trgm_idx',
+                ),
+            ))
+        return plans
+
+    def handle(self, *args, **options):
+        user = self._get_user(options['email'])
+        force_index = (
+            options['force_index'] and connection.vendor == 'postgresql'
+        )
+        if force_index:
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+        missing = 0
+        try:
+            for label, query_set, index_name in self._query_plans(user):
+                plan = query_set.explain()
+                self.stdout.write(f'== {label}')
+                self.stdout.write(plan)
+                if index_name in plan:
+                    self.stdout.write(
+                        self.style.SUCCESS(f'uses {index_name}')
+                    )
+                else:
+                    missing += 1
+                    self.stdout.write(
+                        self.style.WARNING(f'does not use {index_name}')
+                    )
+        finally:
+            if force_index:
+                with connection.cursor() as cursor:
+                    cursor.execute('RESET enable_seqscan')
+
+        if missing:
+            self.stdout.write(self.style.WARNING(
+                f'{missing} queries did not use their index, small tables '
+                f'may be scanned sequentially (try --force-index)'
+            ))
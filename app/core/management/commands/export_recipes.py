@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.export import iter_recipe_lines
+
+
+class Command(BaseCommand):
+    """
+    Django command to export a user's recipes as JSON Lines
+    """
+    help = 'Export all recipes of a user as JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True)
+        parser.add_argument(
+            '--output', default='-', help='Output file, - for stdout'
+        )
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}')
+
+        if options['output'] == '-':
+            self._export(
+                user, options['chunk_size'],
+                lambda chunk: self.stdout.write(chunk, ending='')
+            )
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                self._export(user, options['chunk_size'], output.write)
+
+    def _export(self, user, chunk_size, write):
+        """
+        Helper function writing the recipe chunks as they are rendered
+        """
+        for chunk in iter_recipe_lines(user, chunk_size):
+            write(chunk)
@@ -0,0 +1,86 @@
+import json
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipe.cache import bump_user_version
+from recipe.importer import validate_rows, import_recipes
+
+
+class Command(BaseCommand):
+    """
+    Django command to import recipes for a user from a JSON Lines file
+    """
+    help = 'Import recipes from JSON Lines, one recipe object per line'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSON Lines file, - for stdin')
+        parser.add_argument('--email', required=True)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def _batches(self, lines, batch_size):
+        """
+        Helper function to parse lines into batches of (line number, row)
+        """
+        batch = []
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                batch.append((number, json.loads(line)))
+            except ValueError as exc:
+                raise CommandError(f'Line {number}: invalid JSON - {exc}')
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _import(self, user, lines, batch_size):
+        """
+        Helper function to import every batch, failing on the first
+        invalid one
+        """
+        start = time.perf_counter()
+        created = 0
+        for batch in self._batches(lines, batch_size):
+            rows, errors = validate_rows([row for _, row in batch])
+            if errors:
+                line = batch[(errors[0]['row'] or 1) - 1][0]
+                raise CommandError(f'Line {line}: {errors[0]["errors"]}')
+            result = import_recipes(user, rows, batch_size)
+            created += result['created']
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{created} recipes imported, '
+                f'{created / elapsed:.1f} recipes/s'
+            )
+        return created, time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}')
+
+        if options['path'] == '-':
+            lines = sys.stdin
+        else:
+            lines = open(options['path'], encoding='utf-8')
+        try:
+            with transaction.atomic():
+                created, seconds = self._import(
+                    user, lines, options['batch_size']
+                )
+        finally:
+            if lines is not sys.stdin:
+                lines.close()
+        bump_user_version(user.pk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {created} recipes in {seconds:.2f}s'
+        ))
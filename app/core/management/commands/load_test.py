@@ -0,0 +1,154 @@
+import http.client
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.authtoken.models import Token
+
+from core import benchmark
+
+DEFAULT_PATHS = (
+    '/api/recipe/recipe/',
+    '/api/recipe/tag/',
+    '/api/recipe/ingrediant/',
+)
+
+
+class Command(BaseCommand):
+    """
+    Django command load testing running servers, e.g. the WSGI server and
+    uvicorn serving app.asgi, to compare their throughput and p99 latency
+    at rising concurrency
+    """
+    help = 'Load test the read endpoints of one or more running servers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', action='append', required=True,
+            metavar='NAME=URL',
+            help='Server to test, e.g. wsgi=http://localhost:8000, '
+                 'repeat to compare servers'
+        )
+        parser.add_argument(
+            '--email', required=True,
+            help='User whose token authenticates the requests'
+        )
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Path to request, repeatable, defaults to the recipe, tag '
+                 'and ingrediant lists'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=[1, 10, 50]
+        )
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--timeout', type=float, default=30)
+
+    def _parse_targets(self, targets):
+        """
+        Helper function splitting NAME=URL targets
+        """
+        parsed = []
+        for target in targets:
+            name, sep, url = target.partition('=')
+            parts = urlsplit(url)
+            if not sep or parts.scheme != 'http' or not parts.hostname:
+                raise CommandError(
+                    f'Expected NAME=http://host:port, got {target}'
+                )
+            parsed.append((name, parts.hostname, parts.port or 80))
+        return parsed
+
+    def _get_token(self, email):
+        """
+        Helper function returning the token of the load test user
+        """
+        try:
+            user = get_user_model().objects.get(email=email)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {email}')
+        return Token.objects.get_or_create(user=user)[0].key
+
+    def _client(self, host, port, paths, headers, requests, counter, timeout):
+        """
+        Helper function sending requests over one keep-alive connection
+        until the shared counter runs out
+        """
+        timings = []
+        errors = 0
+        connection = http.client.HTTPConnection(host, port, timeout=timeout)
+        try:
+            while True:
+                with counter['lock']:
+                    if counter['sent'] >= requests:
+                        break
+                    path = paths[counter['sent'] % len(paths)]
+                    counter['sent'] += 1
+                start = time.perf_counter()
+                try:
+                    connection.request('GET', path, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                except (OSError, http.client.HTTPException):
+                    errors += 1
+                    connection.close()
+                    continue
+                timings.append(time.perf_counter() - start)
+                if response.status >= 400:
+                    errors += 1
+        finally:
+            connection.close()
+        return timings, errors
+
+    def _run_level(self, host, port, paths, headers, options, concurrency):
+        """
+        Helper function running one concurrency level against a server
+        """
+        counter = {'lock': threading.Lock(), 'sent': 0}
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(
+                lambda _: self._client(
+                    host, port, paths, headers, options['requests'],
+                    counter, options['timeout']
+                ),
+                range(concurrency)
+            ))
+        elapsed = time.perf_counter() - start
+        timings = [t for client, _ in results for t in client]
+        errors = sum(client_errors for _, client_errors in results)
+        return timings, errors, elapsed
+
+    def handle(self, *args, **options):
+        targets = self._parse_targets(options['target'])
+        headers = {
+            'Authorization': f'Token {self._get_token(options["email"])}',
+            'Accept': 'application/json',
+        }
+        paths = options['paths'] or list(DEFAULT_PATHS)
+
+        self.stdout.write(
+            f'{"target":<10} {"clients":>7} {"req/s":>9} {"p50":>9} '
+            f'{"p99":>9} {"errors":>6}'
+        )
+        for name, host, port in targets:
+            for concurrency in options['concurrency']:
+                timings, errors, elapsed = self._run_level(
+                    host, port, paths, headers, options, concurrency
+                )
+                if not timings:
+                    self.stdout.write(self.style.ERROR(
+                        f'{name:<10} {concurrency:>7} no successful requests'
+                    ))
+                    continue
+                self.stdout.write(
+                    f'{name:<10} {concurrency:>7} '
+                    f'{len(timings) / elapsed:>9.1f} '
+                    f'{benchmark.percentile(timings, 50) * 1000:>7.1f}ms '
+                    f'{benchmark.percentile(timings, 99) * 1000:>7.1f}ms '
+                    f'{errors:>6}'
+                )
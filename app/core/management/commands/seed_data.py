@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import benchmark
+from recipe.search import update_search_vectors
+
+
+class Command(BaseCommand):
+    """
+    Django command seeding users with tags, ingrediants and recipes at a
+    configurable scale with bulk inserts, e.g. for benchmarks and load
+    tests. The same options and seed always produce the same dataset
+    """
+    help = 'Seed users, tags, ingrediants and recipes with bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--recipes', type=int, default=1000,
+                            help='Recipes per user')
+        parser.add_argument('--tags', type=int, default=50,
+                            help='Tags per user')
+        parser.add_argument('--ingrediants', type=int, default=200,
+                            help='Ingrediants per user')
+        parser.add_argument('--links', type=int, default=3,
+                            help='Tags and ingrediants per recipe')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--email-prefix', default='seed')
+        parser.add_argument('--password', default='Bench@123')
+
+    def handle(self, *args, **options):
+        if min(options['users'], options['tags'],
+               options['ingrediants']) < 1:
+            raise CommandError(
+                'Seed at least one user, tag and ingrediant'
+            )
+        with transaction.atomic():
+            seeded = benchmark.seed_users(
+                options['users'], options['password'],
+                email_prefix=options['email_prefix'],
+                recipes=options['recipes'], tags=options['tags'],
+                ingrediants=options['ingrediants'],
+                links_per_recipe=options['links'], seed=options['seed'],
+                batch_size=options['batch_size'],
+            )
+            for data in seeded:
+                for start in range(
+                        0, len(data.recipe_ids), options['batch_size']):
+                    update_search_vectors(
+                        data.recipe_ids[start:start + options['batch_size']]
+                    )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(seeded)} users with '
+            f'{sum(len(data.recipe_ids) for data in seeded)} recipes, '
+            f'emails {options["email_prefix"]}-N@mail.com'
+        ))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+from recipe.search import update_search_vectors
+
+
+class Command(BaseCommand):
+    """
+    Django command to rebuild the stored recipe search vectors, e.g. to
+    backfill them after the search migration
+    """
+    help = 'Recompute the full-text search vectors of all recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        recipe_ids = Recipe.objects.order_by('id').values_list(
+            'id', flat=True
+        )
+        batch = []
+        updated = 0
+        for recipe_id in recipe_ids.iterator(chunk_size=batch_size):
+            batch.append(recipe_id)
+            if len(batch) >= batch_size:
+                update_search_vectors(batch)
+                updated += len(batch)
+                batch = []
+        update_search_vectors(batch)
+        updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated the search vectors of {updated} recipes'
+        ))
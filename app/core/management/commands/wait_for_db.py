@@ -1,23 +1,65 @@
+import random
 import time
 
-from django.db import connections
-from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.health import check_databases
 
 
 class Command(BaseCommand):
-    """ Django command to pause execution untill database is available"""
+    """
+    Django command to pause execution until the databases answer a
+    SELECT 1, retrying with jittered exponential backoff up to a deadline
+    """
+    help = 'Wait until the databases accept queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', action='append', dest='databases',
+            help='Alias to wait for, repeatable, defaults to every database'
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=60,
+            help='Seconds to wait in total before giving up'
+        )
+        parser.add_argument(
+            '--initial-delay', type=float, default=0.1,
+            help='Upper bound of the first retry delay in seconds'
+        )
+        parser.add_argument(
+            '--max-delay', type=float, default=5,
+            help='Upper bound of any retry delay in seconds'
+        )
 
     def handle(self, *args, **options):
-        self.stdout.write('waiting for db')
-        db_conn = None
-        while not db_conn:
-            try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write(
-                    'Database not available.'
-                    'waiting for a second..')
-                time.sleep(1)
-
-        self.stdout.write(self.style.SUCCESS('Databse available !!'))
+        pending = options['databases'] or list(settings.DATABASES)
+        deadline = time.monotonic() + options['timeout']
+        attempt = 0
+        self.stdout.write(f'Waiting for {", ".join(pending)}')
+
+        while True:
+            errors = check_databases(pending)
+            pending = [alias for alias, error in errors.items() if error]
+            if not pending:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise CommandError(
+                    f'Gave up after {options["timeout"]}s, unavailable: '
+                    + ', '.join(f'{alias} ({errors[alias]})'
+                                for alias in pending)
+                )
+            # Full jitter keeps containers starting together from
+            # retrying in lockstep
+            delay = random.uniform(0, min(
+                options['max_delay'], options['initial_delay'] * 2 ** attempt
+            ))
+            attempt += 1
+            self.stdout.write(
+                f'Unavailable: {", ".join(pending)}, '
+                f'retrying in {delay:.2f}s'
+            )
+            time.sleep(min(delay, remaining))
+
+        self.stdout.write(self.style.SUCCESS('Databases available'))
@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (
+    256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304,
+)
+
+# With PROMETHEUS_MULTIPROC_DIR set before the first import every process
+# writes its samples to files in that dir, which render_metrics() sums up,
+# so any worker answers for all of them. Without it the samples are those
+# of this process only
+REGISTRY = CollectorRegistry()
+
+_local = threading.local()
+
+request_duration = Histogram(
+    'http_request_duration_seconds', 'Wall time of requests per view',
+    ('view', 'method', 'status'), buckets=DURATION_BUCKETS,
+    registry=REGISTRY,
+)
+db_queries = Histogram(
+    'http_request_db_queries', 'Database queries per request',
+    ('view',), buckets=QUERY_BUCKETS, registry=REGISTRY,
+)
+db_duration = Histogram(
+    'http_request_db_duration_seconds', 'Database time per request',
+    ('view',), buckets=DURATION_BUCKETS, registry=REGISTRY,
+)
+serializer_duration = Histogram(
+    'http_request_serializer_duration_seconds',
+    'Serializer time per request', ('view',), buckets=DURATION_BUCKETS,
+    registry=REGISTRY,
+)
+response_size = Histogram(
+    'http_response_size_bytes', 'Response body size per view',
+    ('view',), buckets=SIZE_BUCKETS, registry=REGISTRY,
+)
+token_cache_hits = Counter(
+    'auth_token_cache_hits', 'Token cache hits', registry=REGISTRY,
+)
+token_cache_misses = Counter(
+    'auth_token_cache_misses', 'Token cache misses', registry=REGISTRY,
+)
+
+
+class RequestMetrics:
+    """
+    Timings and counters of the request handled by the current thread
+    """
+    __slots__ = ('view', 'queries', 'db_time', 'stages', 'active')
+
+    def __init__(self):
+        self.view = 'unmatched'
+        self.queries = 0
+        self.db_time = 0.0
+        self.stages = {}
+        self.active = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        """
+        Database execute wrapper counting and timing the queries
+        """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+def start_request():
+    """
+    Start recording metrics for the current thread's request
+    """
+    _local.record = RequestMetrics()
+    return _local.record
+
+
+def end_request():
+    _local.record = None
+
+
+def current_request():
+    """
+    Return the metrics of the current thread's request, or None
+    """
+    return getattr(_local, 'record', None)
+
+
+@contextmanager
+def stage(name):
+    """
+    Add the time spent in the block to a stage of the current request,
+    nested blocks of the same stage are only counted once
+    """
+    record = current_request()
+    if record is None or name in record.active:
+        yield
+        return
+    record.active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record.active.discard(name)
+        record.stages[name] = (
+            record.stages.get(name, 0.0) + time.perf_counter() - start
+        )
+
+
+class TimedSerializerMixin:
+    """
+    Serializer mixin adding the time spent validating and representing
+    data to the serializer stage of the request metrics
+    """
+
+    def is_valid(self, *args, **kwargs):
+        with stage('serializer'):
+            return super().is_valid(*args, **kwargs)
+
+    def to_representation(self, instance):
+        with stage('serializer'):
+            return super().to_representation(instance)
+
+
+def is_multiprocess():
+    """
+    Whether the samples are shared between processes through files
+    """
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def render_metrics():
+    """
+    Return the metrics in the Prometheus text format, summed over every
+    process in multiprocess mode
+    """
+    registry = REGISTRY
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
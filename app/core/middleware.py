@@ -0,0 +1,133 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import FileResponse
+
+from core import metrics, querycheck
+
+METHODS = frozenset((
+    'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS',
+))
+
+
+def view_label(view_func, method):
+    """
+    Return the metrics label of a view, e.g. RecipeViewSet.list for a
+    viewset action or CreateTokenView.post for an APIView
+    """
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__name__', 'unknown')
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f'{cls.__name__}.{action}'
+
+
+class RequestMetricsMiddleware:
+    """
+    Record the wall time, database queries and time, serializer time and
+    response size of every request per view, as histograms for the
+    metrics endpoint. The timings go out in a Server-Timing header too
+    when METRICS_SERVER_TIMING or DEBUG is on, they would tell clients
+    how the server spends its time otherwise
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        record = metrics.start_request()
+        # Same as connection.execute_wrapper(), without a context manager
+        # per database on every request
+        wrapped = connections.all()
+        for connection in wrapped:
+            connection.execute_wrappers.append(record)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            duration = time.perf_counter() - start
+            for connection in wrapped:
+                connection.execute_wrappers.remove(record)
+            metrics.end_request()
+
+        view = record.view
+        serializer = record.stages.get('serializer', 0.0)
+        method = request.method if request.method in METHODS else 'other'
+        metrics.request_duration.labels(
+            view, method, str(response.status_code)
+        ).observe(duration)
+        metrics.db_queries.labels(view).observe(record.queries)
+        metrics.db_duration.labels(view).observe(record.db_time)
+        metrics.serializer_duration.labels(view).observe(serializer)
+        if isinstance(response, FileResponse):
+            # Keep the file for wsgi.file_wrapper, wrapping it would turn
+            # sendfile off
+            size = response.get('Content-Length')
+            if size is not None:
+                metrics.response_size.labels(view).observe(int(size))
+        elif response.streaming:
+            response.streaming_content = self._count_bytes(
+                response.streaming_content, view
+            )
+        else:
+            metrics.response_size.labels(view).observe(
+                len(response.content)
+            )
+
+        if settings.METRICS_SERVER_TIMING or settings.DEBUG:
+            response['Server-Timing'] = (
+                f'total;dur={duration * 1000:.1f}, '
+                f'db;dur={record.db_time * 1000:.1f};'
+                f'desc="{record.queries} queries", '
+                f'serializer;dur={serializer * 1000:.1f}'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        record = metrics.current_request()
+        if record is not None:
+            record.view = view_label(view_func, request.method)
+
+    def _count_bytes(self, content, view):
+        """
+        Helper function observing the size of streamed content once it
+        has been sent
+        """
+        size = 0
+        for chunk in content:
+            size += len(chunk)
+            yield chunk
+        metrics.response_size.labels(view).observe(size)
+
+
+class QueryDetectorMiddleware:
+    """
+    Group the queries of every request by shape and hand N+1 patterns and
+    slow queries to the QUERY_DETECTOR_HANDLERS, for staging and the
+    test suite, on when QUERY_DETECTOR_ENABLED
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_DETECTOR_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.handlers = querycheck.get_violation_handlers()
+
+    def __call__(self, request):
+        detector = querycheck.QueryDetector()
+        wrapped = connections.all()
+        for connection in wrapped:
+            connection.execute_wrappers.append(detector)
+        try:
+            response = self.get_response(request)
+        finally:
+            for connection in wrapped:
+                connection.execute_wrappers.remove(detector)
+        violations = detector.violations()
+        if violations:
+            for handler in self.handlers:
+                handler(request, violations)
+        return response
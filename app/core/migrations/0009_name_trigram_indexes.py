@@ -0,0 +1,38 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+TRIGRAM_INDEXES = (
+    ('core_tag_name_trgm_idx', 'core_tag'),
+    ('core_ingrediant_name_trgm_idx', 'core_ingrediant'),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """
+    Trigram indexes only exist on Postgres, other backends fall back to
+    LIKE matching without them
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        for index_name, table in TRIGRAM_INDEXES:
+            schema_editor.execute(
+                f'CREATE INDEX {index_name} '
+                f'ON {table} USING gin (name gin_trgm_ops)'
+            )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for index_name, _ in TRIGRAM_INDEXES:
+            schema_editor.execute(f'DROP INDEX {index_name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_recipe_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.0.14 on 2026-10-18 03:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_recipe_image_upload'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='ingrediant',
+            name='core_ingrediant_user_name_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='tag',
+            name='core_tag_user_name_idx',
+        ),
+        migrations.AddIndex(
+            model_name='ingrediant',
+            index=models.Index(fields=['user', 'name', 'id'], name='core_ingrediant_user_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'name', 'id'], name='core_tag_user_name_idx'),
+        ),
+    ]
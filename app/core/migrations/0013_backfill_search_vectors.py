@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+POSTGRES_BACKFILL_SQL = """
+UPDATE core_recipe SET search_vector =
+    setweight(to_tsvector(%(config)s, core_recipe.title), 'A') ||
+    setweight(to_tsvector(%(config)s, coalesce((
+        SELECT string_agg(core_tag.name, ' ')
+        FROM core_tag
+        INNER JOIN core_recipe_tags
+            ON core_recipe_tags.tag_id = core_tag.id
+        WHERE core_recipe_tags.recipe_id = core_recipe.id
+    ), '')), 'B') ||
+    setweight(to_tsvector(%(config)s, coalesce((
+        SELECT string_agg(core_ingrediant.name, ' ')
+        FROM core_ingrediant
+        INNER JOIN core_recipe_ingrediants
+            ON core_recipe_ingrediants.ingrediant_id = core_ingrediant.id
+        WHERE core_recipe_ingrediants.recipe_id = core_recipe.id
+    ), '')), 'B')
+WHERE core_recipe.id = ANY(%(ids)s)
+"""
+
+
+def backfill_search_vectors(apps, schema_editor):
+    """
+    Compute the search vectors of the recipes created before the search
+    migration, in batches so no single statement locks the whole table
+    """
+    Recipe = apps.get_model('core', 'Recipe')
+    connection = schema_editor.connection
+    recipe_ids = Recipe.objects.using(connection.alias).filter(
+        search_vector__isnull=True
+    ).order_by('id').values_list('id', flat=True)
+    last_id = 0
+    while True:
+        batch = list(recipe_ids.filter(id__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            return
+        last_id = batch[-1]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(POSTGRES_BACKFILL_SQL, {
+                    'config': settings.RECIPE_SEARCH_CONFIG,
+                    'ids': batch,
+                })
+            continue
+
+        # Other backends search the plain text document instead
+        recipes = Recipe.objects.using(connection.alias).filter(
+            id__in=batch
+        ).prefetch_related('tags', 'ingrediants')
+        for recipe in recipes:
+            words = [recipe.title]
+            words.extend(tag.name for tag in recipe.tags.all())
+            words.extend(ing.name for ing in recipe.ingrediants.all())
+            recipe.search_vector = ' '.join(words).lower()
+        Recipe.objects.using(connection.alias).bulk_update(
+            recipes, ['search_vector']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_attr_name_id_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_search_vectors, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.14 on 2026-10-18 04:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_backfill_search_vectors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_queued_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+    ]
@@ -2,6 +2,7 @@ import os
 import uuid
 
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
     PermissionsMixin
 from django.conf import settings
@@ -61,6 +62,13 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'name', 'id'], name='core_tag_user_name_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -75,6 +83,14 @@ class Ingrediant(models.Model):
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'name', 'id'],
+                name='core_ingrediant_user_name_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -83,6 +99,15 @@ class Recipe(models.Model):
     """
     Model for Recipe objects
     """
+    IMAGE_PENDING = 'pending'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUS_CHOICES = (
+        (IMAGE_PENDING, 'Pending'),
+        (IMAGE_READY, 'Ready'),
+        (IMAGE_FAILED, 'Failed'),
+    )
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
@@ -94,6 +119,41 @@ class Recipe(models.Model):
     ingrediants = models.ManyToManyField('Ingrediant')
     tags = models.ManyToManyField('Tag')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image_status = models.CharField(
+        max_length=20, blank=True, choices=IMAGE_STATUS_CHOICES
+    )
+    image_renditions = models.TextField(blank=True, editable=False)
+    # When processing of the current image was last queued, to tell jobs
+    # lost with their worker from those still running
+    image_queued_at = models.DateTimeField(null=True, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-id'], name='core_recipe_user_id_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class RecipeImageUpload(models.Model):
+    """
+    Model for resumable chunked uploads of a recipe image
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE)
+    file_name = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    checksum = models.CharField(max_length=64)
+    offset = models.BigIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.file_name
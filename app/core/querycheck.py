@@ -0,0 +1,99 @@
+import collections
+import logging
+import re
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+QueryViolation = collections.namedtuple(
+    'QueryViolation', 'kind sql count duration'
+)
+REPEATED = 'repeated'
+SLOW = 'slow'
+
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*%s\s*,?)+\)', re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+
+
+def normalize_sql(sql):
+    """
+    Return the shape of a query, with literals replaced by ? and IN lists
+    of any length collapsed, so queries differing only in values match
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+class QueryDetector:
+    """
+    Database execute wrapper grouping the executed queries by shape, to
+    flag shapes repeated repeat_threshold times or more, the mark of an
+    N+1, and queries slower than slow_query_time seconds
+    """
+
+    def __init__(self, repeat_threshold=None, slow_query_time=None):
+        if repeat_threshold is None:
+            repeat_threshold = settings.QUERY_DETECTOR_REPEAT_THRESHOLD
+        if slow_query_time is None:
+            slow_query_time = settings.QUERY_DETECTOR_SLOW_QUERY_TIME
+        self.repeat_threshold = repeat_threshold
+        self.slow_query_time = slow_query_time
+        self.shapes = collections.Counter()
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.shapes[normalize_sql(sql)] += 1
+            if duration > self.slow_query_time:
+                self.slow.append((sql, duration))
+
+    def violations(self):
+        """
+        Return the repeated shapes and slow queries seen so far
+        """
+        violations = [
+            QueryViolation(REPEATED, shape, count, None)
+            for shape, count in self.shapes.most_common()
+            if count >= self.repeat_threshold
+        ]
+        violations.extend(
+            QueryViolation(SLOW, sql, 1, duration)
+            for sql, duration in self.slow
+        )
+        return violations
+
+
+def format_violation(violation):
+    """
+    Return a one line description of a violation
+    """
+    if violation.kind == REPEATED:
+        return f'{violation.count} queries of the same shape: {violation.sql}'
+    return f'query took {violation.duration * 1000:.0f}ms: {violation.sql}'
+
+
+def log_violations(request, violations):
+    """
+    Violation handler logging a warning per violation
+    """
+    for violation in violations:
+        logger.warning(
+            '%s %s: %s', request.method, request.path,
+            format_violation(violation)
+        )
+
+
+def get_violation_handlers():
+    """
+    Return the callables QUERY_DETECTOR_HANDLERS names
+    """
+    return [import_string(path) for path in settings.QUERY_DETECTOR_HANDLERS]
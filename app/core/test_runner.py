@@ -0,0 +1,110 @@
+import unittest
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from core.querycheck import REPEATED, format_violation, log_violations
+
+_violations = []
+
+
+def collect_violations(request, violations):
+    """
+    Violation handler keeping the N+1 violations for the running test.
+    Slow queries are only logged, their timing depends on the load of the
+    machine running the tests
+    """
+    _violations.extend(
+        (f'{request.method} {request.path}', violation)
+        for violation in violations if violation.kind == REPEATED
+    )
+    log_violations(request, [
+        violation for violation in violations
+        if violation.kind != REPEATED
+    ])
+
+
+def is_query_checked(test):
+    """
+    Whether a test belongs to the QUERY_CHECKED_TESTS modules
+    """
+    module = type(test).__module__
+    return any(
+        module == name or module.startswith(f'{name}.')
+        for name in settings.QUERY_CHECKED_TESTS
+    )
+
+
+class QueryCheckResultMixin:
+    """
+    Test result mixin failing query checked tests whose requests ran N+1
+    queries
+    """
+
+    def startTest(self, test):
+        _violations.clear()
+        super().startTest(test)
+
+    def addSuccess(self, test):
+        if _violations and is_query_checked(test):
+            report = '\n'.join(
+                f'{request}: {format_violation(violation)}'
+                for request, violation in _violations
+            )
+            try:
+                raise AssertionError(f'Query detector tripped:\n{report}')
+            except AssertionError as error:
+                self.addFailure(test, (type(error), error, None))
+            return
+        super().addSuccess(test)
+
+
+class QueryCheckRunner(DiscoverRunner):
+    """
+    Test runner adding --detect-queries, which turns the query detector
+    on and fails the tests of QUERY_CHECKED_TESTS running N+1 queries
+    """
+
+    def __init__(self, detect_queries=False, **kwargs):
+        super().__init__(**kwargs)
+        self.detect_queries = detect_queries
+        if detect_queries:
+            # The violations are collected in this process
+            self.parallel = 1
+        self._query_settings = None
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--detect-queries', action='store_true',
+            help=(
+                'Fail the query checked tests on N+1 queries, slow queries '
+                'are logged.'
+            )
+        )
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        if self.detect_queries:
+            self._query_settings = override_settings(
+                QUERY_DETECTOR_ENABLED=True,
+                QUERY_DETECTOR_HANDLERS=[
+                    'core.test_runner.collect_violations'
+                ],
+            )
+            self._query_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        if self._query_settings is not None:
+            self._query_settings.disable()
+        super().teardown_test_environment(**kwargs)
+
+    def get_resultclass(self):
+        resultclass = super().get_resultclass()
+        if not self.detect_queries:
+            return resultclass
+        return type('QueryCheckResult', (
+            QueryCheckResultMixin, resultclass or unittest.TextTestResult
+        ), {})
@@ -0,0 +1,127 @@
+import asyncio
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import (
+    LiveServerTestCase, RequestFactory, TransactionTestCase
+)
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.asgi import PooledASGIHandler
+from core.models import Recipe
+
+RECIPE_URL = reverse('recipe:recipe-list')
+RECIPE_EXPORT_URL = reverse('recipe:recipe-export')
+
+
+class PooledASGIHandlerTests(TransactionTestCase):
+    """ Test the ASGI handler serving requests on bounded pools """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@mail.com', 'Open@123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        Recipe.objects.create(
+            user=self.user, title='Fish Curry', time_minutes=5, price=1
+        )
+        self.handler = PooledASGIHandler()
+
+    def _request(self, path, method='GET'):
+        """
+        Helper function sending one request through the handler and
+        returning the status, headers and body sent back
+        """
+        scope = {
+            'type': 'http',
+            'method': method,
+            'path': path,
+            'query_string': b'',
+            'headers': [
+                (b'authorization', f'Token {self.token.key}'.encode()),
+                (b'host', b'testserver'),
+            ],
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(self.handler(scope, receive, send))
+        start = messages[0]
+        body = b''.join(message.get('body', b'') for message in messages[1:])
+        return start['status'], dict(start['headers']), body
+
+    def test_read_endpoints_use_read_pool(self):
+        """ Test list and detail reads are routed to the read pool """
+        factory = RequestFactory()
+        reads = [
+            factory.get(RECIPE_URL),
+            factory.get(reverse('recipe:recipe-detail', args=[1])),
+            factory.get(reverse('recipe:tag-list')),
+            factory.head(reverse('recipe:ingrediant-list')),
+        ]
+        others = [
+            factory.post(RECIPE_URL),
+            factory.get(RECIPE_EXPORT_URL),
+            factory.get('/admin/'),
+        ]
+
+        for request in reads:
+            self.assertIs(
+                self.handler.pool_for(request), self.handler.read_pool
+            )
+        for request in others:
+            self.assertIs(self.handler.pool_for(request), self.handler.pool)
+
+    def test_serves_recipe_list(self):
+        """ Test the recipe list is served through the handler """
+        status, _, body = self._request(RECIPE_URL)
+
+        self.assertEqual(status, 200)
+        self.assertIn(b'Fish Curry', body)
+        self.assertEqual(self.handler.read_pool.in_flight, 0)
+
+    def test_streams_export(self):
+        """ Test streamed responses are sent from the pool """
+        status, headers, body = self._request(RECIPE_EXPORT_URL)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'Content-Type'], b'application/x-ndjson')
+        self.assertIn(b'Fish Curry', body)
+
+    def test_saturated_pool_returns_busy(self):
+        """ Test requests beyond a pool's threads and queue get a 503 """
+        self.handler.read_pool.limit = 0
+
+        status, headers, _ = self._request(RECIPE_URL)
+
+        self.assertEqual(status, 503)
+        self.assertEqual(headers[b'Retry-After'], b'1')
+
+
+class LoadTestCommandTests(LiveServerTestCase):
+    """ Test the load test harness against a live server """
+
+    def test_load_test_reports_levels(self):
+        """ Test each concurrency level is reported without errors """
+        get_user_model().objects.create_user('load@mail.com', 'Open@123')
+        out = StringIO()
+
+        call_command(
+            'load_test', '--target', f'live={self.live_server_url}',
+            '--email', 'load@mail.com', '--concurrency', '1', '2',
+            '--requests', '6', stdout=out
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        for line in lines[1:]:
+            self.assertTrue(line.startswith('live'))
+            self.assertTrue(line.endswith(' 0'))
@@ -0,0 +1,131 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.authentication import get_token_cache, token_cache_key
+
+ME_URL = reverse('user:me')
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """ Test the cached token authentication """
+
+    def setUp(self):
+        get_token_cache().clear()
+        self.hits = self._sample('auth_token_cache_hits_total')
+        self.misses = self._sample('auth_token_cache_misses_total')
+        self.user = get_user_model().objects.create_user(
+            'user@mail.com', 'Open@123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def _sample(self, name):
+        """
+        Helper function returning the current value of a counter
+        """
+        return metrics.REGISTRY.get_sample_value(name) or 0
+
+    def _lookups(self):
+        """
+        Helper function returning the token cache hits and misses counted
+        since the test started
+        """
+        return (
+            self._sample('auth_token_cache_hits_total') - self.hits,
+            self._sample('auth_token_cache_misses_total') - self.misses,
+        )
+
+    def test_repeat_requests_skip_queries(self):
+        """
+        Test only the first request looks the token and user up, later
+        ones authenticate from the cache without a query
+        """
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+        self.assertEqual(self._lookups(), (1, 1))
+
+    def test_cached_user_update_keeps_password(self):
+        """
+        Test updating the cached user through the API leaves its password
+        alone, the password is loaded on access only
+        """
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {'name': 'New Name'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'New Name')
+        self.assertTrue(self.user.check_password('Open@123'))
+
+    def test_recipe_endpoints_use_cache(self):
+        """ Test the recipe viewsets authenticate through the cache """
+        self.client.get(RECIPE_URL)
+        self.client.get(RECIPE_URL)
+
+        self.assertEqual(self._lookups()[0], 1)
+
+    def test_deleted_token_rejected(self):
+        """ Test a deleted token stops authenticating """
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """ Test a deactivated user's token stops authenticating """
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_refreshes_user(self):
+        """ Test a password change drops the cached user """
+        self.client.get(ME_URL)
+        self.user.set_password('Changed@123')
+        self.user.save()
+
+        self.client.get(ME_URL)
+
+        self.assertEqual(self._lookups()[1], 2)
+
+    def test_cache_holds_no_secrets(self):
+        """
+        Test the cached entry holds the user fields but no token key or
+        password hash
+        """
+        self.client.get(ME_URL)
+
+        cached = get_token_cache().get(token_cache_key(self.token.key))
+        self.assertEqual(cached['id'], self.user.pk)
+        self.assertEqual(cached['email'], self.user.email)
+        self.assertNotIn('password', cached)
+        self.assertNotIn(self.token.key, str(cached))
+        self.assertNotIn(self.user.password, str(cached))
+
+    def test_invalid_token_not_cached(self):
+        """ Test unknown tokens are rejected on every request """
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self._lookups()[0], 0)
@@ -0,0 +1,26 @@
+from django.test import SimpleTestCase, override_settings
+
+from core.checks import check_shared_caches
+
+SHARED = {
+    'BACKEND': 'django_redis.cache.RedisCache',
+    'LOCATION': 'redis://redis:6379/0',
+}
+LOCAL = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    """ Test the deploy check of the cache backends """
+
+    @override_settings(CACHES={'default': SHARED, 'auth': SHARED})
+    def test_shared_caches_pass(self):
+        """ Test no error is reported when every cache is shared """
+        self.assertEqual(check_shared_caches(None), [])
+
+    @override_settings(CACHES={'default': SHARED, 'auth': LOCAL})
+    def test_local_cache_reported(self):
+        """ Test a process local cache is reported by alias """
+        errors = check_shared_caches(None)
+
+        self.assertEqual([error.id for error in errors], ['core.E001'])
+        self.assertIn("'auth'", errors[0].msg)
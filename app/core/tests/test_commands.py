@@ -1,23 +1,365 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
 from unittest.mock import patch
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
-from django.db.utils import OperationalError
+from django.core.management.base import CommandError
 from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Recipe, RecipeImageUpload
+from recipe.renderers import orjson
+from recipe.uploads import upload_temp_path
 
 
 class CommandTests(TestCase):
 
     def test_wait_for_db_ready(self):
         """ Testign waiting for db when db is ready """
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+        with patch(
+            'core.management.commands.wait_for_db.check_databases'
+        ) as cd:
+            cd.return_value = {'default': None}
+            call_command('wait_for_db', stdout=StringIO())
+            self.assertEqual(cd.call_count, 1)
 
     @patch('time.sleep', return_value=True)
     def test_wait_for_db(self, ts):
         """ Test waiting for db"""
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+        with patch(
+            'core.management.commands.wait_for_db.check_databases'
+        ) as cd:
+            cd.side_effect = [{'default': 'refused'}] * 5 + [
+                {'default': None}
+            ]
+            call_command(
+                'wait_for_db', '--initial-delay', '0.1', '--max-delay', '1',
+                stdout=StringIO()
+            )
+            self.assertEqual(cd.call_count, 6)
+
+        delays = [call[0][0] for call in ts.call_args_list]
+        self.assertEqual(len(delays), 5)
+        for attempt, delay in enumerate(delays):
+            self.assertLessEqual(delay, min(1, 0.1 * 2 ** attempt))
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_rechecks_only_unavailable(self, ts):
+        """ Test only the databases still unavailable are checked again """
+        with patch(
+            'core.management.commands.wait_for_db.check_databases'
+        ) as cd:
+            cd.side_effect = [
+                {'default': None, 'replica': 'refused'}, {'replica': None}
+            ]
+            call_command(
+                'wait_for_db', '--database', 'default', '--database',
+                'replica', stdout=StringIO()
+            )
+
+        self.assertEqual(cd.call_args_list[1][0][0], ['replica'])
+
+    def test_wait_for_db_deadline(self):
+        """ Test waiting gives up once the deadline passes """
+        with patch(
+            'core.management.commands.wait_for_db.check_databases'
+        ) as cd:
+            cd.return_value = {'default': 'refused'}
+            with self.assertRaisesMessage(CommandError, 'default (refused)'):
+                call_command(
+                    'wait_for_db', '--timeout', '0', stdout=StringIO()
+                )
+
+    def test_explain_list_queries(self):
+        """ Test the list query plans are reported with their indexes """
+        get_user_model().objects.create_user('user@mail.com', 'Open@123')
+        out = StringIO()
+
+        call_command('explain_list_queries', '--force-index', stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('== tag list', output)
+        self.assertIn('== ingrediant list', output)
+        self.assertIn('== recipe tag filter', output)
+        self.assertIn('uses core_recipe_user_id_idx', output)
+
+    def test_explain_list_queries_without_users(self):
+        """ Test explaining the queries fails without any user """
+        with self.assertRaises(CommandError):
+            call_command('explain_list_queries')
+
+    def test_benchmark_recipe_filters(self):
+        """ Test the filter benchmark runs and leaves no seeded data """
+        out = StringIO()
+
+        call_command(
+            'benchmark_recipe_filters', '--recipes', '20', '--tags', '5',
+            '--ingrediants', '5', '--repeat', '1', stdout=out
+        )
+
+        output = out.getvalue()
+        self.assertIn('chained joins', output)
+        self.assertIn('semi-join any', output)
+        self.assertIn('semi-join all', output)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_import_recipes(self):
+        """ Test recipes are imported from a JSON Lines file """
+        user = get_user_model().objects.create_user(
+            'user@mail.com', 'Open@123'
+        )
+        out = StringIO()
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl') as ntf:
+            for i in range(3):
+                ntf.write(json.dumps({
+                    'title': f'Recipe {i}', 'time_minutes': 10,
+                    'price': '5.00', 'tags': ['Imported'],
+                }) + '\n')
+            ntf.flush()
+
+            call_command(
+                'import_recipes', ntf.name, '--email', user.email,
+                '--batch-size', '2', stdout=out
+            )
+
+        self.assertIn('Imported 3 recipes', out.getvalue())
+        self.assertEqual(Recipe.objects.filter(user=user).count(), 3)
+        self.assertEqual(
+            Recipe.tags.through.objects.filter(
+                tag__name='Imported').count(), 3
+        )
+
+    def test_import_recipes_invalid_line(self):
+        """ Test an invalid line aborts the import and names the line """
+        user = get_user_model().objects.create_user(
+            'user@mail.com', 'Open@123'
+        )
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl') as ntf:
+            ntf.write(json.dumps({
+                'title': 'Toast', 'time_minutes': 2, 'price': '1.00'
+            }) + '\n\n')
+            ntf.write(json.dumps({'title': 'Broken'}) + '\n')
+            ntf.flush()
+
+            with self.assertRaisesMessage(CommandError, 'Line 3'):
+                call_command(
+                    'import_recipes', ntf.name, '--email', user.email,
+                    stdout=StringIO()
+                )
+
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_export_recipes(self):
+        """ Test recipes are exported as JSON Lines """
+        user = get_user_model().objects.create_user(
+            'user@mail.com', 'Open@123'
+        )
+        for i in range(3):
+            Recipe.objects.create(
+                user=user, title=f'Recipe {i}', time_minutes=5, price=1
+            )
+        out = StringIO()
+
+        call_command(
+            'export_recipes', '--email', user.email, '--chunk-size', '2',
+            stdout=out
+        )
+
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(
+            [line['title'] for line in lines],
+            ['Recipe 0', 'Recipe 1', 'Recipe 2']
+        )
+
+    def test_update_search_vectors(self):
+        """ Test search vectors are rebuilt for every recipe """
+        user = get_user_model().objects.create_user(
+            'user@mail.com', 'Open@123'
+        )
+        for i in range(3):
+            Recipe.objects.create(
+                user=user, title=f'Recipe {i}', time_minutes=5, price=1
+            )
+        Recipe.objects.update(search_vector=None)
+        out = StringIO()
+
+        call_command('update_search_vectors', '--batch-size', '2', stdout=out)
+
+        self.assertIn('3 recipes', out.getvalue())
+        self.assertFalse(
+            Recipe.objects.filter(search_vector__isnull=True).exists()
+        )
+
+    def test_benchmark_autocomplete(self):
+        """ Test the autocomplete benchmark runs and leaves no seeded data """
+        out = StringIO()
+
+        call_command(
+            'benchmark_autocomplete', '--rows', '50', '--queries', '10',
+            stdout=out
+        )
+
+        self.assertIn('50 ingrediants', out.getvalue())
+        self.assertIn('median=', out.getvalue())
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_clear_image_uploads(self):
+        """ Test expired uploads are discarded with their chunk files """
+        user = get_user_model().objects.create_user(
+            'user@mail.com', 'Open@123'
+        )
+        recipe = Recipe.objects.create(
+            user=user, title='Recipe', time_minutes=5, price=1
+        )
+        uploads = [
+            RecipeImageUpload.objects.create(
+                user=user, recipe=recipe, file_name='a.jpg', size=1,
+                checksum='0' * 64
+            )
+            for _ in range(2)
+        ]
+        RecipeImageUpload.objects.filter(pk=uploads[0].pk).update(
+            created=timezone.now() - timedelta(days=2)
+        )
+        out = StringIO()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with self.settings(RECIPE_UPLOAD_TEMP_DIR=temp_dir):
+                for upload in uploads:
+                    open(upload_temp_path(upload), 'wb').close()
+                call_command('clear_image_uploads', stdout=out)
+
+                self.assertFalse(os.path.exists(upload_temp_path(uploads[0])))
+                self.assertTrue(os.path.exists(upload_temp_path(uploads[1])))
+
+        self.assertIn('Discarded 1 expired uploads', out.getvalue())
+        self.assertEqual(
+            list(RecipeImageUpload.objects.values_list('pk', flat=True)),
+            [uploads[1].pk]
+        )
+
+    def test_benchmark_logins(self):
+        """ Test the login benchmark reports throughput and cleans up """
+        out = StringIO()
+
+        with self.settings(PASSWORD_HASH_ITERATIONS=1000):
+            call_command(
+                'benchmark_logins', '--users', '2', '--logins', '4',
+                '--concurrency', '1', stdout=out
+            )
+
+        self.assertIn('logins=4 busy=0 failed=0', out.getvalue())
+        self.assertIn('iterations=1000', out.getvalue())
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_benchmark_recipe_list(self):
+        """ Test the list benchmark compares both paths on equal output """
+        out = StringIO()
+
+        call_command(
+            'benchmark_recipe_list', '--sizes', '10', '20', '--repeat', '1',
+            stdout=out
+        )
+
+        self.assertIn('rows=20', out.getvalue())
+        self.assertEqual(out.getvalue().count('identical=True'), 2)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_seed_data(self):
+        """ Test users are seeded with their recipes and search vectors """
+        out = StringIO()
+
+        with self.settings(PASSWORD_HASH_ITERATIONS=1000):
+            call_command(
+                'seed_data', '--users', '2', '--recipes', '5', '--tags',
+                '3', '--ingrediants', '4', '--links', '2', stdout=out
+            )
+
+        users = get_user_model().objects.filter(email__startswith='seed-')
+        self.assertEqual(users.count(), 2)
+        self.assertTrue(users[0].check_password('Bench@123'))
+        self.assertEqual(Recipe.objects.count(), 10)
+        self.assertEqual(Recipe.tags.through.objects.count(), 20)
+        self.assertFalse(
+            Recipe.objects.filter(search_vector__isnull=True).exists()
+        )
+        self.assertIn('Seeded 2 users with 10 recipes', out.getvalue())
+
+    def test_seed_data_is_reproducible(self):
+        """ Test the same seed seeds the same recipes """
+        def seed():
+            call_command(
+                'seed_data', '--users', '1', '--recipes', '5',
+                stdout=StringIO()
+            )
+            recipes = list(Recipe.objects.order_by('id').values_list(
+                'title', 'time_minutes', 'price'
+            ))
+            get_user_model().objects.all().delete()
+            return recipes
+
+        with self.settings(PASSWORD_HASH_ITERATIONS=1000):
+            self.assertEqual(seed(), seed())
+
+    def test_benchmark_api(self):
+        """ Test every scenario is measured, stored and rolled back """
+        out = StringIO()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output = os.path.join(temp_dir, 'results.json')
+            with self.settings(PASSWORD_HASH_ITERATIONS=1000):
+                call_command(
+                    'benchmark_api', '--users', '1', '--recipes', '5',
+                    '--tags', '3', '--ingrediants', '3', '--requests', '3',
+                    '--warmup', '1', '--output', output, stdout=out
+                )
+            with open(output) as results_file:
+                results = json.load(results_file)
+
+        self.assertEqual(results['meta']['scale']['recipes'], 5)
+        encoder = 'json' if orjson is None else 'orjson'
+        self.assertEqual(results['meta']['encoder'], encoder)
+        self.assertIn(f'encoder={encoder}', out.getvalue())
+        self.assertEqual(set(results['results']), {
+            'token', 'list', 'list-cached', 'filter', 'filter-cached',
+            'detail', 'create', 'upload-image'
+        })
+        for result in results['results'].values():
+            self.assertEqual(result['requests'], 3)
+            self.assertEqual(result['errors'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        for name in ('list', 'filter'):
+            self.assertGreater(results['results'][name]['queries'], 0)
+            self.assertLess(
+                results['results'][f'{name}-cached']['queries'],
+                results['results'][name]['queries']
+            )
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_benchmark_api_baseline_regression(self):
+        """ Test a p95 regression beyond the limit fails the run """
+        baseline = {'meta': {}, 'results': {'detail': {
+            'rps': 1e6, 'p50_ms': 1e-6, 'p95_ms': 1e-6, 'p99_ms': 1e-6,
+            'queries': 0,
+        }}}
+        out = StringIO()
+
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as ntf:
+            json.dump(baseline, ntf)
+            ntf.flush()
+
+            with self.assertRaisesMessage(CommandError, 'detail'):
+                call_command(
+                    'benchmark_api', '--users', '1', '--recipes', '2',
+                    '--tags', '2', '--ingrediants', '2', '--requests', '2',
+                    '--warmup', '0', '--scenario', 'detail', '--baseline',
+                    ntf.name, '--max-regression', '50', stdout=out
+                )
+
+        self.assertIn('another scale', out.getvalue())
+        self.assertIn('another JSON encoder', out.getvalue())
+        self.assertIn('detail        p50_ms=+', out.getvalue())
@@ -0,0 +1,130 @@
+import sqlite3
+import threading
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from core.db.pool import ConnectionPool, PoolTimeout, close_pools, get_pool
+
+
+def ping(conn):
+    conn.execute('SELECT 1')
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """ Test the connection pool with sqlite3 connections """
+
+    def setUp(self):
+        self.opened = []
+
+        def connect():
+            conn = sqlite3.connect(':memory:', check_same_thread=False)
+            self.opened.append(conn)
+            return conn
+
+        self.pool = ConnectionPool(connect, size=2, timeout=0.1, ping=ping)
+
+    def test_reuses_released_connection(self):
+        """ Test a released connection is handed out again """
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+
+        self.assertIs(self.pool.acquire(), conn)
+        self.assertEqual(len(self.opened), 1)
+
+    def test_waits_and_times_out_when_exhausted(self):
+        """ Test acquiring beyond the size waits then raises PoolTimeout """
+        first = self.pool.acquire()
+        self.pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            self.pool.acquire()
+
+        self.pool.timeout = 5
+        threading.Timer(0.05, self.pool.release, [first]).start()
+        self.assertIs(self.pool.acquire(), first)
+
+    def test_recycles_connections_past_max_age(self):
+        """ Test connections older than max_age are closed, not reused """
+        self.pool.max_age = 60
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+
+        with patch('core.db.pool.time.monotonic', return_value=10 ** 9):
+            fresh = self.pool.acquire()
+
+        self.assertIsNot(fresh, conn)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute('SELECT 1')
+
+    def test_failed_ping_recycles_idle_connections(self):
+        """ Test a dead idle connection recycles every idle connection """
+        first = self.pool.acquire()
+        second = self.pool.acquire()
+        self.pool.release(first)
+        self.pool.release(second)
+        second.close()
+
+        conn = self.pool.acquire()
+
+        self.assertNotIn(conn, (first, second))
+        self.assertEqual(self.pool.idle, 0)
+        self.assertEqual(self.pool.in_use, 1)
+
+    def test_invalidate_recycles_connections_in_use(self):
+        """ Test connections in use when invalidated are closed on release """
+        conn = self.pool.acquire()
+        self.pool.invalidate()
+        self.pool.release(conn)
+
+        self.assertEqual(self.pool.idle, 0)
+        self.assertIsNot(self.pool.acquire(), conn)
+
+    def test_failed_reset_discards_connection(self):
+        """ Test a connection failing its reset is not reused """
+        self.pool.reset = lambda conn: conn.execute('SELECT * FROM nowhere')
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+
+        self.assertEqual(self.pool.idle, 0)
+
+    def test_close_pools(self):
+        """ Test closing pools closes their idle connections """
+        pool = get_pool('test', lambda: self.pool)
+        pool.release(pool.acquire())
+
+        close_pools(lambda key: key == 'test')
+
+        self.assertEqual(self.pool.idle, 0)
+        self.assertIsNot(get_pool('test', lambda: ConnectionPool(None)), pool)
+        close_pools(lambda key: key == 'test')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'The pool backend is Postgres')
+class PooledBackendTests(TransactionTestCase):
+    """ Test the pooled Postgres backend """
+
+    def test_close_returns_connection_to_pool(self):
+        """ Test closing keeps the connection open for the next request """
+        connection.ensure_connection()
+        raw = connection.connection
+        connection.close()
+
+        connection.ensure_connection()
+
+        self.assertIs(connection.connection, raw)
+
+    def test_open_transaction_is_rolled_back(self):
+        """ Test a connection comes back without an open transaction """
+        connection.ensure_connection()
+        connection.set_autocommit(False)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        connection.close()
+
+        connection.ensure_connection()
+
+        self.assertEqual(connection.connection.info.transaction_status, 0)
+        self.assertTrue(connection.get_autocommit())
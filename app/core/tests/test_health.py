@@ -0,0 +1,57 @@
+from unittest.mock import patch
+
+from django.db import OperationalError
+from django.test import TestCase
+from django.urls import reverse
+
+from core.health import check_database, check_databases
+
+LIVENESS_URL = reverse('liveness')
+READINESS_URL = reverse('readiness')
+
+
+class HealthCheckTests(TestCase):
+    """ Test the database checks and the probe endpoints """
+
+    def test_check_database(self):
+        """ Test an available database passes the check """
+        self.assertIsNone(check_database('default'))
+        self.assertEqual(check_databases(['default']), {'default': None})
+
+    def test_check_database_error(self):
+        """ Test a failing query is reported instead of raised """
+        with patch('django.db.backends.utils.CursorWrapper.execute') as ex:
+            ex.side_effect = OperationalError('connection refused')
+            self.assertEqual(check_database(), 'connection refused')
+
+    def test_liveness(self):
+        """ Test the liveness probe answers without touching the db """
+        with self.assertNumQueries(0):
+            res = self.client.get(LIVENESS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {'status': 'ok'})
+
+    def test_readiness(self):
+        """ Test the readiness probe is ok when the database answers """
+        res = self.client.get(READINESS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            res.json(), {'status': 'ok', 'databases': {'default': 'ok'}}
+        )
+
+    def test_readiness_unavailable(self):
+        """ Test the readiness probe fails when a database is down """
+        with patch('core.views.check_databases') as cd:
+            cd.return_value = {'default': 'connection refused'}
+            res = self.client.get(READINESS_URL)
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.json()['databases'], {'default': 'unavailable'})
+
+    def test_probes_reject_writes(self):
+        """ Test the probes only answer GET and HEAD """
+        res = self.client.post(READINESS_URL)
+
+        self.assertEqual(res.status_code, 405)
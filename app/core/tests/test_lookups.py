@@ -0,0 +1,41 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from core.models import Tag
+
+
+class ILikeContainsTests(TestCase):
+    """ Test the ilike_contains lookup """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@mail.com', 'Open@123'
+        )
+
+    def test_matches_case_insensitively(self):
+        """ Test names containing the text in any case are matched """
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        Tag.objects.create(user=self.user, name='Soup')
+
+        self.assertEqual(
+            list(Tag.objects.filter(name__ilike_contains='EG')), [vegan]
+        )
+
+    def test_escapes_wildcards(self):
+        """ Test LIKE wildcards in the text are matched literally """
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        self.assertFalse(
+            Tag.objects.filter(name__ilike_contains='V%n').exists()
+        )
+
+    @skipUnless(connection.vendor == 'postgresql', 'Postgres only')
+    def test_compiles_to_ilike_on_bare_column(self):
+        """ Test Postgres matches with ILIKE on the column, no UPPER() """
+        sql = str(Tag.objects.filter(name__ilike_contains='veg').query)
+
+        self.assertIn('"core_tag"."name" ILIKE', sql)
+        self.assertNotIn('UPPER', sql)
@@ -0,0 +1,135 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.models import Recipe
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TOKEN_URL = reverse('user:token')
+METRICS_URL = reverse('metrics')
+
+
+class RenderMetricsTests(TestCase):
+    """ Test rendering the metrics """
+
+    def test_render_this_process(self):
+        """ Test the metrics of this process are rendered by default """
+        with patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': ''}):
+            body = metrics.render_metrics().decode()
+
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('# TYPE auth_token_cache_hits_total counter', body)
+
+    def test_render_every_process(self):
+        """ Test multiprocess mode sums up the files of every process """
+        with tempfile.TemporaryDirectory() as multiproc_dir, patch.dict(
+                os.environ, {'PROMETHEUS_MULTIPROC_DIR': multiproc_dir}
+        ), patch(
+            'core.metrics.multiprocess.MultiProcessCollector'
+        ) as collector:
+            metrics.render_metrics()
+
+        registry = collector.call_args[0][0]
+        self.assertIsNot(registry, metrics.REGISTRY)
+
+
+class RequestMetricsMiddlewareTests(TestCase):
+    """ Test the request metrics middleware and endpoint """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@mail.com', 'Open@123'
+        )
+        Recipe.objects.create(
+            user=self.user, title='Fish Curry', time_minutes=5, price=1
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _sample(self, name, **labels):
+        """
+        Helper function returning the current value of a sample
+        """
+        return metrics.REGISTRY.get_sample_value(name, labels) or 0
+
+    @override_settings(METRICS_SERVER_TIMING=True)
+    def test_server_timing_header(self):
+        """ Test responses carry the wall, db and serializer timings """
+        res = self.client.get(RECIPE_URL)
+
+        timing = res['Server-Timing']
+        self.assertIn('total;dur=', timing)
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('serializer;dur=', timing)
+
+    def test_server_timing_header_off(self):
+        """ Test the header is not sent to clients by default """
+        res = self.client.get(RECIPE_URL)
+
+        self.assertFalse(res.has_header('Server-Timing'))
+
+    def test_metrics_per_view(self):
+        """ Test the metrics are labelled with the view and action """
+        list_view = {'view': 'RecipeViewSet.list'}
+        token_view = {'view': 'CreateTokenView.post'}
+        samples = [
+            ('http_request_duration_seconds_count',
+             {**list_view, 'method': 'GET', 'status': '200'}),
+            ('http_request_duration_seconds_count',
+             {**token_view, 'method': 'POST', 'status': '400'}),
+            ('http_request_db_queries_count', list_view),
+            ('http_request_serializer_duration_seconds_count', token_view),
+            ('http_response_size_bytes_count', list_view),
+        ]
+        before = [self._sample(name, **labels) for name, labels in samples]
+
+        self.client.get(RECIPE_URL)
+        self.client.post(
+            TOKEN_URL, {'email': 'user@mail.com', 'password': 'wrong'}
+        )
+
+        for (name, labels), count in zip(samples, before):
+            self.assertEqual(self._sample(name, **labels), count + 1, name)
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, 200)
+        body = res.content.decode()
+        self.assertIn(
+            'http_request_duration_seconds_count{method="GET",'
+            'status="200",view="RecipeViewSet.list"}', body
+        )
+        self.assertIn('auth_token_cache_hits_total', body)
+
+    def test_db_queries_are_counted(self):
+        """ Test every query of the request is counted """
+        before = self._sample(
+            'http_request_db_queries_sum', view='TagListViewSet.list'
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('recipe:tag-list'))
+
+        self.assertEqual(
+            self._sample(
+                'http_request_db_queries_sum', view='TagListViewSet.list'
+            ) - before,
+            len(queries)
+        )
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        """ Test the endpoint asks for the bearer token when set """
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 401)
+
+        res = self.client.get(
+            METRICS_URL, HTTP_AUTHORIZATION='Bearer secret'
+        )
+
+        self.assertEqual(res.status_code, 200)
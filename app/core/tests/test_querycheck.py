@@ -0,0 +1,135 @@
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import test_runner
+from core.models import Tag
+from core.querycheck import (
+    REPEATED, SLOW, QueryDetector, QueryViolation, normalize_sql
+)
+
+TAGS_URL = reverse('recipe:tag-list')
+
+
+class QueryDetectorTests(TestCase):
+    """ Test grouping queries by shape """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@mail.com', 'Open@123'
+        )
+
+    def test_normalize_sql(self):
+        """ Test literals and IN lists do not change the shape """
+        self.assertEqual(
+            normalize_sql(
+                "SELECT * FROM t WHERE a = 'x' AND b IN (%s, %s, %s) "
+                "LIMIT 21"
+            ),
+            'SELECT * FROM t WHERE a = ? AND b IN (...) LIMIT ?'
+        )
+        self.assertEqual(
+            normalize_sql('SELECT * FROM t WHERE b IN (%s)'),
+            normalize_sql('SELECT * FROM t WHERE b IN (%s, %s)'),
+        )
+
+    def test_repeated_shapes(self):
+        """ Test a shape repeated up to the threshold is flagged """
+        tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+            for i in range(3)
+        ]
+        detector = QueryDetector(repeat_threshold=3, slow_query_time=10)
+
+        with connection.execute_wrapper(detector):
+            for tag in tags:
+                Tag.objects.get(pk=tag.pk)
+            Tag.objects.count()
+
+        violations = detector.violations()
+        self.assertEqual(len(violations), 1)
+        self.assertEqual(violations[0].kind, REPEATED)
+        self.assertEqual(violations[0].count, 3)
+
+    def test_slow_queries(self):
+        """ Test queries over the time budget are flagged """
+        detector = QueryDetector(repeat_threshold=10, slow_query_time=0)
+
+        with connection.execute_wrapper(detector):
+            Tag.objects.count()
+
+        self.assertEqual(
+            [violation.kind for violation in detector.violations()], [SLOW]
+        )
+
+    @override_settings(
+        QUERY_DETECTOR_ENABLED=True, QUERY_DETECTOR_REPEAT_THRESHOLD=1,
+        QUERY_DETECTOR_HANDLERS=['core.test_runner.collect_violations'],
+    )
+    def test_middleware_hands_violations_to_handlers(self):
+        """ Test the violations of a request reach the handlers """
+        client = APIClient()
+        client.force_authenticate(self.user)
+        test_runner._violations.clear()
+
+        client.get(TAGS_URL)
+
+        self.assertTrue(test_runner._violations)
+        request, violation = test_runner._violations[0]
+        self.assertEqual(request, f'GET {TAGS_URL}')
+        test_runner._violations.clear()
+
+
+class QueryCheckResultTests(TestCase):
+    """ Test the test runner mode failing tests on violations """
+
+    def _run(self, module, violation=None):
+        """
+        Helper function running a test tripping the detector from the
+        given module, with an N+1 unless another violation is given, and
+        returning the result
+        """
+        if violation is None:
+            violation = QueryViolation(REPEATED, 'SELECT ?', 5, None)
+
+        class TrippingTest(unittest.TestCase):
+            def test_trip(self):
+                request = RequestFactory().get('/api/recipe/tag/')
+                test_runner.collect_violations(request, [violation])
+
+        TrippingTest.__module__ = module
+        result_class = type('Result', (
+            test_runner.QueryCheckResultMixin, unittest.TestResult
+        ), {})
+        result = result_class()
+        TrippingTest('test_trip').run(result)
+        return result
+
+    def test_checked_test_fails(self):
+        """ Test a checked test tripping the detector fails """
+        result = self._run('recipe.tests.test_example')
+
+        self.assertEqual(len(result.failures), 1)
+        self.assertIn('5 queries of the same shape', result.failures[0][1])
+
+    def test_unchecked_test_passes(self):
+        """ Test tests outside QUERY_CHECKED_TESTS are not failed """
+        result = self._run('core.tests.test_example')
+
+        self.assertEqual(result.failures, [])
+        self.assertTrue(result.wasSuccessful())
+
+    def test_slow_query_only_logged(self):
+        """ Test a slow query logs a warning without failing the test """
+        with self.assertLogs('core.querycheck', 'WARNING') as logs:
+            result = self._run('recipe.tests.test_example', QueryViolation(
+                SLOW, 'SELECT ?', 1, 0.5
+            ))
+
+        self.assertTrue(result.wasSuccessful())
+        self.assertIn('query took 500ms', logs.output[0])
@@ -0,0 +1,54 @@
+import importlib
+import os
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from app import gunicorn_conf
+
+
+class GunicornConfigTests(SimpleTestCase):
+    """ Test the production gunicorn config """
+
+    def _load(self, **environ):
+        """
+        Helper function loading the config with the given environment
+        """
+        environ = {
+            **{
+                name: value for name, value in os.environ.items()
+                if not name.startswith('GUNICORN_')
+            },
+            **environ,
+        }
+        with patch.dict(os.environ, environ, clear=True):
+            return importlib.reload(gunicorn_conf)
+
+    def tearDown(self):
+        importlib.reload(gunicorn_conf)
+
+    def test_workers_derive_from_cpus(self):
+        """ Test the default workers are two per available CPU plus one """
+        with patch(
+            'os.sched_getaffinity', return_value={0, 1, 2}, create=True
+        ):
+            config = self._load()
+
+        self.assertEqual(config.workers, 7)
+
+    def test_environment_overrides(self):
+        """ Test the sizes and preloading are read from the environment """
+        config = self._load(
+            GUNICORN_WORKERS='2', GUNICORN_THREADS='1', GUNICORN_PRELOAD='0'
+        )
+
+        self.assertEqual(config.workers, 2)
+        self.assertEqual(config.worker_class, 'sync')
+        self.assertFalse(config.preload_app)
+
+    def test_threaded_workers_preloaded_by_default(self):
+        """ Test workers are threaded and forked after preloading """
+        config = self._load(GUNICORN_THREADS='4')
+
+        self.assertEqual(config.worker_class, 'gthread')
+        self.assertTrue(config.preload_app)
@@ -1,3 +1,55 @@
-# from django.shortcuts import render
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_safe
 
-# Create your views here.
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from core.health import check_databases
+from core.metrics import render_metrics
+
+
+@never_cache
+@require_safe
+def liveness(request):
+    """
+    Liveness probe, the process answers requests
+    """
+    return JsonResponse({'status': 'ok'})
+
+
+@never_cache
+@require_safe
+def readiness(request):
+    """
+    Readiness probe, every database answers a SELECT 1
+    """
+    errors = check_databases(settings.DATABASES)
+    ready = not any(errors.values())
+    return JsonResponse(
+        {
+            'status': 'ok' if ready else 'unavailable',
+            'databases': {
+                alias: 'ok' if error is None else 'unavailable'
+                for alias, error in errors.items()
+            },
+        },
+        status=200 if ready else 503
+    )
+
+
+@never_cache
+@require_safe
+def prometheus_metrics(request):
+    """
+    Request metrics in the Prometheus text format, behind a bearer token
+    when METRICS_TOKEN is set
+    """
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(
+        render_metrics(), content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,91 @@
+from django.db import connection
+
+from core.db.bulk import bulk_insert
+
+STATUS_CREATED = 'created'
+STATUS_EXISTS = 'exists'
+STATUS_UPDATED = 'updated'
+STATUS_DELETED = 'deleted'
+STATUS_NOT_FOUND = 'not_found'
+
+
+def get_or_create_named(model, user, names):
+    """
+    Map each of the names to the id of the user's object of that name,
+    bulk creating the missing ones. Returns the mapping and the set of
+    names that were created
+    """
+    names = list(dict.fromkeys(names))
+    name_ids = {}
+    for obj_id, name in model.objects.filter(
+            user=user, name__in=names).order_by('-id').values_list(
+            'id', 'name'):
+        name_ids[name] = obj_id
+
+    missing = [name for name in names if name not in name_ids]
+    if missing:
+        created = bulk_insert(
+            model, [model(user=user, name=name) for name in missing]
+        )
+        if connection.features.can_return_rows_from_bulk_insert:
+            name_ids.update((obj.name, obj.pk) for obj in created)
+        else:
+            name_ids.update(model.objects.filter(
+                user=user, name__in=missing
+            ).values_list('name', 'id'))
+    return name_ids, set(missing)
+
+
+def bulk_create_named(model, user, names):
+    """
+    Create the user's objects for the given names, skipping the names the
+    user already has. Returns one result per requested name
+    """
+    name_ids, created = get_or_create_named(model, user, names)
+    results = []
+    for name in names:
+        status = STATUS_CREATED if name in created else STATUS_EXISTS
+        created.discard(name)
+        results.append({'id': name_ids[name], 'name': name, 'status': status})
+    return results
+
+
+def bulk_rename(model, user, items):
+    """
+    Rename the user's objects from a list of {'id', 'name'} items. Returns
+    one result per item
+    """
+    objects = model.objects.filter(
+        user=user, id__in=[item['id'] for item in items]
+    ).in_bulk()
+    for item in items:
+        if item['id'] in objects:
+            objects[item['id']].name = item['name']
+    model.objects.bulk_update(objects.values(), ['name'])
+
+    return [
+        {
+            'id': item['id'],
+            'name': item['name'],
+            'status': (
+                STATUS_UPDATED if item['id'] in objects else STATUS_NOT_FOUND
+            ),
+        }
+        for item in items
+    ]
+
+
+def bulk_delete(model, user, ids):
+    """
+    Delete the user's objects with the given ids. Returns one result per id
+    """
+    query_set = model.objects.filter(user=user, id__in=ids)
+    found = set(query_set.values_list('id', flat=True))
+    query_set.delete()
+    return [
+        {
+            'id': obj_id,
+            'status': STATUS_DELETED if obj_id in found else STATUS_NOT_FOUND,
+        }
+        for obj_id in ids
+    ]
@@ -0,0 +1,104 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from rest_framework.response import Response
+
+
+def get_cache():
+    """
+    Return the cache backend configured for recipe responses
+    """
+    return caches[settings.RECIPE_CACHE_ALIAS]
+
+
+def _user_version_key(user_id):
+    return f'recipe:user-version:{user_id}'
+
+
+def get_user_version(user_id):
+    """
+    Return the version of a user's recipe data, bumped on every change
+    """
+    cache = get_cache()
+    key = _user_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_user_version(user_id):
+    """
+    Invalidate everything cached for a user by moving to a new version
+    """
+    get_cache().set(_user_version_key(user_id), time.time_ns(), None)
+
+
+def list_cache_key(request):
+    """
+    Cache key of a list response for the requesting user, its url and
+    query params and the user's current data version
+    """
+    user_id = request.user.pk
+    url_hash = hashlib.sha1(
+        request.build_absolute_uri().encode('utf-8')
+    ).hexdigest()
+    return f'recipe:list:{user_id}:{get_user_version(user_id)}:{url_hash}'
+
+
+class CachedListMixin:
+    """
+    Viewset mixin caching list responses per user
+    """
+
+    def list(self, request, *args, **kwargs):
+        cache = get_cache()
+        key = list_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RECIPE_CACHE_TIMEOUT)
+        return response
+
+
+def response_etag(request, *args, **kwargs):
+    """
+    ETag of a user's response, changing with the url, the negotiated
+    format and the user's data version
+    """
+    key = ':'.join((
+        str(get_user_version(request.user.pk)),
+        request.build_absolute_uri(),
+        request.META.get('HTTP_ACCEPT', ''),
+    ))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+# Only the ETag validates, the versions change many times a second while
+# Last-Modified and If-Modified-Since have a resolution of one second
+conditional_get = method_decorator(condition(etag_func=response_etag))
+
+
+class ConditionalGetMixin:
+    """
+    Viewset mixin answering list and retrieve with 304 Not Modified when
+    the client's ETag is still current
+    """
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
@@ -0,0 +1,40 @@
+import json
+
+from django.db.models import prefetch_related_objects
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.models import Recipe
+from recipe.serializers import RecipeDetailSerializer
+
+
+def _render_chunk(recipes):
+    """
+    Helper function rendering a chunk of recipes as JSON Lines, with the
+    tags and ingrediants of the whole chunk fetched in two queries
+    """
+    prefetch_related_objects(recipes, 'tags', 'ingrediants')
+    return ''.join(
+        json.dumps(
+            RecipeDetailSerializer(recipe).data,
+            cls=JSONEncoder, ensure_ascii=False
+        ) + '\n'
+        for recipe in recipes
+    )
+
+
+def iter_recipe_lines(user, chunk_size=500):
+    """
+    Yield a user's recipes as JSON Lines, one chunk at a time. Recipes are
+    read through a server-side cursor so memory use does not grow with the
+    size of the recipe book
+    """
+    query_set = Recipe.objects.filter(user=user).order_by('id')
+    chunk = []
+    for recipe in query_set.iterator(chunk_size=chunk_size):
+        chunk.append(recipe)
+        if len(chunk) >= chunk_size:
+            yield _render_chunk(chunk)
+            chunk = []
+    if chunk:
+        yield _render_chunk(chunk)
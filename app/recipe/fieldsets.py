@@ -0,0 +1,83 @@
+from django.db.models import Prefetch
+
+from rest_framework.exceptions import ValidationError
+
+from core.models import Tag, Ingrediant
+
+RECIPE_FIELDS = (
+    'id', 'title', 'time_minutes', 'price', 'link',
+    'ingrediants', 'tags', 'image', 'image_srcset',
+)
+RELATED_MODELS = {'ingrediants': Ingrediant, 'tags': Tag}
+FIELD_COLUMNS = {
+    'ingrediants': (),
+    'tags': (),
+    'image_srcset': (
+        'image', 'image_status', 'image_renditions', 'image_queued_at',
+    ),
+}
+
+
+def _parse_names(query_params, param, allowed):
+    """
+    Helper function reading a comma separated list of names from a query
+    param, rejecting names outside allowed
+    """
+    value = query_params.get(param)
+    if value is None:
+        return None
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValidationError({param: [
+            f'Unknown field(s) {", ".join(unknown)}, expected any of '
+            f'{", ".join(allowed)}'
+        ]})
+    return names
+
+
+def parse_fieldset(query_params):
+    """
+    Return the recipe fields requested with ?fields= in serializer order,
+    or None for all of them, and the relations to expand with ?expand=
+    """
+    fields = _parse_names(query_params, 'fields', RECIPE_FIELDS)
+    if fields is not None:
+        fields = tuple(name for name in RECIPE_FIELDS if name in fields)
+    expand = _parse_names(query_params, 'expand', tuple(RELATED_MODELS))
+    return fields, frozenset(expand or ())
+
+
+def recipe_columns(fields=None):
+    """
+    Return the recipe columns needed to serialize the given fields
+    """
+    columns = ['id']
+    for name in fields or RECIPE_FIELDS:
+        for column in FIELD_COLUMNS.get(name, (name,)):
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+
+def recipe_relations(fields=None):
+    """
+    Return the relations among the given fields
+    """
+    return [
+        name for name in fields or RECIPE_FIELDS if name in RELATED_MODELS
+    ]
+
+
+def recipe_prefetches(fields=None, expand=frozenset()):
+    """
+    Return the prefetches serializing the given fields needs, ids only
+    unless the relation is expanded into nested objects
+    """
+    prefetches = []
+    for name in recipe_relations(fields):
+        query_set = RELATED_MODELS[name].objects.order_by('id')
+        if name not in expand:
+            query_set = query_set.only('id')
+        prefetches.append(Prefetch(name, queryset=query_set))
+    return prefetches
@@ -0,0 +1,44 @@
+from django.db.models import Exists, OuterRef
+
+from core.models import Recipe
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+MATCH_MODES = (MATCH_ANY, MATCH_ALL)
+
+
+def _filter_linked(query_set, through, field_name, ids, match):
+    """
+    Helper function to keep recipes linked to the given ids through an M2M
+    table, using EXISTS semi-joins so every recipe is returned only once
+    """
+    links = through.objects.filter(recipe_id=OuterRef('pk'))
+    if match == MATCH_ALL:
+        for related_id in set(ids):
+            query_set = query_set.filter(
+                Exists(links.filter(**{field_name: related_id}))
+            )
+        return query_set
+
+    return query_set.filter(
+        Exists(links.filter(**{f'{field_name}__in': ids}))
+    )
+
+
+def filter_recipes(query_set, tag_ids=None, ingrediant_ids=None,
+                   match=MATCH_ANY):
+    """
+    Filter a recipe queryset by tags and ingrediants. With match 'any' a
+    recipe needs one of the tags and one of the ingrediants, with 'all' it
+    needs every one of them
+    """
+    if tag_ids:
+        query_set = _filter_linked(
+            query_set, Recipe.tags.through, 'tag_id', tag_ids, match
+        )
+    if ingrediant_ids:
+        query_set = _filter_linked(
+            query_set, Recipe.ingrediants.through, 'ingrediant_id',
+            ingrediant_ids, match
+        )
+    return query_set
@@ -0,0 +1,343 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from PIL import Image, ImageOps
+
+from core.models import Recipe
+from recipe.cache import bump_user_version
+
+logger = logging.getLogger(__name__)
+
+RENDITION_FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+MANIFEST_NAME = 'renditions.json'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """
+    Helper function creating the image worker pool on first use, so that
+    forked server workers each start their own threads
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.RECIPE_IMAGE_WORKERS,
+                thread_name_prefix='recipe-image',
+            )
+    return _executor
+
+
+def get_renditions(recipe):
+    """
+    Return the recorded renditions of a recipe image as a mapping of
+    format to {width: file name}
+    """
+    if not recipe.image_renditions:
+        return {}
+    return json.loads(recipe.image_renditions)
+
+
+def _manifest_name(renditions):
+    """
+    Helper function returning the cache manifest stored next to a set of
+    renditions
+    """
+    for widths in renditions.values():
+        for name in widths.values():
+            return os.path.join(os.path.dirname(name), MANIFEST_NAME)
+    return None
+
+
+def delete_renditions(recipe):
+    """
+    Delete the rendition files recorded for a recipe image
+    """
+    storage = Recipe._meta.get_field('image').storage
+    renditions = get_renditions(recipe)
+    manifest = _manifest_name(renditions)
+    for widths in renditions.values():
+        for name in widths.values():
+            storage.delete(name)
+    if manifest is not None:
+        storage.delete(manifest)
+
+
+def _content_hash(image_field):
+    """
+    Helper function hashing the stored bytes of an image
+    """
+    digest = hashlib.sha256()
+    with image_field.open('rb') as image_file:
+        for chunk in image_file.chunks():
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _open_image(image_field):
+    """
+    Helper function decoding an uploaded image upright, without its EXIF
+    """
+    with image_field.open('rb') as image_file:
+        image = Image.open(image_file)
+        image.load()
+    exif_transpose = getattr(ImageOps, 'exif_transpose', None)
+    if exif_transpose is not None:
+        image = exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    return image
+
+
+def strip_original_metadata(recipe):
+    """
+    Replace the original image of a recipe by an upright copy without its
+    EXIF, which may hold where the photo was taken. Returns the name of the
+    stored original, or None when the recipe image changed meanwhile
+    """
+    image_field = recipe.image
+    storage = image_field.storage
+    with image_field.open('rb') as image_file:
+        image = Image.open(image_file)
+        image.load()
+    if 'exif' not in image.info:
+        return image_field.name
+
+    pil_format = image.format
+    exif_transpose = getattr(ImageOps, 'exif_transpose', None)
+    if exif_transpose is not None:
+        image = exif_transpose(image)
+    buffer = BytesIO()
+    image.save(
+        buffer, format=pil_format, quality=95,
+        icc_profile=image.info.get('icc_profile')
+    )
+    old_name = image_field.name
+    new_name = storage.save(
+        old_name, ContentFile(buffer.getvalue()),
+        max_length=Recipe._meta.get_field('image').max_length
+    )
+    if not Recipe.objects.filter(pk=recipe.pk, image=old_name).update(
+            image=new_name):
+        storage.delete(new_name)
+        return None
+    storage.delete(old_name)
+    recipe.image = new_name
+    return new_name
+
+
+def generate_renditions(image_field, rendition_dir):
+    """
+    Write resized WebP and JPEG renditions of an image for each configured
+    width into rendition_dir. Images are never scaled up, so widths past
+    the original collapse into one rendition keyed by its real width.
+    Returns the mapping of format to {width: file name}
+    """
+    storage = image_field.storage
+    image = _open_image(image_field)
+    renditions = {}
+    for width in sorted(set(
+        min(width, image.width)
+        for width in settings.RECIPE_IMAGE_RENDITION_WIDTHS
+    )):
+        resized = image.copy()
+        resized.thumbnail((width, image.height), Image.LANCZOS)
+        for key, (pil_format, extension) in RENDITION_FORMATS.items():
+            output = resized
+            if pil_format == 'JPEG' and output.mode != 'RGB':
+                output = output.convert('RGB')
+            buffer = BytesIO()
+            output.save(
+                buffer, format=pil_format,
+                quality=settings.RECIPE_IMAGE_QUALITY, optimize=True
+            )
+            name = os.path.join(rendition_dir, f'{width}.{extension}')
+            storage.delete(name)
+            renditions.setdefault(key, {})[str(width)] = storage.save(
+                name, ContentFile(buffer.getvalue())
+            )
+    return renditions
+
+
+def build_renditions(image_field):
+    """
+    Return the renditions of an image, generating them only when the disk
+    cache keyed by the image's content hash does not hold them yet
+    """
+    storage = image_field.storage
+    rendition_dir = os.path.join(
+        os.path.splitext(image_field.name)[0], _content_hash(image_field)
+    )
+    manifest = os.path.join(rendition_dir, MANIFEST_NAME)
+    if storage.exists(manifest):
+        with storage.open(manifest, 'rb') as manifest_file:
+            return json.loads(manifest_file.read().decode())
+
+    renditions = generate_renditions(image_field, rendition_dir)
+    storage.delete(manifest)
+    storage.save(manifest, ContentFile(json.dumps(renditions).encode()))
+    return renditions
+
+
+def process_recipe_image(recipe_id):
+    """
+    Strip the metadata of a recipe's current image, then generate and
+    record its renditions
+    """
+    recipe = Recipe.objects.filter(pk=recipe_id).only(
+        'id', 'user_id', 'image'
+    ).first()
+    if recipe is None or not recipe.image:
+        return None
+    image_name = recipe.image.name
+    try:
+        image_name = strip_original_metadata(recipe)
+        if image_name is None:
+            return None
+        renditions = build_renditions(recipe.image)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.exception('Processing the image of recipe %s failed', recipe_id)
+        Recipe.objects.filter(pk=recipe_id, image=image_name).update(
+            image_status=Recipe.IMAGE_FAILED
+        )
+        bump_user_version(recipe.user_id)
+        return None
+
+    Recipe.objects.filter(pk=recipe_id, image=image_name).update(
+        image_status=Recipe.IMAGE_READY,
+        image_renditions=json.dumps(renditions),
+    )
+    bump_user_version(recipe.user_id)
+    return renditions
+
+
+def _claim_stale_image(recipe):
+    """
+    Helper function claiming a pending image whose job was queued longer
+    than the pending timeout ago, and so was lost with its worker. Only one
+    of concurrent requests claims it
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.RECIPE_IMAGE_PENDING_TIMEOUT)
+    if recipe.image_queued_at is not None and recipe.image_queued_at > cutoff:
+        return False
+    claimed = Recipe.objects.filter(
+        Q(image_queued_at__isnull=True) | Q(image_queued_at__lte=cutoff),
+        pk=recipe.pk, image_status=Recipe.IMAGE_PENDING,
+    ).update(image_queued_at=now)
+    if claimed:
+        recipe.image_queued_at = now
+        logger.warning('Requeueing the stale image of recipe %s', recipe.pk)
+    return bool(claimed)
+
+
+def ensure_renditions(recipe):
+    """
+    Return the renditions of a recipe image. Images stored before images
+    were processed have no status and are processed on first access,
+    pending ones are left to the worker pool and have none until then.
+    Pending ones past the pending timeout are queued again
+    """
+    if not recipe.image:
+        return {}
+    renditions = get_renditions(recipe)
+    if renditions:
+        return renditions
+    if recipe.image_status == Recipe.IMAGE_PENDING:
+        if not _claim_stale_image(recipe):
+            return {}
+        renditions = _queue_job(recipe.pk) or {}
+    elif recipe.image_status:
+        return renditions
+    else:
+        renditions = process_recipe_image(recipe.pk) or {}
+    if renditions:
+        recipe.image_status = Recipe.IMAGE_READY
+        recipe.image_renditions = json.dumps(renditions)
+    return renditions
+
+
+def get_image_srcset(recipe, request=None):
+    """
+    Return a srcset string per rendition format for a recipe image, or
+    None when the recipe has no image
+    """
+    if not recipe.image:
+        return None
+    storage = recipe.image.storage
+    srcset = {}
+    for key, widths in ensure_renditions(recipe).items():
+        candidates = []
+        for width, name in sorted(
+            widths.items(), key=lambda item: int(item[0])
+        ):
+            url = storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            candidates.append(f'{url} {width}w')
+        srcset[key] = ', '.join(candidates)
+    return srcset
+
+
+def _run_job(recipe_id):
+    """
+    Helper function running an image job on a worker thread
+    """
+    try:
+        process_recipe_image(recipe_id)
+    except Exception:
+        logger.exception('Image job of recipe %s crashed', recipe_id)
+    finally:
+        connection.close()
+
+
+def _queue_job(recipe_id):
+    """
+    Helper function processing a recipe image on the worker pool once the
+    transaction commits, or inline returning its renditions when no
+    workers are configured
+    """
+    if not settings.RECIPE_IMAGE_WORKERS:
+        return process_recipe_image(recipe_id)
+    transaction.on_commit(lambda: _get_executor().submit(_run_job, recipe_id))
+    return None
+
+
+def schedule_image_processing(recipe):
+    """
+    Mark a freshly uploaded recipe image as pending and process it on the
+    worker pool once the upload is committed. With no workers configured
+    the image is processed inline
+    """
+    delete_renditions(recipe)
+    recipe.image_status = Recipe.IMAGE_PENDING
+    recipe.image_renditions = ''
+    recipe.image_queued_at = timezone.now()
+    Recipe.objects.filter(pk=recipe.pk).update(
+        image_status=recipe.image_status,
+        image_renditions=recipe.image_renditions,
+        image_queued_at=recipe.image_queued_at,
+    )
+
+    _queue_job(recipe.pk)
+    if not settings.RECIPE_IMAGE_WORKERS:
+        recipe.refresh_from_db(
+            fields=['image', 'image_status', 'image_renditions']
+        )
@@ -0,0 +1,92 @@
+import time
+
+from django.db import connection
+
+from core.models import Tag, Ingrediant, Recipe
+from core.db.bulk import bulk_insert
+from recipe.bulk import get_or_create_named
+from recipe.search import update_search_vectors
+from recipe.serializers import RecipeImportSerializer
+from recipe.signals import bulk_changes
+
+
+def validate_rows(rows):
+    """
+    Validate recipe rows in one pass. Returns the validated rows and a list
+    of errors with the 1-based number of each invalid row
+    """
+    serializer = RecipeImportSerializer(data=rows, many=True)
+    if serializer.is_valid():
+        return serializer.validated_data, []
+
+    if not isinstance(serializer.errors, list):
+        return [], [{'row': None, 'errors': serializer.errors}]
+    return [], [
+        {'row': number, 'errors': errors}
+        for number, errors in enumerate(serializer.errors, 1)
+        if errors
+    ]
+
+
+def _link(through, field_name, recipes, rows, key, name_ids, batch_size):
+    """
+    Helper function to insert the M2M rows of the imported recipes
+    """
+    links = [
+        through(**{'recipe_id': recipe.pk, field_name: name_ids[name]})
+        for recipe, row in zip(recipes, rows)
+        for name in dict.fromkeys(row[key])
+    ]
+    bulk_insert(through, links, batch_size)
+
+
+def import_recipes(user, rows, batch_size=1000):
+    """
+    Create validated recipe rows for a user with bulk inserts, creating the
+    tags and ingrediants they name. Returns the import statistics
+    """
+    start = time.perf_counter()
+    tag_ids, tags_created = get_or_create_named(
+        Tag, user, [name for row in rows for name in row['tags']]
+    )
+    ingrediant_ids, ingrediants_created = get_or_create_named(
+        Ingrediant, user,
+        [name for row in rows for name in row['ingrediants']]
+    )
+
+    recipes = [
+        Recipe(
+            user=user,
+            title=row['title'],
+            time_minutes=row['time_minutes'],
+            price=row['price'],
+            link=row.get('link', ''),
+        )
+        for row in rows
+    ]
+    if connection.features.can_return_rows_from_bulk_insert:
+        bulk_insert(Recipe, recipes, batch_size)
+    else:
+        # The search vectors are updated once per batch below
+        with bulk_changes():
+            for recipe in recipes:
+                recipe.save()
+
+    _link(Recipe.tags.through, 'tag_id', recipes, rows, 'tags',
+          tag_ids, batch_size)
+    _link(Recipe.ingrediants.through, 'ingrediant_id', recipes, rows,
+          'ingrediants', ingrediant_ids, batch_size)
+    for offset in range(0, len(recipes), batch_size):
+        update_search_vectors(
+            recipe.pk for recipe in recipes[offset:offset + batch_size]
+        )
+
+    seconds = time.perf_counter() - start
+    return {
+        'created': len(recipes),
+        'tags_created': len(tags_created),
+        'ingrediants_created': len(ingrediants_created),
+        'seconds': round(seconds, 3),
+        'recipes_per_second': round(len(recipes) / seconds, 1)
+        if seconds else None,
+    }
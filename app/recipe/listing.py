@@ -0,0 +1,168 @@
+from collections import defaultdict
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields import ArrayField
+from django.db import connection
+from django.db.models import IntegerField, OuterRef, Subquery
+
+from rest_framework import serializers
+
+from core.metrics import TimedSerializerMixin
+from core.models import Recipe
+from recipe.fieldsets import (
+    RECIPE_FIELDS, recipe_columns, recipe_relations
+)
+from recipe.images import get_image_srcset
+from recipe.serializers import RecipeSerializer
+
+RELATED = (
+    ('ingrediants', 'ingrediant_ids', Recipe.ingrediants.through,
+     'ingrediant'),
+    ('tags', 'tag_ids', Recipe.tags.through, 'tag'),
+)
+
+
+def is_array_agg_supported():
+    """
+    Whether the database can aggregate the related ids into arrays
+    """
+    return connection.vendor == 'postgresql'
+
+
+def _related_ids_subquery(through, column):
+    """
+    Helper function aggregating a recipe's related ids in id order
+    """
+    return Subquery(
+        through.objects.filter(recipe_id=OuterRef('pk'))
+        .values('recipe_id')
+        .annotate(ids=ArrayAgg(column, ordering=column))
+        .values('ids'),
+        output_field=ArrayField(IntegerField())
+    )
+
+
+def recipe_rows(query_set, fields=None, expand=frozenset()):
+    """
+    Return a values() queryset of the columns a recipe list serializes
+    for the given fields, with the related ids aggregated in the same
+    query on Postgres
+    """
+    columns = recipe_columns(fields)
+    if 'search_rank' in query_set.query.annotations:
+        columns.append('search_rank')
+    relations = recipe_relations(fields)
+    if is_array_agg_supported():
+        aggregated = {
+            ids_field: _related_ids_subquery(through, f'{relation}_id')
+            for name, ids_field, through, relation in RELATED
+            if name in relations and name not in expand
+        }
+        query_set = query_set.annotate(**aggregated)
+        columns.extend(aggregated)
+    return query_set.values(*columns)
+
+
+def _attach_related(rows, fields, expand):
+    """
+    Helper function loading the related ids, or id and name pairs of
+    expanded relations, from the through tables, one query per relation
+    """
+    recipe_ids = [row['id'] for row in rows]
+    relations = recipe_relations(fields)
+    for name, ids_field, through, relation in RELATED:
+        if name not in relations or (
+                name not in expand and ids_field in rows[0]):
+            continue
+        related = defaultdict(list)
+        links = through.objects.filter(recipe_id__in=recipe_ids).order_by(
+            'recipe_id', f'{relation}_id'
+        )
+        if name in expand:
+            links = links.values_list(
+                'recipe_id', f'{relation}_id', f'{relation}__name'
+            )
+            for recipe_id, related_id, related_name in links:
+                related[recipe_id].append(
+                    {'id': related_id, 'name': related_name}
+                )
+        else:
+            for recipe_id, related_id in links.values_list(
+                    'recipe_id', f'{relation}_id'):
+                related[recipe_id].append(related_id)
+        for row in rows:
+            row[ids_field] = related[row['id']]
+
+
+def _image_url(row, storage, request):
+    """
+    Helper function returning the url of a row's image like ImageField
+    """
+    if not row['image']:
+        return None
+    url = storage.url(row['image'])
+    if request is not None:
+        url = request.build_absolute_uri(url)
+    return url
+
+
+def _image_srcset(row, request):
+    """
+    Helper function returning the srcset of a row's image
+    """
+    if not row['image']:
+        return None
+    return get_image_srcset(Recipe(
+        id=row['id'], image=row['image'],
+        image_status=row['image_status'],
+        image_renditions=row['image_renditions'],
+        image_queued_at=row['image_queued_at'],
+    ), request)
+
+
+def serialize_recipe_rows(rows, request=None, fields=None,
+                          expand=frozenset()):
+    """
+    Turn recipe_rows() into the same data RecipeSerializer produces for
+    the list, without building model instances or serializer fields
+    """
+    rows = list(rows)
+    if rows:
+        _attach_related(rows, fields, expand)
+
+    price_field = RecipeSerializer().fields['price']
+    storage = Recipe._meta.get_field('image').storage
+    builders = {
+        'id': lambda row: row['id'],
+        'title': lambda row: row['title'],
+        'time_minutes': lambda row: row['time_minutes'],
+        'price': lambda row: price_field.to_representation(row['price']),
+        'link': lambda row: row['link'],
+        'ingrediants': lambda row: row['ingrediant_ids'] or [],
+        'tags': lambda row: row['tag_ids'] or [],
+        'image': lambda row: _image_url(row, storage, request),
+        'image_srcset': lambda row: _image_srcset(row, request),
+    }
+    row_builders = [
+        (name, builders[name]) for name in fields or RECIPE_FIELDS
+    ]
+    return [
+        {name: build(row) for name, build in row_builders} for row in rows
+    ]
+
+
+class RecipeRowSerializer(TimedSerializerMixin, serializers.BaseSerializer):
+    """
+    Read only serializer turning a page of recipe_rows() into the list
+    data of RecipeSerializer in one pass
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        return cls(*args, **kwargs)
+
+    def to_representation(self, instance):
+        return serialize_recipe_rows(
+            instance, self.context.get('request'),
+            self.context.get('fields'), self.context.get('expand', ())
+        )
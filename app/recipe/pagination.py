@@ -0,0 +1,25 @@
+from rest_framework.pagination import CursorPagination
+
+
+class RecipeCursorPagination(CursorPagination):
+    """
+    Keyset pagination for recipes, newest first
+    """
+    ordering = '-id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def get_ordering(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations:
+            return ('-search_rank', '-id')
+        return super().get_ordering(request, queryset, view)
+
+
+class RecipeAttrCursorPagination(RecipeCursorPagination):
+    """
+    Keyset pagination for user owned recipe attributes, by name with the
+    id breaking ties, so duplicate names are neither skipped nor repeated
+    across pages
+    """
+    ordering = ('-name', '-id')
@@ -0,0 +1,163 @@
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, TrigramSimilarity
+)
+from django.db import connection, transaction
+from django.db.models import (
+    F, Q, Case, When, Value, FloatField, IntegerField
+)
+from django.db.models.functions import Cast
+
+from core.models import Recipe
+
+# Recipes per search vector UPDATE of a committed transaction
+UPDATE_BATCH_SIZE = 1000
+
+POSTGRES_UPDATE_SQL = """
+UPDATE core_recipe SET search_vector =
+    setweight(to_tsvector(%(config)s, core_recipe.title), 'A') ||
+    setweight(to_tsvector(%(config)s, coalesce((
+        SELECT string_agg(core_tag.name, ' ')
+        FROM core_tag
+        INNER JOIN core_recipe_tags
+            ON core_recipe_tags.tag_id = core_tag.id
+        WHERE core_recipe_tags.recipe_id = core_recipe.id
+    ), '')), 'B') ||
+    setweight(to_tsvector(%(config)s, coalesce((
+        SELECT string_agg(core_ingrediant.name, ' ')
+        FROM core_ingrediant
+        INNER JOIN core_recipe_ingrediants
+            ON core_recipe_ingrediants.ingrediant_id = core_ingrediant.id
+        WHERE core_recipe_ingrediants.recipe_id = core_recipe.id
+    ), '')), 'B')
+WHERE core_recipe.id = ANY(%(ids)s)
+"""
+
+
+def is_full_text_supported():
+    """
+    Whether the database has native full-text search
+    """
+    return connection.vendor == 'postgresql'
+
+
+def _search_document(recipe):
+    """
+    Helper function building the plain text document searched when the
+    database has no full-text search
+    """
+    words = [recipe.title]
+    words.extend(tag.name for tag in recipe.tags.all())
+    words.extend(ing.name for ing in recipe.ingrediants.all())
+    return ' '.join(words).lower()
+
+
+def update_search_vectors(recipe_ids):
+    """
+    Recompute the stored search vector of the given recipes from their
+    title, tag names and ingrediant names
+    """
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    if is_full_text_supported():
+        with connection.cursor() as cursor:
+            cursor.execute(POSTGRES_UPDATE_SQL, {
+                'config': settings.RECIPE_SEARCH_CONFIG,
+                'ids': recipe_ids,
+            })
+        return
+
+    recipes = Recipe.objects.filter(id__in=recipe_ids).only(
+        'id', 'title'
+    ).prefetch_related('tags', 'ingrediants')
+    for recipe in recipes:
+        recipe.search_vector = _search_document(recipe)
+    Recipe.objects.bulk_update(recipes, ['search_vector'], batch_size=500)
+
+
+class _PendingSearchUpdate:
+    """
+    On commit callback updating the search vectors of the recipes changed
+    in a transaction, once per recipe
+    """
+
+    def __init__(self):
+        self.recipe_ids = set()
+
+    def __call__(self):
+        recipe_ids = sorted(self.recipe_ids)
+        for offset in range(0, len(recipe_ids), UPDATE_BATCH_SIZE):
+            update_search_vectors(
+                recipe_ids[offset:offset + UPDATE_BATCH_SIZE]
+            )
+
+
+def queue_search_update(recipe_ids, using=None):
+    """
+    Update the search vectors of the given recipes when the current
+    transaction commits, merging the recipes changed by every save, link
+    and rename of the transaction into one update. Outside a transaction
+    they are updated at once
+    """
+    conn = transaction.get_connection(using)
+    if not conn.in_atomic_block:
+        update_search_vectors(recipe_ids)
+        return
+
+    # Callbacks registered in the current savepoint are discarded with it,
+    # so only those are safe to add the recipes to. Blocks opened without
+    # a savepoint have a None id
+    savepoint_ids = set(conn.savepoint_ids) - {None}
+    for sids, func in conn.run_on_commit:
+        if isinstance(func, _PendingSearchUpdate) and \
+                sids - {None} == savepoint_ids:
+            func.recipe_ids.update(recipe_ids)
+            return
+    pending = _PendingSearchUpdate()
+    pending.recipe_ids.update(recipe_ids)
+    transaction.on_commit(pending, using)
+
+
+def search_recipes(query_set, text):
+    """
+    Filter recipes matching the search text. On Postgres the matches are
+    annotated with a search_rank to order them by relevance
+    """
+    if is_full_text_supported():
+        query = SearchQuery(text, config=settings.RECIPE_SEARCH_CONFIG)
+        return query_set.filter(search_vector=query).annotate(
+            search_rank=Cast(
+                SearchRank(F('search_vector'), query), FloatField()
+            )
+        )
+
+    for term in text.lower().split():
+        query_set = query_set.filter(search_vector__contains=term)
+    return query_set
+
+
+def autocomplete_names(query_set, text, limit):
+    """
+    Return the top matches of a tag/ingrediant queryset for the typed
+    text, names starting with it first. On Postgres misspelled names are
+    matched too through the pg_trgm similarity operator, and containment
+    is matched with ILIKE on the bare name, so the trigram index serves
+    both kinds of match
+    """
+    is_prefix = Case(
+        When(name__istartswith=text, then=Value(1)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    if is_full_text_supported():
+        return query_set.filter(
+            Q(name__ilike_contains=text) | Q(name__trigram_similar=text)
+        ).annotate(
+            is_prefix=is_prefix,
+            similarity=TrigramSimilarity('name', text),
+        ).order_by('-is_prefix', '-similarity', 'name')[:limit]
+
+    return query_set.filter(name__icontains=text).annotate(
+        is_prefix=is_prefix
+    ).order_by('-is_prefix', 'name')[:limit]
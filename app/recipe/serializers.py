@@ -1,9 +1,16 @@
+import os
+
+from django.conf import settings
+from django.core.validators import get_available_image_extensions
+from django.utils.text import get_valid_filename
 from rest_framework import serializers
 
-from core.models import Tag, Ingrediant, Recipe
+from core.metrics import TimedSerializerMixin
+from core.models import Tag, Ingrediant, Recipe, RecipeImageUpload
+from recipe.images import get_image_srcset
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     serializer class for tags
     """
@@ -13,7 +20,7 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class IngrediantSerializer(serializers.ModelSerializer):
+class IngrediantSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     serilaizer cla for Ingrediants
     """
@@ -24,22 +31,71 @@ class IngrediantSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeAttrBulkUpdateSerializer(serializers.Serializer):
+    """
+    Serializer for one item of a bulk tag/ingrediant rename
+    """
+    id = serializers.IntegerField()
+    name = serializers.CharField(max_length=255)
+
+
+class BulkDeleteSerializer(serializers.Serializer):
+    """
+    Serializer for the ids of a bulk delete
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False
+    )
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin narrowing the output to context['fields'] and
+    nesting the relations named in context['expand']
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in self.context.get('expand', ()):
+            if name in self.expandable_fields:
+                self.fields[name] = self.expandable_fields[name](
+                    many=True, read_only=True
+                )
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class RecipeSerializer(TimedSerializerMixin, SparseFieldsetMixin,
+                       serializers.ModelSerializer):
     """
     Serializer class for managign recipe models
     """
+    expandable_fields = {
+        'ingrediants': IngrediantSerializer,
+        'tags': TagSerializer,
+    }
     ingrediants = serializers.PrimaryKeyRelatedField(
         many=True, queryset=Ingrediant.objects.all())
     tags = serializers.PrimaryKeyRelatedField(
         many=True, queryset=Tag.objects.all())
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = (
             'id', 'title', 'time_minutes', 'price',
-            'link', 'ingrediants', 'tags'
+            'link', 'ingrediants', 'tags', 'image', 'image_srcset'
             )
-        read_only_fields = ('id',)
+        read_only_fields = ('id', 'image')
+
+    def get_image_srcset(self, recipe):
+        """
+        Return the image renditions as a srcset string per format
+        """
+        return get_image_srcset(recipe, self.context.get('request'))
 
 
 class RecipeDetailSerializer(RecipeSerializer):
@@ -50,11 +106,76 @@ class RecipeDetailSerializer(RecipeSerializer):
     tags = TagSerializer(many=True, read_only=True)
 
 
-class RecipeImageSerializer(serializers.ModelSerializer):
+class RecipeImportSerializer(serializers.ModelSerializer):
+    """
+    Serializer for one recipe of a batch import, naming its tags and
+    ingrediants instead of referencing their ids
+    """
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=255), default=list
+    )
+    ingrediants = serializers.ListField(
+        child=serializers.CharField(max_length=255), default=list
+    )
+
+    class Meta:
+        model = Recipe
+        fields = (
+            'title', 'time_minutes', 'price', 'link', 'ingrediants', 'tags'
+        )
+
+
+class RecipeImageSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer class for recipe image field
     """
     class Meta:
         model = Recipe
-        fields = ('id', 'image')
-        read_only_fields = ('id',)
+        fields = ('id', 'image', 'image_status')
+        read_only_fields = ('id', 'image_status')
+
+
+class RecipeImageUploadSerializer(TimedSerializerMixin,
+                                  serializers.ModelSerializer):
+    """
+    Serializer class for starting a resumable recipe image upload
+    """
+    checksum = serializers.RegexField(
+        r'^[0-9a-fA-F]{64}$',
+        error_messages={'invalid': 'Provide the sha256 hex digest.'}
+    )
+
+    class Meta:
+        model = RecipeImageUpload
+        fields = ('id', 'file_name', 'size', 'checksum', 'offset', 'created')
+        read_only_fields = ('id', 'offset', 'created')
+
+    def validate_size(self, value):
+        """
+        Check the declared size is within the upload limit
+        """
+        if not 0 < value <= settings.RECIPE_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Size must be between 1 and '
+                f'{settings.RECIPE_UPLOAD_MAX_SIZE} bytes.'
+            )
+        return value
+
+    def validate_file_name(self, value):
+        """
+        Reduce the client's file name to a safe base name with an image
+        extension, it names the stored image
+        """
+        file_name = get_valid_filename(os.path.basename(value))
+        extension = os.path.splitext(file_name)[1][1:].lower()
+        if extension not in get_available_image_extensions():
+            raise serializers.ValidationError(
+                'Provide the name of an image file, e.g. photo.jpg.'
+            )
+        return file_name
+
+    def validate_checksum(self, value):
+        """
+        Store the digest in lower case, as the received bytes are hashed
+        """
+        return value.lower()
@@ -0,0 +1,159 @@
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    post_init, post_save, pre_delete, post_delete, m2m_changed
+)
+from django.dispatch import receiver
+
+from core.models import Tag, Ingrediant, Recipe
+from recipe.cache import bump_user_version
+from recipe.search import queue_search_update
+
+# The field of each model the recipe search vectors are computed from
+SEARCHED_FIELDS = {Recipe: 'title', Tag: 'name', Ingrediant: 'name'}
+
+_bulk = threading.local()
+
+
+@contextmanager
+def bulk_changes():
+    """
+    Skip the per object cache and search vector work of the receivers in
+    the block, for bulk changes doing that work once for all the objects
+    """
+    _bulk.active = True
+    try:
+        yield
+    finally:
+        _bulk.active = False
+
+
+def _in_bulk_changes():
+    return getattr(_bulk, 'active', False)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingrediant)
+@receiver(post_delete, sender=Ingrediant)
+def invalidate_user_recipe_data(sender, instance, **kwargs):
+    """
+    Invalidate the cached responses of the owner of a changed object
+    """
+    if not _in_bulk_changes():
+        bump_user_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingrediants.through)
+def invalidate_recipe_links(sender, instance, action, **kwargs):
+    """
+    Invalidate the cached responses when recipe tags/ingrediants change
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_user_version(instance.user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user(sender, instance, **kwargs):
+    """
+    Start a fresh cache version whenever a user is saved
+    """
+    bump_user_version(instance.pk)
+
+
+@receiver(post_init, sender=Recipe)
+@receiver(post_init, sender=Tag)
+@receiver(post_init, sender=Ingrediant)
+def remember_searched_value(sender, instance, **kwargs):
+    """
+    Remember the loaded value of the searched field, to tell on save
+    whether the search vectors need updating. A deferred field is left
+    unloaded
+    """
+    instance._searched_value = instance.__dict__.get(SEARCHED_FIELDS[sender])
+
+
+def _searched_value_changed(instance, update_fields):
+    """
+    Helper function telling whether a save changed the searched field of
+    an instance, remembering the saved value
+    """
+    field = SEARCHED_FIELDS[type(instance)]
+    if update_fields is not None and field not in update_fields:
+        return False
+    value = instance.__dict__.get(field)
+    changed = value != instance._searched_value
+    instance._searched_value = value
+    return changed
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_vector(sender, instance, created, update_fields,
+                                **kwargs):
+    """
+    Keep the search vector in sync with the recipe title, saves leaving
+    the title alone skip the extra UPDATE. Bulk changes update the
+    vectors of their recipes themselves
+    """
+    if _in_bulk_changes():
+        return
+    if _searched_value_changed(instance, update_fields) or created:
+        queue_search_update([instance.pk])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingrediants.through)
+def update_linked_search_vectors(sender, instance, action, reverse, pk_set,
+                                 **kwargs):
+    """
+    Keep the search vectors in sync when recipe tags/ingrediants change
+    """
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            queue_search_update([instance.pk])
+    elif action == 'pre_clear':
+        instance._search_recipe_ids = list(
+            instance.recipe_set.values_list('id', flat=True)
+        )
+    elif action in ('post_add', 'post_remove'):
+        queue_search_update(pk_set)
+    elif action == 'post_clear':
+        queue_search_update(instance._search_recipe_ids)
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingrediant)
+def remember_linked_recipes(sender, instance, **kwargs):
+    """
+    Remember the recipes of a tag/ingrediant before its links are deleted
+    """
+    if _in_bulk_changes():
+        return
+    instance._search_recipe_ids = list(
+        instance.recipe_set.values_list('id', flat=True)
+    )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingrediant)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingrediant)
+def update_named_search_vectors(sender, instance, created=False,
+                                update_fields=None, signal=None, **kwargs):
+    """
+    Keep the search vectors in sync with tag/ingrediant names
+    """
+    if created or _in_bulk_changes():
+        return
+    if signal is post_save and not _searched_value_changed(
+            instance, update_fields):
+        return
+    recipe_ids = getattr(instance, '_search_recipe_ids', None)
+    if recipe_ids is None:
+        recipe_ids = instance.recipe_set.values_list('id', flat=True)
+    queue_search_update(recipe_ids)
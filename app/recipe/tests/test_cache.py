@@ -0,0 +1,228 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingrediant
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIANTS_URL = reverse('recipe:ingrediant-list')
+
+
+def detail_url(recipe_id):
+    """
+    Detail url for a recipe
+    """
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_recipe(user, **params):
+    """
+    Create a sample recipe for cache tests
+    """
+    defaults = {
+        'title': 'Sample Recipe',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ListCacheTests(TestCase):
+    """
+    Test the per user caching of list responses
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@mail.com',
+            name='Test User',
+            password='Open@123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_list_is_served_from_cache(self):
+        """
+        Test a repeated list request runs no queries
+        """
+        sample_recipe(user=self.user)
+        res_1 = self.client.get(RECIPE_URL)
+
+        with self.assertNumQueries(0):
+            res_2 = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res_1.data, res_2.data)
+
+    def test_query_params_are_cached_separately(self):
+        """
+        Test list responses with other query params are not shared
+        """
+        sample_recipe(user=self.user)
+        self.client.get(RECIPE_URL)
+
+        res = self.client.get(RECIPE_URL, {'tags': '0'})
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_recipe_save_and_delete_invalidate_list(self):
+        """
+        Test creating and deleting recipes invalidates the cached list
+        """
+        self.client.get(RECIPE_URL)
+        recipe = sample_recipe(user=self.user)
+
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(len(res.data['results']), 1)
+
+        recipe.delete()
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(len(res.data['results']), 0)
+
+    def test_recipe_links_invalidate_list(self):
+        """
+        Test adding and clearing recipe tags invalidates the cached list
+        """
+        recipe = sample_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(RECIPE_URL)
+
+        recipe.tags.add(tag)
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.data['results'][0]['tags'], [tag.id])
+
+        tag.recipe_set.clear()
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.data['results'][0]['tags'], [])
+
+    def test_attribute_changes_invalidate_list(self):
+        """
+        Test renaming tags and ingrediants invalidates their cached lists
+        """
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        ingrediant = Ingrediant.objects.create(user=self.user, name='Salt')
+        self.client.get(TAGS_URL)
+        self.client.get(INGREDIANTS_URL)
+
+        tag.name = 'Vegetarian'
+        tag.save()
+        ingrediant.name = 'Pepper'
+        ingrediant.save()
+
+        res = self.client.get(TAGS_URL)
+        self.assertEqual(res.data['results'][0]['name'], 'Vegetarian')
+        res = self.client.get(INGREDIANTS_URL)
+        self.assertEqual(res.data['results'][0]['name'], 'Pepper')
+
+    def test_cache_is_per_user(self):
+        """
+        Test a user never receives another user's cached list
+        """
+        sample_recipe(user=self.user)
+        self.client.get(RECIPE_URL)
+        user2 = get_user_model().objects.create_user(
+            email='other@mail.com',
+            password='Open@123'
+        )
+        self.client.force_authenticate(user2)
+
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+
+class ConditionalGetTests(TestCase):
+    """
+    Test ETag handling of the recipe endpoints
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@mail.com',
+            name='Test User',
+            password='Open@123'
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.recipe = sample_recipe(user=self.user)
+
+    def test_list_returns_validators(self):
+        """
+        Test list responses carry an ETag and no Last-Modified, which is
+        too coarse to validate against
+        """
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.has_header('ETag'))
+        self.assertFalse(res.has_header('Last-Modified'))
+
+    def test_matching_etag_returns_not_modified(self):
+        """
+        Test a matching If-None-Match gets a 304 without a query once the
+        token is cached
+        """
+        for url in (RECIPE_URL, detail_url(self.recipe.id), TAGS_URL,
+                    INGREDIANTS_URL):
+            etag = self.client.get(url)['ETag']
+
+            with self.assertNumQueries(0):
+                res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(res.content, b'')
+
+    def test_if_modified_since_after_write_in_same_second(self):
+        """
+        Test If-Modified-Since never gets a stale 304 after a write in the
+        same second as the response it was taken from
+        """
+        modified_since = http_date(time.time())
+        self.client.get(RECIPE_URL)
+        sample_recipe(user=self.user, title='Second Recipe')
+
+        res = self.client.get(
+            RECIPE_URL, HTTP_IF_MODIFIED_SINCE=modified_since
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_changes_invalidate_etag(self):
+        """
+        Test the ETag no longer matches after the recipe changes
+        """
+        url = detail_url(self.recipe.id)
+        etag = self.client.get(url)['ETag']
+        self.recipe.title = 'Updated Recipe'
+        self.recipe.save()
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'Updated Recipe')
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_etag_is_per_user(self):
+        """
+        Test another user's ETag does not produce a 304
+        """
+        etag = self.client.get(RECIPE_URL)['ETag']
+        user2 = get_user_model().objects.create_user(
+            email='other@mail.com',
+            password='Open@123'
+        )
+        self.client.force_authenticate(user2)
+
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
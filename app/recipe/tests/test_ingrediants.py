@@ -1,4 +1,7 @@
+from unittest import skipUnless
+
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
 from django.urls import reverse
 
@@ -9,6 +12,7 @@ from core.models import Ingrediant, Recipe
 from recipe.serializers import IngrediantSerializer
 
 INGREDIANTS_URL = reverse('recipe:ingrediant-list')
+INGREDIANTS_BULK_URL = reverse('recipe:ingrediant-bulk')
 
 
 class PublicIngrediantsAPITests(TestCase):
@@ -59,7 +63,7 @@ class PrivateIngrediantsAPITests(TestCase):
         res = self.client.get(INGREDIANTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, data)
+        self.assertEqual(res.data['results'], data)
 
     def test_list_users_ingrediants(self):
         """
@@ -81,8 +85,8 @@ class PrivateIngrediantsAPITests(TestCase):
         res = self.client.get(INGREDIANTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ingrediant.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ingrediant.name)
 
     def test_create_valid_ingrediant(self):
         """
@@ -124,9 +128,9 @@ class PrivateIngrediantsAPITests(TestCase):
         res = self.client.get(INGREDIANTS_URL, {'assigned_only': 1})
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertIn(serializer_1.data, res.data)
-        self.assertNotIn(serializer_2.data, res.data)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertIn(serializer_1.data, res.data['results'])
+        self.assertNotIn(serializer_2.data, res.data['results'])
 
     def test_list_ingrediants_assigned_unique(self):
         """
@@ -154,5 +158,75 @@ class PrivateIngrediantsAPITests(TestCase):
         res = self.client.get(INGREDIANTS_URL, {'assigned_only': 1})
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(serializer_1.data, res.data)
-        self.assertEqual(len(res.data), 1)
+        self.assertIn(serializer_1.data, res.data['results'])
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_bulk_create_ingrediants(self):
+        """
+        Test ingrediants are created in bulk in a single request
+        """
+        Ingrediant.objects.create(user=self.user, name='Salt')
+        payload = [{'name': 'Salt'}, {'name': 'Pepper'}]
+
+        res = self.client.post(INGREDIANTS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [item['status'] for item in res.data], ['exists', 'created']
+        )
+        self.assertEqual(
+            Ingrediant.objects.filter(user=self.user).count(), 2
+        )
+
+    def test_autocomplete_ingrediants(self):
+        """
+        Test names starting with the typed text are listed first
+        """
+        for name in ('Tomato', 'Sun Dried Tomato', 'Tomatillo', 'Potato'):
+            Ingrediant.objects.create(user=self.user, name=name)
+        user2 = get_user_model().objects.create_user(
+            'other@mail.com', 'Open@123'
+        )
+        Ingrediant.objects.create(user=user2, name='Tomato Paste')
+
+        res = self.client.get(INGREDIANTS_URL, {'q': 'toma'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [item['name'] for item in res.data]
+        self.assertEqual(set(names[:2]), {'Tomatillo', 'Tomato'})
+        self.assertIn('Sun Dried Tomato', names)
+        self.assertNotIn('Tomato Paste', names)
+
+    def test_autocomplete_ingrediants_limit(self):
+        """
+        Test autocomplete returns at most the requested number of matches
+        """
+        for i in range(5):
+            Ingrediant.objects.create(user=self.user, name=f'Salt {i}')
+
+        res = self.client.get(INGREDIANTS_URL, {'q': 'salt', 'limit': 3})
+
+        self.assertEqual(
+            [item['name'] for item in res.data],
+            ['Salt 0', 'Salt 1', 'Salt 2']
+        )
+
+    def test_autocomplete_ingrediants_invalid_limit(self):
+        """
+        Test a non numeric limit is rejected
+        """
+        res = self.client.get(INGREDIANTS_URL, {'q': 'salt', 'limit': 'x'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Trigrams need Postgres')
+    def test_autocomplete_ingrediants_misspelled(self):
+        """
+        Test misspelled names are matched by trigram similarity
+        """
+        Ingrediant.objects.create(user=self.user, name='Cinnamon')
+        Ingrediant.objects.create(user=self.user, name='Cardamom')
+
+        res = self.client.get(INGREDIANTS_URL, {'q': 'cinamon'})
+
+        self.assertEqual([item['name'] for item in res.data], ['Cinnamon'])
@@ -1,21 +1,37 @@
+import json
 import os
 import tempfile
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
 
 from PIL import Image
 
+from unittest import skipUnless
 from unittest.mock import patch
 from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.db import connection
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import Recipe, Tag, Ingrediant
 from core import models
+from recipe.cache import get_cache
+from recipe.images import (
+    build_renditions, delete_renditions, get_renditions,
+    process_recipe_image,
+    _run_job as _run_image_job
+)
+from recipe.search import update_search_vectors
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
 RECIPE_URL = reverse('recipe:recipe-list')
+RECIPE_IMPORT_URL = reverse('recipe:recipe-import')
+RECIPE_EXPORT_URL = reverse('recipe:recipe-export')
 
 
 def recipe_image_uplaod_url(recipe_id):
@@ -61,6 +77,32 @@ def sample_ingrediant(user, name='Cinnamon'):
     return Ingrediant.objects.create(user=user, name=name)
 
 
+class FastListMixin:
+    """
+    Mixin comparing the recipe list served with and without the fast path
+    """
+
+    def _get_both(self, params=None):
+        """
+        Helper function fetching the list with and without the fast path
+        """
+        with self.settings(RECIPE_FAST_LIST=True):
+            fast = self.client.get(RECIPE_URL, params)
+        get_cache().clear()
+        with self.settings(RECIPE_FAST_LIST=False):
+            slow = self.client.get(RECIPE_URL, params)
+        return fast, slow
+
+    def _get_matching(self, params=None):
+        """
+        Helper function fetching the list with and without the fast path,
+        checking both are identical
+        """
+        fast, slow = self._get_both(params)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+
 class PublicRecipeAPITests(TestCase):
     """"
     Testing for unauthorized acces for  Recipe API Components
@@ -105,7 +147,7 @@ class PrivateRecipeAPITests(TestCase):
         res = self.client.get(RECIPE_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_list_user_recipes_only(self):
         """
@@ -125,8 +167,31 @@ class PrivateRecipeAPITests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 2)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_list_recipes_paginated_by_cursor(self):
+        """
+        Test recipes are listed newest first in pages of the cursor
+        """
+        recipes = [
+            sample_recipe(user=self.user, title=f'Recipe {i}')
+            for i in range(5)
+        ]
+
+        res = self.client.get(RECIPE_URL, {'page_size': 3})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']],
+            [recipe.id for recipe in recipes[:1:-1]]
+        )
+
+        res = self.client.get(res.data['next'])
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']],
+            [recipe.id for recipe in recipes[1::-1]]
+        )
+        self.assertIsNone(res.data['next'])
 
     def test_recipe_detail(self):
         """
@@ -257,6 +322,84 @@ class PrivateRecipeAPITests(TestCase):
         self.assertEqual(payload['link'], recipe.link)
         self.assertEqual(len(tags), 0)
 
+    def test_filter_tags_and_ingrediants_without_duplicates(self):
+        """
+        Test a recipe matching several tags and ingrediants is listed once
+        """
+        recipe = sample_recipe(user=self.user)
+        tags = [sample_tag(user=self.user, name=f'Tag {i}') for i in range(3)]
+        ingrediants = [
+            sample_ingrediant(user=self.user, name=f'Ingrediant {i}')
+            for i in range(3)
+        ]
+        recipe.tags.add(*tags)
+        recipe.ingrediants.add(*ingrediants)
+
+        res = self.client.get(RECIPE_URL, {
+            'tags': ','.join(str(tag.id) for tag in tags),
+            'ingrediants': ','.join(str(ing.id) for ing in ingrediants),
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in res.data['results']], [recipe.id]
+        )
+
+    def test_filter_tags_match_all(self):
+        """
+        Test match=all only lists recipes having every requested tag
+        """
+        tag_1 = sample_tag(user=self.user, name='Vegan')
+        tag_2 = sample_tag(user=self.user, name='Dessert')
+        recipe_1 = sample_recipe(user=self.user, title='Fruit Salad')
+        recipe_1.tags.add(tag_1, tag_2)
+        recipe_2 = sample_recipe(user=self.user, title='Lentil Soup')
+        recipe_2.tags.add(tag_1)
+
+        tag_ids = f'{tag_1.id},{tag_2.id}'
+        res_all = self.client.get(
+            RECIPE_URL, {'tags': tag_ids, 'match': 'all'}
+        )
+        res_any = self.client.get(
+            RECIPE_URL, {'tags': tag_ids, 'match': 'any'}
+        )
+
+        self.assertEqual(
+            [item['id'] for item in res_all.data['results']], [recipe_1.id]
+        )
+        self.assertEqual(
+            [item['id'] for item in res_any.data['results']],
+            [recipe_2.id, recipe_1.id]
+        )
+
+    def test_filter_ingrediants_match_all(self):
+        """
+        Test match=all only lists recipes having every requested ingrediant
+        """
+        ingrediant_1 = sample_ingrediant(user=self.user, name='Rice')
+        ingrediant_2 = sample_ingrediant(user=self.user, name='Milk')
+        recipe_1 = sample_recipe(user=self.user, title='Rice Pudding')
+        recipe_1.ingrediants.add(ingrediant_1, ingrediant_2)
+        recipe_2 = sample_recipe(user=self.user, title='Fried Rice')
+        recipe_2.ingrediants.add(ingrediant_1)
+
+        res = self.client.get(RECIPE_URL, {
+            'ingrediants': f'{ingrediant_1.id},{ingrediant_2.id}',
+            'match': 'all',
+        })
+
+        self.assertEqual(
+            [item['id'] for item in res.data['results']], [recipe_1.id]
+        )
+
+    def test_filter_invalid_match_mode(self):
+        """
+        Test an unknown match mode is rejected
+        """
+        res = self.client.get(RECIPE_URL, {'tags': '1', 'match': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_recipe_file_name(self):
         """
         test if a random file name is used to store imaged rather than
@@ -283,6 +426,533 @@ class PrivateRecipeAPITests(TestCase):
         self.assertEqual(file_path, expected_path)
 
 
+class RecipeQueryCountTests(TestCase):
+    """
+    Test the recipe endpoints run a fixed number of queries
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@mail.com',
+            name='Test User',
+            password='Open@123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tag = sample_tag(user=self.user)
+        self.ingrediant = sample_ingrediant(user=self.user)
+
+    def _sample_recipes(self, count):
+        """
+        Helper function to create recipes with a tag and an ingrediant
+        """
+        recipes = []
+        for _ in range(count):
+            recipe = sample_recipe(user=self.user)
+            recipe.tags.add(self.tag)
+            recipe.ingrediants.add(self.ingrediant)
+            recipes.append(recipe)
+        return recipes
+
+    def test_list_recipes_query_count_is_constant(self):
+        """
+        Test listing recipes does not run queries per recipe, the related
+        ids are aggregated into the page query on Postgres
+        """
+        queries = 1 if connection.vendor == 'postgresql' else 3
+        self._sample_recipes(1)
+        with self.assertNumQueries(queries):
+            res = self.client.get(RECIPE_URL)
+        self.assertEqual(len(res.data['results']), 1)
+
+        self._sample_recipes(9)
+        with self.assertNumQueries(queries):
+            res = self.client.get(RECIPE_URL)
+        self.assertEqual(len(res.data['results']), 10)
+
+    def test_recipe_detail_query_count_is_constant(self):
+        """
+        Test retrieving a recipe does not run queries per related object
+        """
+        recipe = self._sample_recipes(1)[0]
+        for i in range(5):
+            recipe.tags.add(sample_tag(user=self.user, name=f'Tag {i}'))
+            recipe.ingrediants.add(
+                sample_ingrediant(user=self.user, name=f'Ingrediant {i}')
+            )
+
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url(recipe.id))
+        self.assertEqual(len(res.data['tags']), 6)
+        self.assertEqual(len(res.data['ingrediants']), 6)
+
+
+class RecipeFastListTests(FastListMixin, TestCase):
+    """
+    Test the values() fast path of the recipe list
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@mail.com',
+            name='Test User',
+            password='Open@123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        tags = [sample_tag(user=self.user, name=f'Tag {i}') for i in range(3)]
+        ingrediants = [
+            sample_ingrediant(user=self.user, name=f'Ingrediant {i}')
+            for i in range(3)
+        ]
+        for i in range(5):
+            recipe = sample_recipe(
+                user=self.user, title=f'Recipe {i}', price=f'{i}.5'
+            )
+            recipe.tags.add(*reversed(tags[:i]))
+            recipe.ingrediants.add(*ingrediants[i % 2:])
+
+    def test_fast_list_matches_serializer(self):
+        """
+        Test the fast path returns exactly the serializer output
+        """
+        fast, slow = self._get_both()
+
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, slow.content)
+        recipes = Recipe.objects.filter(user=self.user).order_by('-id')
+        self.assertEqual(
+            fast.data['results'],
+            RecipeSerializer(recipes, many=True).data
+        )
+
+    def test_fast_list_pages_match(self):
+        """
+        Test the fast path paginates like the serializer path
+        """
+        fast, slow = self._get_both({'page_size': 2})
+        self.assertEqual(fast.content, slow.content)
+
+        fast, slow = self._get_both({
+            'page_size': 2,
+            'cursor': parse_qs(urlparse(fast.data['next']).query)['cursor'],
+        })
+        self.assertEqual(fast.content, slow.content)
+        self.assertEqual(len(fast.data['results']), 2)
+
+    def test_fast_list_with_filters_matches(self):
+        """
+        Test filtered and searched lists match the serializer path
+        """
+        tag = Tag.objects.get(name='Tag 0')
+        for params in ({'tags': str(tag.id)}, {'search': 'recipe'}):
+            fast, slow = self._get_both(params)
+            self.assertEqual(fast.content, slow.content)
+
+
+class RecipeFieldsetTests(FastListMixin, TestCase):
+    """
+    Test the fields and expand query params of the recipe endpoints
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@mail.com',
+            name='Test User',
+            password='Open@123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(user=self.user)
+        self.recipe.tags.add(
+            sample_tag(user=self.user, name='Vegan'),
+            sample_tag(user=self.user, name='Dessert'),
+        )
+        self.recipe.ingrediants.add(sample_ingrediant(user=self.user))
+
+    def test_list_sparse_fields(self):
+        """
+        Test the list returns only the requested fields
+        """
+        res = self._get_matching({'fields': 'title,id'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'],
+            [{'id': self.recipe.id, 'title': self.recipe.title}]
+        )
+
+    def test_sparse_fields_skip_related_queries(self):
+        """
+        Test fields without tags and ingrediants load no related rows
+        """
+        for fast in (True, False):
+            get_cache().clear()
+            with self.settings(RECIPE_FAST_LIST=fast):
+                with self.assertNumQueries(1) as context:
+                    self.client.get(RECIPE_URL, {'fields': 'id,title'})
+            self.assertNotIn('price', context.captured_queries[0]['sql'])
+
+    def test_list_expand_nests_related(self):
+        """
+        Test expanded relations are nested like the detail serializer
+        """
+        res = self._get_matching({'expand': 'tags,ingrediants'})
+
+        detail = RecipeDetailSerializer(self.recipe).data
+        row = res.data['results'][0]
+        self.assertEqual(row['tags'], sorted(
+            detail['tags'], key=lambda tag: tag['id']
+        ))
+        self.assertEqual(row['ingrediants'], detail['ingrediants'])
+        self.assertEqual(row['id'], self.recipe.id)
+
+    def test_list_fields_with_expand(self):
+        """
+        Test fields and expand combine
+        """
+        res = self._get_matching({'fields': 'id,tags', 'expand': 'tags'})
+
+        self.assertEqual(
+            list(res.data['results'][0]), ['id', 'tags']
+        )
+        self.assertEqual(res.data['results'][0]['tags'][0]['name'], 'Vegan')
+
+    def test_detail_sparse_fields(self):
+        """
+        Test the detail returns only the requested fields
+        """
+        res = self.client.get(
+            detail_url(self.recipe.id), {'fields': 'title,tags'}
+        )
+
+        self.assertEqual(set(res.data), {'title', 'tags'})
+        self.assertEqual(len(res.data['tags']), 2)
+
+    def test_unknown_field_rejected(self):
+        """
+        Test unknown fields and relations are a bad request
+        """
+        for params in ({'fields': 'id,secret'}, {'expand': 'title'}):
+            res = self.client.get(RECIPE_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecipeSearchTests(TransactionTestCase):
+    """
+    Test full-text search of recipes, committing the changes so that the
+    search vectors are updated
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@mail.com',
+            name='Test User',
+            password='Open@123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _search(self, text):
+        """
+        Helper function returning the ids of the recipes found for text
+        """
+        res = self.client.get(RECIPE_URL, {'search': text})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in res.data['results']]
+
+    def test_search_recipe_titles(self):
+        """
+        Test recipes are found by the words of their title
+        """
+        recipe = sample_recipe(user=self.user, title='Mushroom Risotto')
+        sample_recipe(user=self.user, title='Chicken Curry')
+
+        self.assertEqual(self._search('risotto'), [recipe.id])
+        self.assertEqual(self._search('mushroom risotto'), [recipe.id])
+        self.assertEqual(self._search('lasagne'), [])
+
+    def test_search_tag_and_ingrediant_names(self):
+        """
+        Test recipes are found by their tag and ingrediant names
+        """
+        recipe_1 = sample_recipe(user=self.user, title='Risotto')
+        recipe_1.tags.add(sample_tag(user=self.user, name='Vegetarian'))
+        recipe_2 = sample_recipe(user=self.user, title='Pilaf')
+        recipe_2.ingrediants.add(
+            sample_ingrediant(user=self.user, name='Saffron')
+        )
+
+        self.assertEqual(self._search('vegetarian'), [recipe_1.id])
+        self.assertEqual(self._search('saffron'), [recipe_2.id])
+
+    def test_search_follows_renames_and_removals(self):
+        """
+        Test the search vectors follow tag renames and removed links
+        """
+        recipe = sample_recipe(user=self.user, title='Risotto')
+        tag = sample_tag(user=self.user, name='Vegetarian')
+        recipe.tags.add(tag)
+
+        tag.name = 'Comfort'
+        tag.save()
+        self.assertEqual(self._search('comfort'), [recipe.id])
+        self.assertEqual(self._search('vegetarian'), [])
+
+        tag.recipe_set.clear()
+        self.assertEqual(self._search('comfort'), [])
+
+    def test_search_follows_recipe_title(self):
+        """
+        Test the search vector follows title changes, while saves leaving
+        the title alone do not update it
+        """
+        recipe = sample_recipe(user=self.user, title='Risotto')
+
+        recipe.price = 7
+        with self.assertNumQueries(1):
+            recipe.save()
+
+        recipe.title = 'Paella'
+        recipe.save()
+        self.assertEqual(self._search('paella'), [recipe.id])
+        self.assertEqual(self._search('risotto'), [])
+
+    def test_create_with_links_updates_search_once(self):
+        """
+        Test creating a recipe with tags and ingrediants updates its search
+        vector once
+        """
+        tag = sample_tag(user=self.user, name='Vegetarian')
+        ingrediant = sample_ingrediant(user=self.user, name='Saffron')
+
+        with patch(
+            'recipe.search.update_search_vectors',
+            wraps=update_search_vectors
+        ) as update:
+            res = self.client.post(RECIPE_URL, {
+                'title': 'Paella', 'time_minutes': 40, 'price': '12.00',
+                'tags': [tag.id], 'ingrediants': [ingrediant.id],
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        update.assert_called_once_with([res.data['id']])
+        self.assertEqual(self._search('saffron'), [res.data['id']])
+
+    def test_search_only_user_recipes(self):
+        """
+        Test searching never returns other users recipes
+        """
+        other_user = get_user_model().objects.create_user(
+            'other@mail.com', 'Open@123'
+        )
+        sample_recipe(user=other_user, title='Risotto')
+
+        self.assertEqual(self._search('risotto'), [])
+
+    def test_search_imported_recipes(self):
+        """
+        Test recipes created by the batch import are searchable
+        """
+        self.client.post(RECIPE_IMPORT_URL, [{
+            'title': 'Paella', 'time_minutes': 40, 'price': '12.00',
+            'ingrediants': ['Saffron'],
+        }], format='json')
+
+        recipe = Recipe.objects.get(title='Paella')
+        self.assertEqual(self._search('saffron'), [recipe.id])
+
+    def test_search_results_paginated(self):
+        """
+        Test paging through search results returns every match once
+        """
+        recipes = []
+        for i in range(5):
+            recipe = sample_recipe(user=self.user, title=f'Curry {i}')
+            for j in range(i):
+                recipe.tags.add(sample_tag(user=self.user, name=f'Curry {j}'))
+            recipes.append(recipe)
+
+        found = []
+        res = self.client.get(RECIPE_URL, {'search': 'curry', 'page_size': 2})
+        while True:
+            found.extend(item['id'] for item in res.data['results'])
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(sorted(found), [recipe.id for recipe in recipes])
+
+    @skipUnless(connection.vendor == 'postgresql', 'Ranking needs Postgres')
+    def test_search_ranked_by_relevance(self):
+        """
+        Test title matches rank above tag matches
+        """
+        by_title = sample_recipe(user=self.user, title='Vegan Curry')
+        by_tag = sample_recipe(user=self.user, title='Curry')
+        by_tag.tags.add(sample_tag(user=self.user, name='Vegan'))
+
+        self.assertEqual(self._search('vegan'), [by_title.id, by_tag.id])
+
+
+class RecipeImportTests(TestCase):
+    """
+    Test the batch recipe import endpoint
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@mail.com',
+            name='Test User',
+            password='Open@123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _post_lines(self, rows):
+        """
+        Helper function posting rows as JSON Lines
+        """
+        body = '\n'.join(json.dumps(row) for row in rows)
+        return self.client.post(
+            RECIPE_IMPORT_URL, data=body,
+            content_type='application/x-ndjson'
+        )
+
+    def test_import_recipes(self):
+        """
+        Test recipes are imported with their tags and ingrediants by name
+        """
+        tag = sample_tag(user=self.user, name='Dessert')
+        rows = [
+            {
+                'title': 'Rice Pudding', 'time_minutes': 30, 'price': '4.50',
+                'tags': ['Dessert'], 'ingrediants': ['Rice', 'Milk'],
+            },
+            {
+                'title': 'Fried Rice', 'time_minutes': 15, 'price': '6.00',
+                'link': 'example.com/fried-rice',
+                'tags': ['Main Course'], 'ingrediants': ['Rice', 'Rice'],
+            },
+        ]
+
+        res = self._post_lines(rows)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual(res.data['tags_created'], 1)
+        self.assertEqual(res.data['ingrediants_created'], 2)
+        self.assertIn('recipes_per_second', res.data)
+
+        pudding = Recipe.objects.get(user=self.user, title='Rice Pudding')
+        self.assertEqual(list(pudding.tags.all()), [tag])
+        self.assertEqual(
+            sorted(ing.name for ing in pudding.ingrediants.all()),
+            ['Milk', 'Rice']
+        )
+        fried_rice = Recipe.objects.get(user=self.user, title='Fried Rice')
+        self.assertEqual(fried_rice.link, 'example.com/fried-rice')
+        self.assertEqual(
+            [ing.name for ing in fried_rice.ingrediants.all()], ['Rice']
+        )
+        self.assertEqual(Ingrediant.objects.filter(name='Rice').count(), 1)
+
+    def test_import_recipes_json_array(self):
+        """
+        Test a plain JSON array is accepted as well
+        """
+        rows = [{'title': 'Toast', 'time_minutes': 2, 'price': '1.00'}]
+
+        res = self.client.post(RECIPE_IMPORT_URL, rows, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Recipe.objects.filter(title='Toast').exists())
+
+    def test_import_invalid_rows_creates_nothing(self):
+        """
+        Test one invalid row rejects the whole batch with its row number
+        """
+        rows = [
+            {'title': 'Toast', 'time_minutes': 2, 'price': '1.00'},
+            {'title': 'Broken', 'price': '1.00', 'tags': ['New Tag']},
+        ]
+
+        res = self._post_lines(rows)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['errors'][0]['row'], 2)
+        self.assertIn('time_minutes', res.data['errors'][0]['errors'])
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(Tag.objects.exists())
+
+    def test_import_malformed_json_lines(self):
+        """
+        Test malformed JSON Lines are rejected
+        """
+        res = self.client.post(
+            RECIPE_IMPORT_URL, data='{"title": "Toast"}\n{not json',
+            content_type='application/x-ndjson'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+
+class RecipeExportTests(TestCase):
+    """
+    Test the streaming recipe export endpoint
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@mail.com',
+            name='Test User',
+            password='Open@123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_export_recipes_as_json_lines(self):
+        """
+        Test the user's recipes are streamed in the detail format
+        """
+        tag = sample_tag(user=self.user)
+        ingrediant = sample_ingrediant(user=self.user)
+        recipes = []
+        for i in range(3):
+            recipe = sample_recipe(user=self.user, title=f'Recipe {i}')
+            recipe.tags.add(tag)
+            recipe.ingrediants.add(ingrediant)
+            recipes.append(recipe)
+        other_user = get_user_model().objects.create_user(
+            'other@mail.com', 'Open@123'
+        )
+        sample_recipe(user=other_user)
+
+        res = self.client.get(RECIPE_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        with self.assertNumQueries(3):
+            content = b''.join(res.streaming_content).decode('utf-8')
+        lines = [json.loads(line) for line in content.splitlines()]
+        expected = json.loads(json.dumps(
+            RecipeDetailSerializer(recipes, many=True).data
+        ))
+        self.assertEqual(lines, expected)
+
+    def test_export_without_recipes(self):
+        """
+        Test exporting an empty recipe book streams nothing
+        """
+        res = self.client.get(RECIPE_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(res.streaming_content), b'')
+
+
 class RecipeImageUploadTests(TestCase):
     """
     Test cases for image upload for recipe
@@ -350,9 +1020,9 @@ class RecipeImageUploadTests(TestCase):
         serializer_3 = RecipeSerializer(recipe_3)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(serializer_1.data, res.data)
-        self.assertIn(serializer_2.data, res.data)
-        self.assertNotIn(serializer_3.data, res.data)
+        self.assertIn(serializer_1.data, res.data['results'])
+        self.assertIn(serializer_2.data, res.data['results'])
+        self.assertNotIn(serializer_3.data, res.data['results'])
 
     def test_recipe_filter_with_ingrediants(self):
         """
@@ -374,6 +1044,261 @@ class RecipeImageUploadTests(TestCase):
         serializer_1 = RecipeSerializer(recipe_1)
         serializer_2 = RecipeSerializer(recipe_2)
         serializer_3 = RecipeSerializer(recipe_3)
-        self.assertIn(serializer_1.data, res.data)
-        self.assertIn(serializer_2.data, res.data)
-        self.assertNotIn(serializer_3.data, res.data)
+        self.assertIn(serializer_1.data, res.data['results'])
+        self.assertIn(serializer_2.data, res.data['results'])
+        self.assertNotIn(serializer_3.data, res.data['results'])
+
+
+@override_settings(RECIPE_IMAGE_WORKERS=0,
+                   RECIPE_IMAGE_RENDITION_WIDTHS=(8, 16))
+class RecipeImageProcessingTests(TestCase):
+    """
+    Test cases for the recipe image processing pipeline
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'john7ric@mail.com',
+            'JKSKKS@904kkf'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(user=self.user)
+
+    def tearDown(self):
+        self.recipe.refresh_from_db()
+        delete_renditions(self.recipe)
+        self.recipe.image.delete()
+
+    def _upload(self, image, **save_kwargs):
+        """
+        Helper function uploading a PIL image as the recipe image
+        """
+        url = recipe_image_uplaod_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            image.save(ntf, format='JPEG', **save_kwargs)
+            ntf.seek(0)
+            return self.client.post(url, {'image': ntf}, format='multipart')
+
+    def test_upload_generates_renditions(self):
+        """
+        Test an upload is resized into WebP and JPEG renditions
+        """
+        res = self._upload(Image.new('RGB', (20, 10)))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_status'], Recipe.IMAGE_READY)
+        self.recipe.refresh_from_db()
+        renditions = get_renditions(self.recipe)
+        self.assertEqual(set(renditions), {'webp', 'jpeg'})
+        storage = self.recipe.image.storage
+        for key, pil_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+            self.assertEqual(set(renditions[key]), {'8', '16'})
+            with storage.open(renditions[key]['8']) as rendition:
+                with Image.open(rendition) as img:
+                    self.assertEqual(img.format, pil_format)
+                    self.assertEqual(img.size, (8, 4))
+
+    def test_renditions_strip_exif(self):
+        """
+        Test renditions are rotated upright and carry no EXIF metadata
+        """
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010f] = 'Camera'
+        self._upload(Image.new('RGB', (16, 8)), exif=exif.tobytes())
+
+        self.recipe.refresh_from_db()
+        name = get_renditions(self.recipe)['jpeg']['8']
+        with self.recipe.image.storage.open(name) as rendition:
+            with Image.open(rendition) as img:
+                self.assertEqual(img.size, (8, 16))
+                self.assertEqual(len(img.getexif()), 0)
+
+    def test_original_strips_exif(self):
+        """
+        Test the stored original is rotated upright without its EXIF
+        """
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x8825] = {1: 'N'}
+        res = self._upload(Image.new('RGB', (16, 8)), exif=exif.tobytes())
+
+        self.recipe.refresh_from_db()
+        self.assertIn(self.recipe.image.name, res.data['image'])
+        with self.recipe.image.open('rb') as original:
+            with Image.open(original) as img:
+                self.assertEqual(img.size, (8, 16))
+                self.assertNotIn('exif', img.info)
+
+    def test_reupload_replaces_renditions(self):
+        """
+        Test uploading a new image removes the old renditions
+        """
+        self._upload(Image.new('RGB', (16, 16)))
+        self.recipe.refresh_from_db()
+        old_names = get_renditions(self.recipe)['webp'].values()
+        old_image = self.recipe.image.name
+
+        self._upload(Image.new('RGB', (16, 16)))
+        self.recipe.refresh_from_db()
+        storage = self.recipe.image.storage
+        storage.delete(old_image)
+        for name in old_names:
+            if name not in get_renditions(self.recipe)['webp'].values():
+                self.assertFalse(storage.exists(name))
+
+    def test_invalid_image_marks_failed(self):
+        """
+        Test an image that cannot be decoded is marked as failed
+        """
+        res = self._upload(Image.new('RGB', (8, 8)))
+        self.recipe.refresh_from_db()
+        delete_renditions(self.recipe)
+        with open(self.recipe.image.path, 'wb') as image_file:
+            image_file.write(b'not an image')
+
+        with self.assertLogs('recipe.images', level='ERROR'):
+            process_recipe_image(self.recipe.id)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_FAILED)
+
+    def test_list_exposes_srcset(self):
+        """
+        Test the recipe list exposes a srcset per rendition format
+        """
+        self._upload(Image.new('RGB', (20, 10)))
+        self.recipe.refresh_from_db()
+        renditions = get_renditions(self.recipe)
+
+        res = self.client.get(RECIPE_URL)
+
+        srcset = res.data['results'][0]['image_srcset']
+        self.assertEqual(set(srcset), {'webp', 'jpeg'})
+        self.assertEqual(
+            srcset['webp'],
+            ', '.join(
+                f'http://testserver{self.recipe.image.storage.url(name)} '
+                f'{width}w'
+                for width, name in (
+                    ('8', renditions['webp']['8']),
+                    ('16', renditions['webp']['16']),
+                )
+            )
+        )
+
+    def test_srcset_generated_lazily(self):
+        """
+        Test renditions missing for an image are generated on first access
+        """
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (16, 16)).save(ntf, format='JPEG')
+            ntf.seek(0)
+            self.recipe.image.save('lazy.jpg', File(ntf))
+        self.assertEqual(self.recipe.image_renditions, '')
+
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(
+            set(res.data['image_srcset']), {'webp', 'jpeg'}
+        )
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_READY)
+        self.assertTrue(get_renditions(self.recipe))
+
+    def test_pending_image_not_processed_on_access(self):
+        """
+        Test a pending image is left to the worker pool, exposing no
+        renditions until it is processed
+        """
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (16, 16)).save(ntf, format='JPEG')
+            ntf.seek(0)
+            self.recipe.image.save('pending.jpg', File(ntf), save=False)
+        self.recipe.image_status = Recipe.IMAGE_PENDING
+        self.recipe.image_queued_at = timezone.now()
+        self.recipe.save()
+
+        with patch('recipe.images.process_recipe_image') as process:
+            res = self.client.get(detail_url(self.recipe.id))
+
+        process.assert_not_called()
+        self.assertEqual(res.data['image_srcset'], {})
+
+    @override_settings(RECIPE_IMAGE_PENDING_TIMEOUT=60)
+    def test_stale_pending_image_requeued_on_access(self):
+        """
+        Test a pending image whose job was lost is queued again once past
+        the pending timeout, and only by one request
+        """
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (16, 16)).save(ntf, format='JPEG')
+            ntf.seek(0)
+            self.recipe.image.save('stale.jpg', File(ntf), save=False)
+        self.recipe.image_status = Recipe.IMAGE_PENDING
+        self.recipe.image_queued_at = timezone.now() - timedelta(seconds=61)
+        self.recipe.save()
+
+        with patch('recipe.images.transaction.on_commit') as on_commit, \
+                override_settings(RECIPE_IMAGE_WORKERS=2):
+            res_1 = self.client.get(detail_url(self.recipe.id))
+            res_2 = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(on_commit.call_count, 1)
+        self.assertEqual(res_1.data['image_srcset'], {})
+        self.assertEqual(res_2.data['image_srcset'], {})
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_PENDING)
+        self.assertGreater(
+            self.recipe.image_queued_at, timezone.now() - timedelta(seconds=60)
+        )
+
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertEqual(res.data['image_srcset'], {})
+        Recipe.objects.filter(pk=self.recipe.pk).update(image_queued_at=None)
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(set(res.data['image_srcset']), {'webp', 'jpeg'})
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_READY)
+
+    def test_renditions_reused_from_content_hash_cache(self):
+        """
+        Test renditions of unchanged image content are not generated twice
+        """
+        self._upload(Image.new('RGB', (16, 16)))
+        self.recipe.refresh_from_db()
+
+        with patch('recipe.images.generate_renditions') as generate:
+            renditions = build_renditions(self.recipe.image)
+
+        generate.assert_not_called()
+        self.assertEqual(renditions, get_renditions(self.recipe))
+
+    def test_recipe_without_image_has_no_srcset(self):
+        """
+        Test recipes without an image expose no srcset
+        """
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertIsNone(res.data['image_srcset'])
+
+    @override_settings(RECIPE_IMAGE_WORKERS=2)
+    def test_upload_processed_after_commit(self):
+        """
+        Test an upload is queued as pending and only submitted to the
+        worker pool once the transaction commits
+        """
+        with patch('recipe.images.transaction.on_commit') as on_commit, \
+                patch('recipe.images._get_executor') as get_executor:
+            res = self._upload(Image.new('RGB', (8, 8)))
+
+            self.assertEqual(res.data['image_status'], Recipe.IMAGE_PENDING)
+            get_executor.assert_not_called()
+            on_commit.call_args[0][0]()
+
+        get_executor.return_value.submit.assert_called_once_with(
+            _run_image_job, self.recipe.id
+        )
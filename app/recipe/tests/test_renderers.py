@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.test import TestCase
+
+from rest_framework.renderers import JSONRenderer
+
+from recipe.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(TestCase):
+    """
+    Test the fast JSON renderer matches the default one byte for byte
+    """
+
+    def test_output_matches_json_renderer(self):
+        """
+        Test common API values render identically
+        """
+        data = {
+            'results': [{
+                'id': 1,
+                'title': 'Café   line',
+                'price': '5.00',
+                'ratio': 0.1,
+                'when': datetime(2020, 1, 1, tzinfo=timezone.utc),
+                'cost': Decimal('1.50'),
+                'tags': [],
+                'image': None,
+            }],
+            'next': None,
+        }
+
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_indented_output_falls_back(self):
+        """
+        Test an indent request renders like JSONRenderer
+        """
+        media_type = 'application/json; indent=4'
+
+        self.assertEqual(
+            FastJSONRenderer().render({'a': [1]}, media_type),
+            JSONRenderer().render({'a': [1]}, media_type)
+        )
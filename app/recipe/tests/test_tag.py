@@ -1,4 +1,6 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from django.urls import reverse
 from django.contrib.auth import get_user_model
@@ -8,6 +10,7 @@ from core.models import Tag, Recipe
 from recipe.serializers import TagSerializer
 
 TAGS_URL = reverse('recipe:tag-list')
+TAGS_BULK_URL = reverse('recipe:tag-bulk')
 
 
 class TestPublicTagAPI(TestCase):
@@ -52,7 +55,7 @@ class TestPrivateTagsAPI(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, data)
+        self.assertEqual(res.data['results'], data)
 
     def test_user_tags(self):
         """
@@ -68,8 +71,8 @@ class TestPrivateTagsAPI(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
 
     def test_create_tag_sucessfull(self):
         """
@@ -113,9 +116,9 @@ class TestPrivateTagsAPI(TestCase):
         serializer_1 = TagSerializer(tag_1)
         serializer_2 = TagSerializer(tag_2)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertIn(serializer_1.data, res.data)
-        self.assertNotIn(serializer_2.data, res.data)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertIn(serializer_1.data, res.data['results'])
+        self.assertNotIn(serializer_2.data, res.data['results'])
 
     def test_retrieve_tags_assignes_unique(self):
         """
@@ -144,5 +147,232 @@ class TestPrivateTagsAPI(TestCase):
         serializer_1 = TagSerializer(tag_1)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertIn(serializer_1.data, res.data)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertIn(serializer_1.data, res.data['results'])
+
+    def test_list_tags_paginated_by_cursor(self):
+        """
+        Test tags are listed in pages following the next cursor
+        """
+        for name in ('Apple', 'Banana', 'Cherry'):
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAGS_URL, {'page_size': 2})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [tag['name'] for tag in res.data['results']],
+            ['Cherry', 'Banana']
+        )
+        self.assertIsNone(res.data['previous'])
+
+        res = self.client.get(res.data['next'])
+        self.assertEqual(
+            [tag['name'] for tag in res.data['results']],
+            ['Apple']
+        )
+        self.assertIsNone(res.data['next'])
+
+    def test_list_tags_with_same_name_paginated_by_cursor(self):
+        """
+        Test tags sharing a name are neither skipped nor repeated across
+        pages
+        """
+        tags = [
+            Tag.objects.create(user=self.user, name='Vegan') for _ in range(5)
+        ]
+
+        ids = []
+        res = self.client.get(TAGS_URL, {'page_size': 2})
+        while True:
+            ids.extend(tag['id'] for tag in res.data['results'])
+            if res.data['next'] is None:
+                break
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(ids, [tag.id for tag in reversed(tags)])
+
+    def test_bulk_create_tags(self):
+        """
+        Test tags are created in bulk, skipping names that already exist
+        """
+        existing = Tag.objects.create(user=self.user, name='Vegan')
+        payload = [{'name': 'Vegan'}, {'name': 'Dessert'}, {'name': 'Soup'}]
+
+        res = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [(item['name'], item['status']) for item in res.data],
+            [('Vegan', 'exists'), ('Dessert', 'created'), ('Soup', 'created')]
+        )
+        self.assertEqual(res.data[0]['id'], existing.id)
+        tags = Tag.objects.filter(user=self.user)
+        self.assertEqual(tags.count(), 3)
+        self.assertEqual(
+            {item['id'] for item in res.data},
+            set(tags.values_list('id', flat=True))
+        )
+
+    def test_bulk_create_tags_deduplicates_payload(self):
+        """
+        Test a name repeated in the payload is only created once
+        """
+        payload = [{'name': 'Vegan'}, {'name': 'Vegan'}]
+
+        res = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [item['status'] for item in res.data], ['created', 'exists']
+        )
+        self.assertEqual(res.data[0]['id'], res.data[1]['id'])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_create_tags_invalid(self):
+        """
+        Test nothing is created when one of the items is invalid
+        """
+        payload = [{'name': 'Vegan'}, {'name': ''}]
+
+        res = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Tag.objects.exists())
+
+    def test_bulk_rename_tags(self):
+        """
+        Test tags are renamed in bulk, other users tags are not found
+        """
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        user2 = get_user_model().objects.create_user(
+            'other@mail.com', 'Open@123'
+        )
+        other_tag = Tag.objects.create(user=user2, name='Soup')
+        payload = [
+            {'id': tag.id, 'name': 'Vegetarian'},
+            {'id': other_tag.id, 'name': 'Hacked'},
+        ]
+
+        res = self.client.patch(TAGS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['status'] for item in res.data], ['updated', 'not_found']
+        )
+        tag.refresh_from_db()
+        other_tag.refresh_from_db()
+        self.assertEqual(tag.name, 'Vegetarian')
+        self.assertEqual(other_tag.name, 'Soup')
+
+    def test_bulk_delete_tags(self):
+        """
+        Test tags are deleted in bulk
+        """
+        tag_1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag_2 = Tag.objects.create(user=self.user, name='Soup')
+
+        res = self.client.delete(
+            TAGS_BULK_URL, {'ids': [tag_1.id, 0]}, format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['status'] for item in res.data], ['deleted', 'not_found']
+        )
+        self.assertEqual(list(Tag.objects.all()), [tag_2])
+
+    def _bulk_delete_queries(self, count):
+        """
+        Helper function counting the queries of bulk deleting count tags
+        linked to a recipe
+        """
+        recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price=1
+        )
+        tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+            for i in range(count)
+        ]
+        recipe.tags.add(*tags)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.delete(
+                TAGS_BULK_URL, {'ids': [tag.id for tag in tags]},
+                format='json'
+            )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(recipe.tags.exists())
+        return len(queries)
+
+    def test_bulk_delete_tags_query_count_constant(self):
+        """
+        Test bulk deleting more tags runs no more queries
+        """
+        self.assertEqual(
+            self._bulk_delete_queries(5), self._bulk_delete_queries(50)
+        )
+
+    def test_bulk_changes_invalidate_cached_list(self):
+        """
+        Test the cached tag list reflects bulk changes
+        """
+        self.client.get(TAGS_URL)
+
+        self.client.post(TAGS_BULK_URL, [{'name': 'Vegan'}], format='json')
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_autocomplete_tags(self):
+        """
+        Test tags are autocompleted from the typed prefix
+        """
+        for name in ('Vegan', 'Vegetarian', 'Soup'):
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAGS_URL, {'q': 'veg'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['name'] for item in res.data], ['Vegan', 'Vegetarian']
+        )
+
+
+class TagSearchTests(TransactionTestCase):
+    """
+    Test the recipe search follows tag changes, committing them so that
+    the search vectors are updated
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@mail.com',
+            name='Test User',
+            password='Open@123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _search(self, text):
+        """
+        Helper function returning the ids of the recipes found for text
+        """
+        res = self.client.get(reverse('recipe:recipe-list'), {
+            'search': text
+        })
+        return [item['id'] for item in res.data['results']]
+
+    def test_bulk_delete_tags_updates_search(self):
+        """
+        Test recipes no longer match the names of bulk deleted tags
+        """
+        recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price=1
+        )
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe.tags.add(tag)
+        self.assertEqual(self._search('vegan'), [recipe.id])
+
+        self.client.delete(TAGS_BULK_URL, {'ids': [tag.id]}, format='json')
+
+        self.assertEqual(self._search('vegan'), [])
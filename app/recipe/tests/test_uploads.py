@@ -0,0 +1,355 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, RecipeImageUpload
+from recipe.images import delete_renditions
+from recipe.uploads import receive_chunk, upload_temp_path
+
+CHUNK_TYPE = 'application/offset+octet-stream'
+
+
+def uploads_url(recipe_id):
+    """
+    url for starting a resumable image upload
+    """
+    return reverse('recipe:recipe-uploads', args=[recipe_id])
+
+
+def upload_url(recipe_id, upload_id):
+    """
+    url for the chunks of a resumable image upload
+    """
+    return reverse('recipe:recipe-upload', args=[recipe_id, upload_id])
+
+
+def complete_url(recipe_id, upload_id):
+    """
+    url for finishing a resumable image upload
+    """
+    return reverse(
+        'recipe:recipe-upload-complete', args=[recipe_id, upload_id]
+    )
+
+
+def sample_image_bytes(size=(12, 12)):
+    """
+    helper function returning an encoded jpeg image
+    """
+    buffer = BytesIO()
+    Image.new('RGB', size).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+@override_settings(RECIPE_IMAGE_WORKERS=0,
+                   RECIPE_IMAGE_RENDITION_WIDTHS=(8,))
+class ChunkedImageUploadTests(TestCase):
+    """
+    Test cases for resumable chunked recipe image uploads
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'john7ric@mail.com',
+            'JKSKKS@904kkf'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Fish Curry', time_minutes=20, price=5.00
+        )
+        self.temp_dir = tempfile.mkdtemp()
+        temp_settings = override_settings(RECIPE_UPLOAD_TEMP_DIR=self.temp_dir)
+        temp_settings.enable()
+        self.addCleanup(temp_settings.disable)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        self.recipe.refresh_from_db()
+        if self.recipe.image:
+            delete_renditions(self.recipe)
+            self.recipe.image.delete()
+
+    def _start(self, data):
+        """
+        Helper function starting an upload of the given bytes
+        """
+        return self.client.post(uploads_url(self.recipe.id), {
+            'file_name': 'photo.jpg',
+            'size': len(data),
+            'checksum': hashlib.sha256(data).hexdigest(),
+        }, format='json')
+
+    def _send(self, upload_id, chunk, offset):
+        """
+        Helper function sending one chunk of an upload
+        """
+        return self.client.generic(
+            'PATCH', upload_url(self.recipe.id, upload_id), chunk,
+            content_type=CHUNK_TYPE, HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def test_chunked_upload_attaches_image(self):
+        """
+        Test an image sent in chunks is verified and attached to the recipe
+        """
+        data = sample_image_bytes()
+        res = self._start(data)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res['Upload-Offset'], '0')
+        upload_id = res.data['id']
+        upload = RecipeImageUpload.objects.get(pk=upload_id)
+
+        middle = len(data) // 2
+        res = self._send(upload_id, data[:middle], 0)
+        self.assertEqual(res['Upload-Offset'], str(middle))
+        res = self._send(upload_id, data[middle:], middle)
+        self.assertEqual(res['Upload-Offset'], str(len(data)))
+
+        res = self.client.post(complete_url(self.recipe.id, upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_status'], Recipe.IMAGE_READY)
+        self.recipe.refresh_from_db()
+        with self.recipe.image.open('rb') as image_file:
+            self.assertEqual(image_file.read(), data)
+        self.assertFalse(RecipeImageUpload.objects.exists())
+        self.assertFalse(os.path.exists(upload_temp_path(upload)))
+
+    def test_resume_reports_offset(self):
+        """
+        Test the offset of an interrupted upload can be fetched to resume
+        """
+        data = sample_image_bytes()
+        upload_id = self._start(data).data['id']
+        self._send(upload_id, data[:10], 0)
+
+        res = self.client.get(upload_url(self.recipe.id, upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Upload-Offset'], '10')
+        self.assertEqual(res.data['offset'], 10)
+
+    def test_chunk_at_wrong_offset_conflicts(self):
+        """
+        Test a chunk not starting at the upload offset is rejected
+        """
+        data = sample_image_bytes()
+        upload_id = self._start(data).data['id']
+        self._send(upload_id, data[:10], 0)
+
+        res = self._send(upload_id, data[5:20], 5)
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        upload = RecipeImageUpload.objects.get(pk=upload_id)
+        self.assertEqual(upload.offset, 10)
+
+    def test_chunk_of_other_content_type_rejected(self):
+        """
+        Test chunks must be sent as application/offset+octet-stream
+        """
+        data = sample_image_bytes()
+        upload_id = self._start(data).data['id']
+
+        res = self.client.generic(
+            'PATCH', upload_url(self.recipe.id, upload_id), data,
+            content_type='application/octet-stream', HTTP_UPLOAD_OFFSET='0'
+        )
+
+        self.assertEqual(
+            res.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        )
+        upload = RecipeImageUpload.objects.get(pk=upload_id)
+        self.assertEqual(upload.offset, 0)
+
+    def test_chunk_past_declared_size_rejected(self):
+        """
+        Test an upload cannot grow past its declared size
+        """
+        data = sample_image_bytes()
+        upload_id = self._start(data).data['id']
+        self._send(upload_id, data[:10], 0)
+
+        res = self._send(upload_id, data[10:] + b'extra', 10)
+
+        self.assertEqual(
+            res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+        upload = RecipeImageUpload.objects.get(pk=upload_id)
+        self.assertEqual(upload.offset, 10)
+        with open(upload_temp_path(upload), 'rb') as part:
+            self.assertEqual(part.read(), data[:10])
+
+    def test_chunk_buffered_before_upload_locked(self):
+        """
+        Test the chunk is read from the request before any query, so the
+        upload lock and connection are not held while it streams in
+        """
+        data = sample_image_bytes()
+        upload_id = self._start(data).data['id']
+        queries_before_read = []
+
+        def receive(stream):
+            queries_before_read.append(len(queries))
+            return receive_chunk(stream)
+
+        with CaptureQueriesContext(connection) as queries, \
+                patch('recipe.views.receive_chunk', side_effect=receive):
+            res = self._send(upload_id, data, 0)
+
+        self.assertEqual(res['Upload-Offset'], str(len(data)))
+        self.assertEqual(queries_before_read, [0])
+
+    def test_chunk_over_max_chunk_size_rejected(self):
+        """
+        Test a chunk over the chunk size limit is refused without touching
+        the upload
+        """
+        data = sample_image_bytes()
+        upload_id = self._start(data).data['id']
+
+        with self.settings(RECIPE_UPLOAD_MAX_CHUNK_SIZE=10):
+            res = self._send(upload_id, data, 0)
+
+        self.assertEqual(
+            res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+        upload = RecipeImageUpload.objects.get(pk=upload_id)
+        self.assertEqual(upload.offset, 0)
+
+    def test_checksum_mismatch_discards_upload(self):
+        """
+        Test an upload whose bytes do not match the checksum is discarded
+        """
+        data = sample_image_bytes()
+        upload_id = self._start(data).data['id']
+        self._send(upload_id, b'x' * len(data), 0)
+
+        res = self.client.post(complete_url(self.recipe.id, upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('checksum', res.data)
+        self.assertFalse(RecipeImageUpload.objects.exists())
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_incomplete_upload_not_finalized(self):
+        """
+        Test an upload missing chunks cannot be completed
+        """
+        data = sample_image_bytes()
+        upload_id = self._start(data).data['id']
+        self._send(upload_id, data[:10], 0)
+
+        res = self.client.post(complete_url(self.recipe.id, upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(
+            RecipeImageUpload.objects.filter(pk=upload_id).exists()
+        )
+
+    def test_not_an_image_rejected(self):
+        """
+        Test bytes that are not an image are not attached
+        """
+        data = b'not an image'
+        upload_id = self._start(data).data['id']
+        self._send(upload_id, data, 0)
+
+        res = self.client.post(complete_url(self.recipe.id, upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)
+
+    def test_abort_upload(self):
+        """
+        Test deleting an upload removes it and its chunks
+        """
+        data = sample_image_bytes()
+        upload_id = self._start(data).data['id']
+        self._send(upload_id, data[:10], 0)
+        upload = RecipeImageUpload.objects.get(pk=upload_id)
+
+        res = self.client.delete(upload_url(self.recipe.id, upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(RecipeImageUpload.objects.exists())
+        self.assertFalse(os.path.exists(upload_temp_path(upload)))
+
+    def test_start_upload_validates_size(self):
+        """
+        Test uploads over the size limit are refused up front
+        """
+        with self.settings(RECIPE_UPLOAD_MAX_SIZE=10):
+            res = self._start(sample_image_bytes())
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('size', res.data)
+
+    def test_upper_case_checksum_accepted(self):
+        """
+        Test the checksum may be sent in upper case hex
+        """
+        data = sample_image_bytes()
+        checksum = hashlib.sha256(data).hexdigest()
+
+        res = self.client.post(uploads_url(self.recipe.id), {
+            'file_name': 'photo.jpg',
+            'size': len(data),
+            'checksum': checksum.upper(),
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['checksum'], checksum)
+
+    def test_start_upload_sanitizes_file_name(self):
+        """
+        Test the file name is reduced to its base name and must carry an
+        image extension
+        """
+        data = sample_image_bytes()
+        payload = {
+            'size': len(data),
+            'checksum': hashlib.sha256(data).hexdigest(),
+        }
+
+        res = self.client.post(uploads_url(self.recipe.id), {
+            **payload, 'file_name': '../../etc/my photo.jpg'
+        }, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['file_name'], 'my_photo.jpg')
+
+        for file_name in ('a./../x', 'photo.html', '..'):
+            res = self.client.post(uploads_url(self.recipe.id), {
+                **payload, 'file_name': file_name
+            }, format='json')
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('file_name', res.data)
+
+    def test_upload_of_other_users_recipe_not_found(self):
+        """
+        Test uploads cannot be started for another user's recipe
+        """
+        other = get_user_model().objects.create_user(
+            'other@mail.com', 'Open@123'
+        )
+        self.recipe.user = other
+        self.recipe.save()
+
+        res = self._start(sample_image_bytes())
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,239 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files import File
+from django.db import transaction
+from django.http import Http404
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from PIL import Image
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException, UnsupportedMediaType, ValidationError
+)
+
+from core.models import RecipeImageUpload
+from recipe.images import schedule_image_processing
+
+UPLOAD_OFFSET_HEADER = 'Upload-Offset'
+UPLOAD_CONTENT_TYPE = 'application/offset+octet-stream'
+READ_SIZE = 64 * 1024
+
+
+class UploadOffsetConflict(APIException):
+    """
+    Raised when a chunk does not start where the stored upload ends
+    """
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Upload-Offset does not match the upload offset.'
+    default_code = 'offset_conflict'
+
+
+class UploadTooLarge(APIException):
+    """
+    Raised when a chunk would grow an upload past its declared size
+    """
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'The chunk exceeds the declared upload size.'
+    default_code = 'upload_too_large'
+
+
+class UploadedChunksFile(File):
+    """
+    File over the assembled chunks on disk, the storage moves it into
+    place rather than copying it
+    """
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def upload_temp_path(upload):
+    """
+    Return the path the chunks of an upload are assembled in
+    """
+    return os.path.join(settings.RECIPE_UPLOAD_TEMP_DIR, f'{upload.pk}.part')
+
+
+def _expiry_cutoff():
+    """
+    Helper function returning the start time before which uploads expire
+    """
+    return timezone.now() - timedelta(seconds=settings.RECIPE_UPLOAD_EXPIRY)
+
+
+def expired_uploads():
+    """
+    Return the uploads that were started longer ago than the expiry
+    """
+    return RecipeImageUpload.objects.filter(created__lt=_expiry_cutoff())
+
+
+def get_upload(recipe, upload_id, lock=False):
+    """
+    Return an unexpired upload of a recipe, locked for update if asked
+    """
+    uploads = RecipeImageUpload.objects.filter(
+        recipe=recipe, created__gte=_expiry_cutoff()
+    )
+    if lock:
+        uploads = uploads.select_for_update()
+    try:
+        return uploads.get(pk=upload_id)
+    except (RecipeImageUpload.DoesNotExist, DjangoValidationError):
+        raise Http404('No such upload.')
+
+
+def discard_upload(upload):
+    """
+    Delete an upload and the chunks received for it
+    """
+    try:
+        os.remove(upload_temp_path(upload))
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def parse_offset(value):
+    """
+    Return the Upload-Offset header value as an int
+    """
+    try:
+        offset = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError(
+            {UPLOAD_OFFSET_HEADER: 'A non negative integer is required.'}
+        )
+    if offset < 0:
+        raise ValidationError(
+            {UPLOAD_OFFSET_HEADER: 'A non negative integer is required.'}
+        )
+    return offset
+
+
+def check_chunk_content_type(content_type):
+    """
+    Refuse a chunk request whose body is not sent as UPLOAD_CONTENT_TYPE
+    """
+    if content_type.split(';')[0].strip().lower() != UPLOAD_CONTENT_TYPE:
+        raise UnsupportedMediaType(content_type)
+
+
+def receive_chunk(stream):
+    """
+    Buffer the body of a chunk request in an anonymous temp file, before
+    the upload is locked, so that a slow client holds neither the lock
+    nor a database connection. Returns the file rewound to its start
+    """
+    os.makedirs(settings.RECIPE_UPLOAD_TEMP_DIR, exist_ok=True)
+    chunk_file = tempfile.TemporaryFile(dir=settings.RECIPE_UPLOAD_TEMP_DIR)
+    try:
+        received = 0
+        while True:
+            data = stream.read(READ_SIZE) if stream is not None else b''
+            if not data:
+                break
+            received += len(data)
+            if received > settings.RECIPE_UPLOAD_MAX_CHUNK_SIZE:
+                raise UploadTooLarge()
+            chunk_file.write(data)
+    except BaseException:
+        chunk_file.close()
+        raise
+    chunk_file.seek(0)
+    return chunk_file
+
+
+def append_chunk(upload, chunk_file, offset):
+    """
+    Append a buffered chunk to an upload. The upload must be locked by the
+    caller
+    """
+    if offset != upload.offset:
+        raise UploadOffsetConflict()
+    received = os.fstat(chunk_file.fileno()).st_size
+    if received > upload.size - upload.offset:
+        raise UploadTooLarge()
+    path = upload_temp_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'ab') as part:
+        # Drop bytes past the recorded offset left by an interrupted chunk
+        part.truncate(upload.offset)
+        shutil.copyfileobj(chunk_file, part, READ_SIZE)
+
+    upload.offset += received
+    upload.save(update_fields=['offset'])
+    return upload
+
+
+def _file_checksum(path):
+    """
+    Helper function returning the sha256 hex digest of a file
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as part:
+        for chunk in iter(lambda: part.read(READ_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_image(path):
+    """
+    Helper function checking the assembled file is a decodable image
+    """
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except Exception:
+        return False
+    return True
+
+
+def _upload_error(upload):
+    """
+    Helper function returning why a fully received upload is unusable
+    """
+    path = upload_temp_path(upload)
+    if _file_checksum(path) != upload.checksum:
+        return {'checksum': ['The upload checksum mismatched.']}
+    if not _is_image(path):
+        return {'image': [
+            'Upload a valid image. The file you uploaded was either not an '
+            'image or a corrupted image.'
+        ]}
+    return None
+
+
+def finalize_upload(recipe, upload_id):
+    """
+    Verify a fully received upload against its checksum and attach it as
+    the recipe image. Uploads failing verification are discarded
+    """
+    with transaction.atomic():
+        upload = get_upload(recipe, upload_id, lock=True)
+        if upload.offset != upload.size:
+            raise ValidationError({
+                'offset': [f'Received {upload.offset} of {upload.size} bytes.']
+            })
+        error = _upload_error(upload)
+        if error is None:
+            with open(upload_temp_path(upload), 'rb') as part:
+                # Uploads started before file names were validated may
+                # still carry a path
+                recipe.image.save(
+                    get_valid_filename(os.path.basename(upload.file_name)),
+                    UploadedChunksFile(part)
+                )
+            upload.delete()
+            schedule_image_processing(recipe)
+            return recipe
+
+    discard_upload(upload)
+    raise ValidationError(error)
@@ -1,25 +1,83 @@
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework import viewsets, mixins
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import TokenAuthentication
 
+from core.authentication import CachedTokenAuthentication
 from core.models import Tag, Ingrediant, Recipe
+from recipe import bulk
+from recipe.cache import (
+    CachedListMixin, ConditionalGetMixin, bump_user_version
+)
+from recipe.export import iter_recipe_lines
+from recipe.fieldsets import (
+    parse_fieldset, recipe_columns, recipe_prefetches
+)
+from recipe.filters import filter_recipes, MATCH_ANY, MATCH_MODES
+from recipe.images import schedule_image_processing
+from recipe.importer import validate_rows, import_recipes
+from recipe.listing import RecipeRowSerializer, recipe_rows
+from recipe.pagination import (
+    RecipeCursorPagination, RecipeAttrCursorPagination
+)
+from recipe.parsers import JSONLinesParser
+from recipe.renderers import FastJSONRenderer
+from recipe.uploads import (
+    UPLOAD_OFFSET_HEADER, append_chunk, check_chunk_content_type,
+    discard_upload, finalize_upload, get_upload, parse_offset, receive_chunk
+)
+from recipe.search import (
+    autocomplete_names, queue_search_update, search_recipes
+)
 from recipe.serializers import (
     TagSerializer, IngrediantSerializer, RecipeSerializer,
-    RecipeDetailSerializer, RecipeImageSerializer
+    RecipeDetailSerializer, RecipeImageSerializer, RecipeImageUploadSerializer,
+    RecipeAttrBulkUpdateSerializer, BulkDeleteSerializer
 )
+from recipe.signals import bulk_changes
 
 
-class BaseRecipeAttrViewSet(viewsets.ModelViewSet,
+class BaseRecipeAttrViewSet(ConditionalGetMixin,
+                            CachedListMixin,
+                            viewsets.ModelViewSet,
                             mixins.CreateModelMixin,
                             mixins.ListModelMixin):
     """
     Base class for user owned recipe attributes
     """
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeAttrCursorPagination
+    autocomplete_limit = 10
+    autocomplete_max_limit = 50
+
+    def _autocomplete_text(self):
+        """
+        Helper function returning the typed text of an autocomplete list
+        """
+        if self.action != 'list':
+            return None
+        return self.request.query_params.get('q', '').strip() or None
+
+    def _autocomplete_limit(self):
+        """
+        Helper function parsing the number of autocomplete matches
+        """
+        try:
+            limit = int(self.request.query_params.get(
+                'limit', self.autocomplete_limit
+            ))
+        except ValueError:
+            raise ValidationError({'limit': 'Expected an integer'})
+        return min(max(limit, 1), self.autocomplete_max_limit)
 
     def get_queryset(self):
         is_assigned_only = bool(
@@ -28,11 +86,84 @@ class BaseRecipeAttrViewSet(viewsets.ModelViewSet,
         query_set = self.queryset
         if is_assigned_only:
             query_set = query_set.filter(recipe__isnull=False).distinct()
-        return query_set.filter(user=self.request.user).order_by('-name')
+        query_set = query_set.filter(user=self.request.user)
+        text = self._autocomplete_text()
+        if text:
+            return autocomplete_names(
+                query_set, text, self._autocomplete_limit()
+            )
+        return query_set.order_by('-name', '-id')
+
+    def paginate_queryset(self, queryset):
+        if self._autocomplete_text():
+            return None
+        return super().paginate_queryset(queryset)
 
     def perform_create(self, serializer):
         return serializer.save(user=self.request.user)
 
+    def get_serializer_class(self):
+        if self.action == 'bulk':
+            if self.request.method == 'PATCH':
+                return RecipeAttrBulkUpdateSerializer
+            elif self.request.method == 'DELETE':
+                return BulkDeleteSerializer
+        return self.serializer_class
+
+    def _linked_recipe_ids(self, ids):
+        """
+        Helper function returning the ids of the user's recipes linked to
+        the objects of the given ids
+        """
+        return Recipe.objects.filter(**{
+            'user': self.request.user, f'{self.recipe_relation}__in': ids
+        }).values_list('id', flat=True).distinct()
+
+    @action(methods=['POST', 'PATCH', 'DELETE'], detail=False)
+    def bulk(self, request):
+        """
+        Custom viewset action creating (POST), renaming (PATCH) or
+        deleting (DELETE) many objects in one transaction
+        """
+        model = self.queryset.model
+        is_delete = request.method == 'DELETE'
+        serializer = self.get_serializer(
+            data=request.data, many=not is_delete
+        )
+        if not serializer.is_valid():
+            return Response(
+                data=serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        response_status = status.HTTP_200_OK
+        with transaction.atomic():
+            if request.method == 'POST':
+                results = bulk.bulk_create_named(
+                    model, request.user,
+                    [item['name'] for item in serializer.validated_data]
+                )
+                if any(result['status'] == bulk.STATUS_CREATED
+                       for result in results):
+                    response_status = status.HTTP_201_CREATED
+            elif request.method == 'PATCH':
+                results = bulk.bulk_rename(
+                    model, request.user, serializer.validated_data
+                )
+                queue_search_update(self._linked_recipe_ids([
+                    result['id'] for result in results
+                    if result['status'] == bulk.STATUS_UPDATED
+                ]))
+            else:
+                ids = serializer.validated_data['ids']
+                recipe_ids = list(self._linked_recipe_ids(ids))
+                with bulk_changes():
+                    results = bulk.bulk_delete(model, request.user, ids)
+                queue_search_update(recipe_ids)
+        bump_user_version(request.user.pk)
+
+        return Response(data=results, status=response_status)
+
 
 class TagListViewSet(BaseRecipeAttrViewSet):
     """
@@ -41,6 +172,7 @@ class TagListViewSet(BaseRecipeAttrViewSet):
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    recipe_relation = 'tags'
 
 
 class IngrediantViewSet(BaseRecipeAttrViewSet):
@@ -49,16 +181,21 @@ class IngrediantViewSet(BaseRecipeAttrViewSet):
     """
     serializer_class = IngrediantSerializer
     queryset = Ingrediant.objects.all()
+    recipe_relation = 'ingrediants'
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin,
+                    CachedListMixin,
+                    viewsets.ModelViewSet):
     """
     View Set for Recipe models
     """
     queryset = Recipe.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
     serializer_class = RecipeSerializer
+    pagination_class = RecipeCursorPagination
 
     def _params_to_int_list(self, qs):
         """
@@ -70,23 +207,89 @@ class RecipeViewSet(viewsets.ModelViewSet):
         query_set = self.queryset
         tags = self.request.query_params.get('tags')
         ingrediants = self.request.query_params.get('ingrediants')
-        if tags:
-            tag_ids = self._params_to_int_list(tags)
-            query_set = query_set.filter(tags__id__in=tag_ids)
-        if ingrediants:
-            ing_ids = self._params_to_int_list(ingrediants)
-            query_set = query_set.filter(ingrediants__id__in=ing_ids)
+        match = self.request.query_params.get('match', MATCH_ANY)
+        if match not in MATCH_MODES:
+            raise ValidationError(
+                {'match': f'Expected one of {", ".join(MATCH_MODES)}'}
+            )
+        query_set = filter_recipes(
+            query_set,
+            tag_ids=self._params_to_int_list(tags) if tags else None,
+            ingrediant_ids=(
+                self._params_to_int_list(ingrediants) if ingrediants else None
+            ),
+            match=match,
+        )
+        search = self.request.query_params.get('search')
+        if search:
+            query_set = search_recipes(query_set, search)
 
+        query_set = self._apply_query_plan(query_set)
         return query_set.filter(user=self.request.user).order_by('-id')
 
+    def _apply_query_plan(self, query_set):
+        """
+        Helper function to load only what the current action serializes,
+        with the related tags and ingrediants prefetched in bulk
+        """
+        fields, expand = self._fieldset()
+        if self._use_fast_list():
+            return recipe_rows(query_set, fields, expand)
+        elif self.action == 'retrieve':
+            expand = expand | {'tags', 'ingrediants'}
+        elif self.action != 'list':
+            return query_set
+        return query_set.only(*recipe_columns(fields)).prefetch_related(
+            *recipe_prefetches(fields, expand)
+        )
+
+    def _fieldset(self):
+        """
+        Helper function returning the fields and expanded relations asked
+        for with ?fields= and ?expand= on reads
+        """
+        if self.action not in ('list', 'retrieve'):
+            return None, frozenset()
+        if not hasattr(self, '_parsed_fieldset'):
+            self._parsed_fieldset = parse_fieldset(self.request.query_params)
+        return self._parsed_fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request is not None and self.request.method in (
+                'GET', 'HEAD'):
+            context['fields'], context['expand'] = self._fieldset()
+        return context
+
     def perform_create(self, serializer):
-        return serializer.save(user=self.request.user)
+        # One transaction, so the search vector is updated once for the
+        # recipe and its tags and ingrediants
+        with transaction.atomic():
+            return serializer.save(user=self.request.user)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+
+    def _use_fast_list(self):
+        """
+        Helper function telling whether the list is read through the
+        values() fast path instead of model instances
+        """
+        return (
+            settings.RECIPE_FAST_LIST and self.action == 'list'
+            and self.request.method in ('GET', 'HEAD')
+        )
 
     def get_serializer_class(self):
-        if self.action == 'retrieve':
+        if self._use_fast_list():
+            return RecipeRowSerializer
+        elif self.action == 'retrieve':
             return RecipeDetailSerializer
-        elif self.action == 'upload_image':
+        elif self.action in ('upload_image', 'complete_image_upload'):
             return RecipeImageSerializer
+        elif self.action in ('image_uploads', 'image_upload'):
+            return RecipeImageUploadSerializer
         else:
             return self.serializer_class
 
@@ -101,7 +304,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
             data=request.data
         )
         if serializer.is_valid():
-            serializer.save()
+            schedule_image_processing(serializer.save())
             return Response(
                 data=serializer.data,
                 status=status.HTTP_200_OK
@@ -111,3 +314,110 @@ class RecipeViewSet(viewsets.ModelViewSet):
             data=serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
+
+    def _upload_response(self, upload, status_code=status.HTTP_200_OK):
+        """
+        Helper function returning an upload with its offset header
+        """
+        response = Response(
+            data=self.get_serializer(upload).data,
+            status=status_code
+        )
+        response[UPLOAD_OFFSET_HEADER] = upload.offset
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    @action(methods=['POST'], detail=True, url_path='uploads',
+            url_name='uploads')
+    def image_uploads(self, request, pk=None):
+        """
+        Start a resumable chunked upload of the recipe image
+        """
+        recipe = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.save(user=request.user, recipe=recipe)
+        response = self._upload_response(upload, status.HTTP_201_CREATED)
+        response['Location'] = request.build_absolute_uri(
+            f'{request.path}{upload.pk}/'
+        )
+        return response
+
+    @action(methods=['GET', 'PATCH', 'DELETE'], detail=True,
+            url_path=r'uploads/(?P<upload_id>[^/.]+)', url_name='upload')
+    def image_upload(self, request, pk=None, upload_id=None):
+        """
+        Report the offset of an upload, append the chunk in the request
+        body at Upload-Offset, or abort the upload
+        """
+        if request.method == 'PATCH':
+            check_chunk_content_type(request.content_type)
+            offset = parse_offset(request.headers.get(UPLOAD_OFFSET_HEADER))
+            with receive_chunk(request.stream) as chunk_file:
+                recipe = self.get_object()
+                with transaction.atomic():
+                    upload = get_upload(recipe, upload_id, lock=True)
+                    upload = append_chunk(upload, chunk_file, offset)
+            return self._upload_response(upload)
+
+        recipe = self.get_object()
+        if request.method == 'GET':
+            return self._upload_response(get_upload(recipe, upload_id))
+
+        with transaction.atomic():
+            discard_upload(get_upload(recipe, upload_id, lock=True))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(methods=['POST'], detail=True,
+            url_path=r'uploads/(?P<upload_id>[^/.]+)/complete',
+            url_name='upload-complete')
+    def complete_image_upload(self, request, pk=None, upload_id=None):
+        """
+        Verify a fully received upload and attach it as the recipe image
+        """
+        recipe = finalize_upload(self.get_object(), upload_id)
+        return Response(
+            data=self.get_serializer(recipe).data,
+            status=status.HTTP_200_OK
+        )
+
+    @action(methods=['POST'], detail=False, url_path='import',
+            url_name='import',
+            parser_classes=(JSONLinesParser, JSONParser))
+    def import_recipes(self, request):
+        """
+        Custom viewset action importing a batch of recipes sent as JSON
+        Lines (or a JSON array) in one transaction
+        """
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response(
+                data={'detail': 'Expected a list of recipes'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        validated_rows, errors = validate_rows(rows)
+        if errors:
+            return Response(
+                data={'errors': errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            result = import_recipes(request.user, validated_rows)
+        bump_user_version(request.user.pk)
+
+        return Response(data=result, status=status.HTTP_201_CREATED)
+
+    @action(methods=['GET'], detail=False)
+    def export(self, request):
+        """
+        Custom viewset action streaming all of the user's recipes as
+        JSON Lines in the recipe detail format
+        """
+        response = StreamingHttpResponse(
+            iter_recipe_lines(request.user),
+            content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = \
+            'attachment; filename="recipes.jsonl"'
+        return response
@@ -0,0 +1,100 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+
+
+class HashingPoolBusy(Exception):
+    """
+    Raised when every hashing worker and queue slot is taken
+    """
+
+
+class HashingPool:
+    """
+    Bounded thread pool for password hashing. Work beyond the workers and
+    the queue is refused instead of piling up behind the CPU
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+
+    def _start(self):
+        with self._lock:
+            if self._executor is None:
+                self._slots = threading.BoundedSemaphore(
+                    settings.LOGIN_HASH_WORKERS + settings.LOGIN_HASH_QUEUE
+                )
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.LOGIN_HASH_WORKERS,
+                    thread_name_prefix='login-hash',
+                )
+
+    def run(self, func, *args):
+        """
+        Run func on the pool and wait for its result
+        """
+        self._start()
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolBusy()
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=settings.LOGIN_HASH_TIMEOUT)
+        except TimeoutError:
+            raise HashingPoolBusy()
+
+
+hashing_pool = HashingPool()
+
+
+def _check(raw_password, encoded):
+    """
+    Helper function verifying a password off the request thread, with the
+    upgraded hash when the stored one is outdated
+    """
+    upgraded = []
+    valid = check_password(
+        raw_password, encoded,
+        setter=lambda raw: upgraded.append(make_password(raw))
+    )
+    return valid, upgraded[0] if upgraded else None
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    Model backend checking passwords on the bounded hashing pool, while
+    the user lookup and any rehash save stay on the request thread
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so unknown users take as long as known ones
+            hashing_pool.run(make_password, password)
+            return None
+
+        valid, upgraded = hashing_pool.run(_check, password, user.password)
+        if not valid:
+            return None
+        if upgraded is not None:
+            user.password = upgraded
+            user.save(update_fields=['password'])
+        if self.user_can_authenticate(user):
+            return user
+        return None
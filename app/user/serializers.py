@@ -2,9 +2,13 @@ from django.contrib.auth import get_user_model, authenticate
 from django.utils.translation import ugettext_lazy as _
 
 from rest_framework import serializers
+from rest_framework.exceptions import Throttled
 
+from core.metrics import TimedSerializerMixin
+from user.backends import HashingPoolBusy
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """ serializer for user model"""
 
     class Meta:
@@ -20,15 +24,12 @@ class UserSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         password = validated_data.pop("password", None)
-        user = super().update(instance, validated_data)
         if password:
-            user.set_password(password)
-
-        user.save()
-        return user
+            instance.set_password(password)
+        return super().update(instance, validated_data)
 
 
-class AuthTokenSerializer(serializers.Serializer):
+class AuthTokenSerializer(TimedSerializerMixin, serializers.Serializer):
     """ serializer for auth tocken creation"""
 
     email = serializers.EmailField()
@@ -41,10 +42,13 @@ class AuthTokenSerializer(serializers.Serializer):
         email = attrs['email']
         password = attrs['password']
 
-        user = authenticate(
-            request=self.context.get('request'),
-            username=email,
-            password=password)
+        try:
+            user = authenticate(
+                request=self.context.get('request'),
+                username=email,
+                password=password)
+        except HashingPoolBusy:
+            raise Throttled(wait=1)
         if not user:
             msg = _('unable to authenticate with provided creadentials')
             raise serializers.ValidationError(msg, code='authentication')
@@ -1,10 +1,15 @@
-from django.test import TestCase
+import threading
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from user.backends import HashingPool, HashingPoolBusy
+
 
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
@@ -97,6 +102,33 @@ class PublicUserAPITest(TestCase):
         self.assertNotIn('password', res.data)
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_login_rehashes_outdated_password(self):
+        """ test a login upgrades a hash made with another cost """
+        payload = {'email': 'john7ric@mail.com', 'password': '123456'}
+        with self.settings(PASSWORD_HASH_ITERATIONS=1000):
+            user = create_user(**payload)
+        self.assertIn('$1000$', user.password)
+
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000):
+            res = self.client.post(TOKEN_URL, payload)
+
+        user.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('$2000$', user.password)
+        self.assertTrue(user.check_password('123456'))
+
+    def test_create_token_when_hashing_saturated(self):
+        """ test logins are turned away while the hashing pool is full """
+        payload = {'email': 'john7ric@mail.com', 'password': '123456'}
+        create_user(**payload)
+
+        with patch('user.backends.hashing_pool.run',
+                   side_effect=HashingPoolBusy):
+            res = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+
     def test_create_token_with_missing_fields(self):
         """ test if token is not issued with missing fields """
         res = self.client.post(
@@ -152,3 +184,31 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(res.data['name'], payload['name'])
         self.assertTrue(self.user.check_password(payload['password']))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class HashingPoolTests(TestCase):
+    """ Test the bounded password hashing pool """
+
+    @override_settings(LOGIN_HASH_WORKERS=1, LOGIN_HASH_QUEUE=0)
+    def test_refuses_work_beyond_capacity(self):
+        """ test work is refused once workers and queue are taken """
+        pool = HashingPool()
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking_job():
+            started.set()
+            release.wait(5)
+            return 'done'
+
+        blocked = threading.Thread(target=pool.run, args=(blocking_job,))
+        blocked.start()
+        started.wait(5)
+        try:
+            with self.assertRaises(HashingPoolBusy):
+                pool.run(lambda: 'refused')
+        finally:
+            release.set()
+            blocked.join(5)
+
+        self.assertEqual(pool.run(lambda: 'accepted'), 'accepted')
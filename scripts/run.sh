@@ -0,0 +1,16 @@
+#!/bin/sh
+
+set -e
+
+# Every process writes its metrics here, start from an empty dir
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
+python manage.py wait_for_db
+python manage.py collectstatic --noinput
+python manage.py migrate
+python manage.py check --deploy
+
+exec gunicorn -c python:app.gunicorn_conf app.wsgi:application